@@ -1,10 +1,13 @@
 import os
 import sys
 
-# Add the project root to sys.path so we can import from backend_python
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# The backend's modules import each other as `app.*`, so backend_python itself must be on sys.path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend_python'))
+
+# Mount endpoint modules on first use: each cold start only imports what it serves
+os.environ.setdefault("LAZY_ROUTERS", "true")
 
 # Import the FastAPI app
-from backend_python.app.main import app
+from app.main import app
 
 # Vercel needs a variable named 'app'
@@ -1,22 +1,82 @@
-from fastapi import APIRouter
-from app.api.endpoints import donors, emergency, auth, hospitals, blood_banks, admin
+from importlib import import_module
 
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
 
-api_router = APIRouter()
-
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(donors.router, prefix="/donors", tags=["donors"])
-api_router.include_router(emergency.router, prefix="/emergency", tags=["emergency"])
-api_router.include_router(hospitals.router, prefix="/hospitals", tags=["hospitals"])
+# Endpoint modules with their prefix and tags, mounted in this order under /api/v1
 # Note: frontend api.ts expects /api/hospitals so we might need alias or ensuring prefix is consistent.
-# The main.py includes api_router with prefix /api/v1.
+# The main.py includes these with prefix /api/v1.
 # So this becomes /api/v1/hospitals.
-# Frontend api.ts calls `/api/hospitals`. 
-# Wait, frontend uses `API_URL` + endpoint.
-# If frontend calls `/api/hospitals`, and backend is `/api/v1/hospitals`, we have a mismatch if not handled.
 # Frontend `api.ts` has specific paths: `/api/hospitals` and `/donors` (without /api prefix in string).
 # Generally best to standardize. I will map them as requested by frontend code I read.
+ROUTERS = (
+    ("auth", "/auth", ["auth"]),
+    ("donors", "/donors", ["donors"]),
+    ("emergency", "/emergency", ["emergency"]),
+    ("hospitals", "/hospitals", ["hospitals"]),
+    ("blood_banks", "/blood-banks", ["blood-banks"]),
+    ("admin", "/admin", ["admin"]),
+)
+
+
+def _router(module: str):
+    return import_module(f"app.api.endpoints.{module}").router
+
+
+class LazyRouter(BaseRoute):
+    """
+    Stands in for one endpoint module until a request arrives under its
+    prefix: then the module is imported, its routes are mounted in place of
+    this one and the request is dispatched again. A serverless cold start
+    only pays for the routers it actually serves.
+    """
+
+    def __init__(self, app: FastAPI, module: str, prefix: str, tags: list):
+        self.app = app
+        self.module = module
+        self.prefix = prefix
+        self.tags = tags
+
+    def matches(self, scope):
+        if scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if path == self.prefix or path.startswith(self.prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def load(self) -> None:
+        # Synchronous, so concurrent first requests cannot mount a router twice
+        if self in self.app.router.routes:
+            self.app.include_router(_router(self.module), prefix=self.prefix, tags=self.tags)
+            self.app.router.routes.remove(self)
+
+    async def handle(self, scope, receive, send):
+        self.load()
+        await self.app.router(scope, receive, send)
+
+    def url_path_for(self, name: str, /, **path_params):
+        raise NoMatchFound(name, path_params)
+
+
+def load_routers(app: FastAPI) -> None:
+    """Mount every router still pending (OpenAPI schema, warm-up)."""
+    for route in list(app.router.routes):
+        if isinstance(route, LazyRouter):
+            route.load()
+
+
+def include_api_routers(app: FastAPI, prefix: str, lazy: bool = False) -> None:
+    for module, path, tags in ROUTERS:
+        if lazy:
+            app.router.routes.append(LazyRouter(app, module, prefix + path, tags))
+        else:
+            app.include_router(_router(module), prefix=prefix + path, tags=tags)
+
+    if lazy:
+        build_openapi = app.openapi
+
+        def openapi():
+            load_routers(app)
+            return build_openapi()
 
-api_router.include_router(blood_banks.router, prefix="/blood-banks", tags=["blood-banks"])
-api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
-# Future: api_router.include_router(emergency.router, prefix="/emergency", tags=["emergency"])
+        app.openapi = openapi
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Any
-from app.services.auth import get_current_user, get_supabase_client
-from supabase import Client
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Any, Optional
+from app.core.security import get_current_user
+from app.core.database import get_repository
+from app.core.repository import Repository
+from app.core.pagination import PageParams, fetch_page, set_next_cursor
+from app.services.admin_stats import admin_stats
+from app.services.export_service import EXPORTS, EXPORT_FORMATS, export_stream
 
 router = APIRouter()
 
@@ -14,46 +20,44 @@ def get_current_admin(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not authorized as admin")
     return current_user
 
+def get_admin_repository(repository: Optional[Repository] = Depends(get_repository)) -> Repository:
+    if repository is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return repository
+
 @router.get("/stats")
-def get_admin_stats(
+async def get_admin_stats(
     current_user: dict = Depends(get_current_admin),
-    supabase: Client = Depends(get_supabase_client)
+    repo: Repository = Depends(get_admin_repository)
 ):
     """
     Get system-wide statistics.
+    Served from a snapshot refreshed in the background (see AdminStats).
     """
-    donors_count = supabase.table("donors").select("*", count="exact").execute().count
-    hospitals_count = supabase.table("hospitals").select("*", count="exact").execute().count
-    banks_count = supabase.table("blood_banks").select("*", count="exact").execute().count
-    requests_count = supabase.table("blood_requests").select("*", count="exact").execute().count
-    
-    return {
-        "donors": donors_count,
-        "hospitals": hospitals_count,
-        "blood_banks": banks_count,
-        "requests": requests_count,
-        # Placeholder for more complex stats
-        "total_units_donated": 1500, 
-        "lives_saved": 450
-    }
+    return await admin_stats.get()
 
 @router.get("/users")
-def get_all_users(
+async def get_all_users(
+    response: Response,
+    page: PageParams = Depends(),
     current_user: dict = Depends(get_current_admin),
-    supabase: Client = Depends(get_supabase_client)
+    repo: Repository = Depends(get_admin_repository)
 ):
     """
     List all users.
+    Paginated: pass the X-Next-Cursor header back as `cursor`.
     """
     # Requires Supabase Service Role Key for auth.users usually, or just query public.users
     # Here we query public.users
-    return supabase.table("users").select("*").execute().data
+    users = await fetch_page(repo, "users", page)
+    set_next_cursor(response, users)
+    return users
 
 @router.delete("/users/{user_id}")
-def delete_user(
+async def delete_user(
     user_id: str,
     current_user: dict = Depends(get_current_admin),
-    supabase: Client = Depends(get_supabase_client)
+    repo: Repository = Depends(get_admin_repository)
 ):
     """
     Delete a user.
@@ -62,4 +66,46 @@ def delete_user(
     # To delete from auth.users, we need supabase admin client (service_role), 
     # which we might not have exposed in this simple client.
     # For now, just delete the public reference.
-    return supabase.table("users").delete().eq("user_id", user_id).execute()
+    return await repo.delete("users", [("user_id", "eq", user_id)])
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    city: Optional[str] = None,
+    blood_type: Optional[str] = None,
+    status: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin),
+    repo: Repository = Depends(get_admin_repository)
+):
+    """
+    Stream a whole table (donors, hospitals, blood_banks, requests, users) as NDJSON or CSV.
+    Rows are read and sent page by page, so exports of any size use constant memory.
+    """
+    if dataset not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset; expected one of {', '.join(EXPORTS)}")
+    _, columns = EXPORTS[dataset]
+    filters = [
+        (column, "eq", value)
+        for column, value in (("city", city), ("blood_type", blood_type), ("status", status))
+        if value is not None
+    ]
+    unknown = [column for column, _, _ in filters if column not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot filter {dataset} by {', '.join(unknown)}")
+
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    return StreamingResponse(
+        export_stream(repo, dataset, format, filters=filters),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/realtime")
+async def get_realtime_metrics(current_user: dict = Depends(get_current_admin)):
+    """
+    Socket.IO fan-out counters for this worker: emits, coalesced updates, deltas, dropped messages.
+    """
+    from app.core.socket import socket_metrics
+    return socket_metrics.snapshot()
+
@@ -1,72 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from typing import List, Optional
 from app.services.blood_bank_service import BloodBankService
 from app.models.blood_bank_models import (
-    BloodBankCreate, BloodBankUpdate, BloodBankResponse,
-    BloodInventoryUpdate, BloodBatchCreate, BloodBatchResponse
+    BloodBankCreate, BloodBankUpdate, BloodBankResponse, BloodBankNearbyResponse, BloodBankStockResponse,
+    BloodInventoryUpdate, BloodBatchCreate, BloodBatchResponse, BloodBatchBulkResponse,
+    BloodAllocationRequest, BloodAllocationResponse, NearExpiryBatch
 )
-from app.services.auth import get_current_user
-from supabase import Client
-from app.api.endpoints.auth import get_supabase_client
+from app.models.schemas import BloodType
+from app.services.batch_import import BatchImportError, detect_format, parse_batches
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.core.database import get_repository
+from app.core.repository import Repository
+from app.core.pagination import PageParams
+from app.core.http_cache import response_cache
 
 router = APIRouter()
 
-def get_blood_bank_service(supabase: Client = Depends(get_supabase_client)) -> BloodBankService:
-    return BloodBankService(supabase)
+def get_blood_bank_service(repository: Optional[Repository] = Depends(get_repository)) -> BloodBankService:
+    if repository is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return BloodBankService(repository)
 
 # --- Public Endpoints ---
 
 @router.get("/", response_model=List[BloodBankResponse])
-def read_blood_banks(
+async def read_blood_banks(
+    request: Request,
     city: Optional[str] = None,
+    page: PageParams = Depends(),
     service: BloodBankService = Depends(get_blood_bank_service)
 ):
-    return service.get_blood_banks(city=city)
+    """
+    Paginated: pass the X-Next-Cursor header back as `cursor`. Cached, with ETag support.
+    """
+    return await response_cache.serve(
+        request, ["blood_banks"],
+        lambda: service.get_blood_banks(page, city=city),
+        model=List[BloodBankResponse],
+    )
 
-@router.get("/search/{blood_type}", response_model=List[BloodBankResponse])
-def search_blood_banks(
-    blood_type: str,
+@router.get("/nearby", response_model=List[BloodBankNearbyResponse])
+async def read_nearby_blood_banks(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=500),
+    k: int = Query(20, ge=1, le=200),
+    service: BloodBankService = Depends(get_blood_bank_service)
+):
+    return await service.get_nearby_blood_banks(lat, lng, k=k, radius_km=radius_km)
+
+@router.get("/search/{blood_type}", response_model=List[BloodBankStockResponse])
+async def search_blood_banks(
+    blood_type: BloodType,
     minUnits: int = Query(1, alias="minUnits"),
+    city: Optional[str] = None,
     service: BloodBankService = Depends(get_blood_bank_service)
 ):
-    return service.get_blood_banks(blood_type=blood_type, min_units=minUnits)
+    """
+    Banks with at least `minUnits` of `blood_type`, most stock first.
+    `city` matches by prefix, case-insensitively.
+    """
+    return await service.search_stock(blood_type.value, min_units=minUnits, city=city)
 
 @router.get("/inventory/total")
-def get_total_inventory(service: BloodBankService = Depends(get_blood_bank_service)):
-    return service.get_total_inventory_stats()
+async def get_total_inventory(
+    city: Optional[str] = None,
+    service: BloodBankService = Depends(get_blood_bank_service)
+):
+    return await service.get_total_inventory_stats(city=city)
 
 @router.get("/{bank_id}", response_model=BloodBankResponse)
-def read_blood_bank(
+async def read_blood_bank(
     bank_id: int,
+    request: Request,
     service: BloodBankService = Depends(get_blood_bank_service)
 ):
-    bank = service.get_blood_bank_by_id(bank_id)
-    if not bank:
-        raise HTTPException(status_code=404, detail="Blood bank not found")
-    return bank
+    return await response_cache.serve(
+        request, [f"blood_bank:{bank_id}"],
+        lambda: service.get_blood_bank_by_id(bank_id),
+        model=BloodBankResponse, not_found="Blood bank not found",
+    )
 
 @router.get("/{bank_id}/inventory")
-def read_inventory(
+async def read_inventory(
     bank_id: int,
+    request: Request,
     service: BloodBankService = Depends(get_blood_bank_service)
 ):
-    return service.get_inventory(bank_id)
+    return await response_cache.serve(
+        request, [f"inventory:{bank_id}"],
+        lambda: service.get_inventory(bank_id),
+    )
 
 # --- Protected Endpoints ---
 
 @router.get("/me", response_model=BloodBankResponse)
-def read_blood_bank_me(
+async def read_blood_bank_me(
     current_user: dict = Depends(get_current_user),
     service: BloodBankService = Depends(get_blood_bank_service)
 ):
     user_id = current_user.get("sub") or current_user.get("id")
-    bank = service.get_blood_bank_by_user_id(user_id)
+    bank = await service.get_blood_bank_by_user_id(user_id)
     if not bank:
         raise HTTPException(status_code=404, detail="Profile not found")
     return bank
 
 @router.post("/", response_model=BloodBankResponse, status_code=status.HTTP_201_CREATED)
-def create_blood_bank_profile(
+async def create_blood_bank_profile(
     bank: BloodBankCreate,
     current_user: dict = Depends(get_current_user),
     service: BloodBankService = Depends(get_blood_bank_service)
@@ -74,14 +115,14 @@ def create_blood_bank_profile(
     user_id = current_user.get("sub") or current_user.get("id")
     # check existing
     try:
-        if service.get_blood_bank_by_user_id(user_id):
+        if await service.get_blood_bank_by_user_id(user_id):
              raise HTTPException(status_code=400, detail="Profile already exists")
     except:
         pass
-    return service.create_blood_bank(bank, user_id)
+    return await service.create_blood_bank(bank, user_id)
 
 @router.put("/{bank_id}/inventory")
-def update_inventory_manual(
+async def update_inventory_manual(
     bank_id: int,
     inventory: BloodInventoryUpdate,
     current_user: dict = Depends(get_current_user),
@@ -89,33 +130,98 @@ def update_inventory_manual(
 ):
     # Auth check: only owner
     user_id = current_user.get("sub") or current_user.get("id")
-    bank = service.get_blood_bank_by_id(bank_id)
+    bank = await service.get_blood_bank_by_id(bank_id)
     if not bank or str(bank['user_id']) != str(user_id):
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    return service.update_inventory(bank_id, inventory)
+    return await service.update_inventory(bank_id, inventory)
 
 @router.post("/inventory/batches", response_model=BloodBatchResponse)
-def add_inventory_batch(
+async def add_inventory_batch(
     batch: BloodBatchCreate,
     current_user: dict = Depends(get_current_user),
     service: BloodBankService = Depends(get_blood_bank_service)
 ):
     user_id = current_user.get("sub") or current_user.get("id")
-    bank = service.get_blood_bank_by_user_id(user_id)
+    bank = await service.get_blood_bank_by_user_id(user_id)
     if not bank:
         raise HTTPException(status_code=404, detail="Blood bank profile required")
         
-    return service.add_batch(bank['id'], batch)
+    return await service.add_batch(bank['id'], batch)
+
+@router.post("/inventory/batches/bulk", response_model=BloodBatchBulkResponse, status_code=status.HTTP_201_CREATED)
+async def add_inventory_batches_bulk(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    service: BloodBankService = Depends(get_blood_bank_service)
+):
+    """
+    Log many batches at once. Accepts a JSON array, NDJSON or CSV body
+    (blood_type,units,expiry_date), either raw or as a multipart 'file' upload.
+    All rows are validated first; the whole upload is applied in one transaction.
+    """
+    user_id = current_user.get("sub") or current_user.get("id")
+    bank = await service.get_blood_bank_by_user_id(user_id)
+    if not bank:
+        raise HTTPException(status_code=404, detail="Blood bank profile required")
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=422, detail="Expected a 'file' upload")
+        body = await upload.read()
+        fmt = detect_format(upload.content_type, upload.filename)
+    else:
+        body = await request.body()
+        fmt = detect_format(content_type)
+
+    try:
+        batches = parse_batches(body, fmt, settings.BULK_INGEST_MAX_ROWS)
+    except BatchImportError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+
+    return await service.add_batches(bank['id'], batches)
 
 @router.get("/inventory/batches")
-def get_my_batches(
+async def get_my_batches(
     current_user: dict = Depends(get_current_user),
     service: BloodBankService = Depends(get_blood_bank_service)
 ):
     user_id = current_user.get("sub") or current_user.get("id")
-    bank = service.get_blood_bank_by_user_id(user_id)
+    bank = await service.get_blood_bank_by_user_id(user_id)
     if not bank:
         raise HTTPException(status_code=404, detail="Blood bank profile required")
     
-    return service.get_batches(bank['id'])
+    return await service.get_batches(bank['id'])
+
+@router.post("/inventory/allocate", response_model=BloodAllocationResponse)
+async def allocate_inventory(
+    allocation: BloodAllocationRequest,
+    current_user: dict = Depends(get_current_user),
+    service: BloodBankService = Depends(get_blood_bank_service)
+):
+    """
+    Draw units for a request from this bank's soonest-expiring batches (FEFO).
+    """
+    user_id = current_user.get("sub") or current_user.get("id")
+    bank = await service.get_blood_bank_by_user_id(user_id)
+    if not bank:
+        raise HTTPException(status_code=404, detail="Blood bank profile required")
+
+    return await service.allocate_units(bank['id'], allocation.blood_type, allocation.units)
+
+@router.get("/inventory/near-expiry", response_model=List[NearExpiryBatch])
+async def get_near_expiry_batches(
+    days: int = Query(7, ge=0, le=90),
+    blood_type: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user),
+    service: BloodBankService = Depends(get_blood_bank_service)
+):
+    """
+    Batches across all banks that expire within the next `days` days, soonest first.
+    """
+    return await service.get_near_expiry(days, blood_type=blood_type, limit=limit)
+
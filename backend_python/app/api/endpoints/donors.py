@@ -1,22 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from typing import List, Optional
 from app.models import schemas
 from app.services.donor_service import DonorService
 from app.core.security import get_current_user
+from app.core.pagination import PageParams
+from app.core.serialization import fast_response
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Donor])
 async def search_donors(
+    request: Request,
     city: Optional[str] = None, 
     blood_type: Optional[str] = None,
+    available: Optional[bool] = None,
+    eligible: Optional[bool] = Query(None, description="Last donation at least 56 days ago (or never)"),
+    page: PageParams = Depends(),
     current_user = Depends(get_current_user)
 ):
     """
-    Search for donors by city or blood type.
+    Search for donors by city, blood type, availability or eligibility to donate.
+    Authentication required. Paginated: pass the X-Next-Cursor header back as `cursor`.
+    """
+    donors = await DonorService.get_donors(page, city, blood_type, available, eligible)
+    return fast_response(request, donors, List[schemas.Donor])
+
+@router.get("/nearby", response_model=List[schemas.NearbyDonor])
+async def search_nearby_donors(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=500),
+    k: int = Query(20, ge=1, le=200),
+    blood_type: Optional[schemas.BloodType] = None,
+    available_only: bool = True,
+    current_user = Depends(get_current_user)
+):
+    """
+    Nearest donors to a point, optionally limited to radius_km.
     Authentication required.
     """
-    return await DonorService.get_donors(city, blood_type)
+    return await DonorService.get_nearby_donors(
+        lat, lng, k=k, radius_km=radius_km,
+        blood_type=blood_type.value if blood_type else None,
+        available_only=available_only,
+    )
 
 @router.post("/", response_model=schemas.Donor, status_code=status.HTTP_201_CREATED)
 async def register_as_donor(
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from typing import List, Optional
 from app.models import schemas
 from app.services.emergency_service import EmergencyService
 from app.core.security import get_current_user
+from app.core.pagination import PageParams
+from app.core.serialization import fast_response
 
 router = APIRouter()
 
@@ -20,15 +22,19 @@ async def create_blood_request(
 
 @router.get("/", response_model=List[schemas.BloodRequest])
 async def list_requests(
+    request: Request,
     hospital_id: Optional[int] = None,
     status: Optional[str] = None,
+    page: PageParams = Depends(),
     current_user = Depends(get_current_user)
 ):
     """
-    List blood requests. 
+    List blood requests, newest first. 
     Hospitals see their own, Donors see all active ones (filtered by policy).
+    Paginated: pass the X-Next-Cursor header back as `cursor`.
     """
-    return await EmergencyService.get_requests(hospital_id, status)
+    requests = await EmergencyService.get_requests(page, hospital_id, status)
+    return fast_response(request, requests, List[schemas.BloodRequest])
 
 @router.get("/{request_id}", response_model=schemas.BloodRequest)
 async def get_request_details(
@@ -43,6 +49,23 @@ async def get_request_details(
         raise HTTPException(status_code=404, detail="Request not found")
     return req
 
+@router.get("/{request_id}/matches", response_model=schemas.RequestMatches)
+async def get_request_matches(
+    request_id: int,
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: float = Query(50, gt=0, le=500),
+    limit: int = Query(20, ge=1, le=100),
+    current_user = Depends(get_current_user)
+):
+    """
+    Rank compatible, available donors and stocked blood banks for a request.
+    Defaults to the requesting hospital's location when lat/lng are omitted.
+    """
+    # NumPy is only loaded once matching is actually used, not on a cold start
+    from app.services.matching_service import MatchingService
+    return await MatchingService.find_matches(request_id, lat=lat, lng=lng, radius_km=radius_km, limit=limit)
+
 @router.patch("/{request_id}/status", response_model=schemas.BloodRequest)
 async def update_request_status(
     request_id: int,
@@ -1,29 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from typing import List, Optional
 from app.services.hospital_service import HospitalService
-from app.models.hospital_models import HospitalCreate, HospitalUpdate, HospitalResponse
-from app.services.auth import get_current_user
-from supabase import Client
-from app.api.endpoints.auth import get_supabase_client
+from app.models.hospital_models import HospitalCreate, HospitalUpdate, HospitalResponse, HospitalNearbyResponse
+from app.core.security import get_current_user
+from app.core.database import get_repository
+from app.core.repository import Repository
+from app.core.pagination import PageParams
+from app.core.http_cache import response_cache
 
 router = APIRouter()
 
-def get_hospital_service(supabase: Client = Depends(get_supabase_client)) -> HospitalService:
-    return HospitalService(supabase)
+def get_hospital_service(repository: Optional[Repository] = Depends(get_repository)) -> HospitalService:
+    if repository is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return HospitalService(repository)
 
 @router.get("/", response_model=List[HospitalResponse])
-def read_hospitals(
+async def read_hospitals(
+    request: Request,
     city: Optional[str] = None,
     verified: Optional[bool] = None,
+    page: PageParams = Depends(),
     service: HospitalService = Depends(get_hospital_service)
 ):
     """
     Retrieve hospitals with optional filtering by city and verification status.
+    Paginated: pass the X-Next-Cursor header back as `cursor`. Cached, with ETag support.
     """
-    return service.get_hospitals(city=city, verified=verified)
+    return await response_cache.serve(
+        request, ["hospitals"],
+        lambda: service.get_hospitals(page, city=city, verified=verified),
+        model=List[HospitalResponse],
+    )
+
+@router.get("/nearby", response_model=List[HospitalNearbyResponse])
+async def read_nearby_hospitals(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=500),
+    k: int = Query(20, ge=1, le=200),
+    verified: Optional[bool] = None,
+    service: HospitalService = Depends(get_hospital_service)
+):
+    """
+    Nearest hospitals to a point, optionally limited to radius_km.
+    """
+    return await service.get_nearby_hospitals(lat, lng, k=k, radius_km=radius_km, verified=verified)
 
 @router.get("/me", response_model=HospitalResponse)
-def read_hospital_me(
+async def read_hospital_me(
     current_user: dict = Depends(get_current_user),
     service: HospitalService = Depends(get_hospital_service)
 ):
@@ -34,26 +59,28 @@ def read_hospital_me(
     if not user_id:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
         
-    hospital = service.get_hospital_by_user_id(user_id)
+    hospital = await service.get_hospital_by_user_id(user_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital profile not found")
     return hospital
 
 @router.get("/{hospital_id}", response_model=HospitalResponse)
-def read_hospital(
+async def read_hospital(
     hospital_id: int,
+    request: Request,
     service: HospitalService = Depends(get_hospital_service)
 ):
     """
-    Get a specific hospital by ID.
+    Get a specific hospital by ID. Cached, with ETag support.
     """
-    hospital = service.get_hospital_by_id(hospital_id)
-    if not hospital:
-        raise HTTPException(status_code=404, detail="Hospital not found")
-    return hospital
+    return await response_cache.serve(
+        request, [f"hospital:{hospital_id}"],
+        lambda: service.get_hospital_by_id(hospital_id),
+        model=HospitalResponse, not_found="Hospital not found",
+    )
 
 @router.post("/", response_model=HospitalResponse, status_code=status.HTTP_201_CREATED)
-def create_hospital_profile(
+async def create_hospital_profile(
     hospital: HospitalCreate,
     current_user: dict = Depends(get_current_user),
     service: HospitalService = Depends(get_hospital_service)
@@ -68,17 +95,17 @@ def create_hospital_profile(
     # Check if profile already exists
     existing = None
     try:
-        existing = service.get_hospital_by_user_id(user_id)
+        existing = await service.get_hospital_by_user_id(user_id)
     except Exception:
         pass
     
     if existing:
         raise HTTPException(status_code=400, detail="Hospital profile already exists for this user")
 
-    return service.create_hospital(hospital, user_id)
+    return await service.create_hospital(hospital, user_id)
 
 @router.put("/{hospital_id}", response_model=HospitalResponse)
-def update_hospital_profile(
+async def update_hospital_profile(
     hospital_id: int,
     hospital_update: HospitalUpdate,
     current_user: dict = Depends(get_current_user),
@@ -91,7 +118,7 @@ def update_hospital_profile(
     user_id = current_user.get("sub") or current_user.get("id")
     
     # Basic authorization check
-    hospital = service.get_hospital_by_id(hospital_id)
+    hospital = await service.get_hospital_by_id(hospital_id)
     if not hospital:
         raise HTTPException(status_code=404, detail="Hospital not found")
         
@@ -101,4 +128,4 @@ def update_hospital_profile(
          # Allow admin bypass in future, for now strict owner check
          raise HTTPException(status_code=403, detail="Not authorized to update this profile")
 
-    return service.update_hospital(hospital_id, hospital_update)
+    return await service.update_hospital(hospital_id, hospital_update)
@@ -0,0 +1,302 @@
+"""
+Admission control: priority lanes, load shedding and per-user rate limits.
+
+Every request is put in a lane before it reaches a route:
+
+* ``critical``: critical/urgent ``POST /emergency/`` (urgency read from the
+  body) and ``PATCH /emergency/{id}/status``, from callers whose bearer token
+  verifies (signature, expiry and audience, checked here in-process). Never
+  queued, never shed; rate limited per user with a larger burst than the
+  other lanes. The same requests without a valid token go to the standard
+  lane, so a forged body cannot jump the queue.
+* ``browse``: directory reads (GET hospitals, blood banks, donors) and admin
+  reads. A small concurrency limit and a short queue; when both are full the
+  request gets an immediate 503 with ``Retry-After``.
+* ``standard``: everything else, with a larger limit and queue.
+
+Bounding the lanes that can be flooded keeps the event loop and the database
+pool free for the critical lane, which never waits for them. Limits are per
+worker process.
+
+Each caller also has an in-memory token bucket (a separate one in the
+critical lane), keyed by the verified user, else by the client address, so
+rotating junk tokens does not buy a fresh bucket. An empty bucket gets a 429
+with ``Retry-After``.
+
+Exported as ``beos_admission_in_flight{lane}``, ``beos_admission_queue_depth{lane}``,
+``beos_admission_requests_total{lane,outcome}`` and ``beos_admission_wait_seconds{lane}``.
+"""
+import asyncio
+import json
+import math
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, registry
+
+ADMISSION_REQUESTS = registry.register(Counter(
+    "beos_admission_requests_total", "Admission decisions by lane.", ("lane", "outcome")))
+ADMISSION_IN_FLIGHT = registry.register(Gauge(
+    "beos_admission_in_flight", "Requests currently running, by lane.", ("lane",)))
+ADMISSION_QUEUE_DEPTH = registry.register(Gauge(
+    "beos_admission_queue_depth", "Requests waiting for a slot, by lane.", ("lane",)))
+ADMISSION_WAIT = registry.register(Histogram(
+    "beos_admission_wait_seconds", "Time admitted requests waited for a slot.", ("lane",)))
+
+# (lane, method, path below API_V1_STR); first match wins, default is "standard"
+LANE_RULES = [
+    ("critical", "PATCH", re.compile(r"/emergency/\d+/status/?$")),
+    ("browse", "GET", re.compile(r"/admin(/.*)?$")),
+    ("standard", "GET", re.compile(r"/(hospitals|blood-banks|donors)/me/?$")),
+    ("standard", "GET", re.compile(r"/blood-banks/inventory/(batches|near-expiry)/?$")),
+    ("browse", "GET", re.compile(r"/(hospitals|blood-banks|donors)(/.*)?$")),
+]
+EMERGENCY_CREATE = re.compile(r"/emergency/?$")
+PRIORITY_URGENCIES = {"critical", "urgent"}
+# Larger bodies are not inspected (and go to the standard lane)
+MAX_PEEK_BYTES = 64 * 1024
+
+
+class Lane:
+    """
+    At most ``limit`` requests at a time (``None``: unlimited); up to
+    ``queue_limit`` more wait at most ``max_wait`` seconds for a slot.
+    """
+
+    def __init__(self, name: str, limit: Optional[int], queue_limit: int = 0, max_wait: float = 0.0):
+        self.name = name
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> bool:
+        if self.limit is None or (self.active < self.limit and not self.waiting):
+            self.active += 1
+            return True
+        if len(self.waiting) >= self.queue_limit:
+            return False
+        slot = asyncio.get_running_loop().create_future()
+        self.waiting.append(slot)
+        try:
+            await asyncio.wait_for(slot, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if slot.done() and not slot.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            elif slot in self.waiting:
+                self.waiting.remove(slot)
+            if isinstance(exc, asyncio.TimeoutError):
+                return False
+            raise
+        return True
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest waiter, so newcomers cannot jump the queue
+        while self.waiting:
+            slot = self.waiting.popleft()
+            if not slot.done():
+                slot.set_result(True)
+                return
+        self.active -= 1
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float):
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, rate: float, capacity: float) -> float:
+        """Seconds until a token is available; 0 means one was taken."""
+        now = time.monotonic()
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: float, max_callers: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        # An idle bucket refills completely, so evicting it loses nothing
+        self.buckets = TTLCache(max_entries=max_callers, ttl=max(burst / rate, 1.0) if rate > 0 else 1.0)
+
+    def check(self, caller: str) -> float:
+        if self.rate <= 0:
+            return 0.0
+        bucket = self.buckets.get(caller)
+        if bucket is None:
+            bucket = TokenBucket(self.burst)
+            self.buckets.set(caller, bucket)
+        return bucket.take(self.rate, self.burst)
+
+
+def classify(method: str, path: str, body: bytes = b"") -> Optional[str]:
+    """Lane for a request; ``None`` for paths outside the API (health checks, metrics)."""
+    if not path.startswith(settings.API_V1_STR):
+        return None
+    path = path[len(settings.API_V1_STR):]
+    method = "GET" if method == "HEAD" else method
+    if method == "POST" and EMERGENCY_CREATE.match(path):
+        return "critical" if _is_priority_request(body) else "standard"
+    for lane, rule_method, pattern in LANE_RULES:
+        if method == rule_method and pattern.match(path):
+            return lane
+    return "standard"
+
+
+def _is_priority_request(body: bytes) -> bool:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return False
+    if not isinstance(data, dict):
+        return False
+    return data.get("is_critical") is True or str(data.get("urgency", "")).lower() in PRIORITY_URGENCIES
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def caller_key(scope) -> str:
+    """``user:<id>`` for a valid bearer token, else ``ip:<address>``."""
+    authorization = _header(scope, b"authorization") or ""
+    if authorization.lower().startswith("bearer "):
+        from app.core.security import verified_user
+
+        user = await verified_user(authorization[7:].strip())
+        if user is not None and user.id:
+            return f"user:{user.id}"
+    forwarded = _header(scope, b"x-forwarded-for") if settings.RATE_LIMIT_TRUST_PROXY else None
+    if forwarded:
+        return f"ip:{forwarded.split(',')[0].strip()}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+async def _peek_body(receive) -> Tuple[bytes, List[dict]]:
+    messages: List[dict] = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if not message.get("more_body") or size > MAX_PEEK_BYTES:
+            break
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.request")
+    return (body if size <= MAX_PEEK_BYTES else b""), messages
+
+
+def _replay(messages: List[dict], receive):
+    async def replayed():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return replayed
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def default_lanes() -> Dict[str, Lane]:
+    return {
+        "critical": Lane("critical", None),
+        "standard": Lane(
+            "standard", settings.ADMISSION_STANDARD_CONCURRENCY, settings.ADMISSION_STANDARD_QUEUE,
+            settings.ADMISSION_MAX_WAIT_SECONDS,
+        ),
+        "browse": Lane(
+            "browse", settings.ADMISSION_BROWSE_CONCURRENCY, settings.ADMISSION_BROWSE_QUEUE,
+            settings.ADMISSION_MAX_WAIT_SECONDS,
+        ),
+    }
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware; see the module docstring."""
+
+    def __init__(
+        self,
+        app,
+        lanes: Optional[Dict[str, Lane]] = None,
+        limiter: Optional[RateLimiter] = None,
+        critical_limiter: Optional[RateLimiter] = None,
+    ):
+        self.app = app
+        self.lanes = lanes or default_lanes()
+        self.limiter = limiter or RateLimiter(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+        self.critical_limiter = critical_limiter or RateLimiter(
+            settings.RATE_LIMIT_CRITICAL_PER_SECOND, settings.RATE_LIMIT_CRITICAL_BURST
+        )
+        registry.collectors.append(self.collect)
+
+    def collect(self) -> None:
+        for name, lane in self.lanes.items():
+            ADMISSION_IN_FLIGHT.set(lane.active, name)
+            ADMISSION_QUEUE_DEPTH.set(len(lane.waiting), name)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        body = b""
+        if scope["method"] == "POST" and EMERGENCY_CREATE.match(scope["path"][len(settings.API_V1_STR):]):
+            body, messages = await _peek_body(receive)
+            receive = _replay(messages, receive)
+        name = classify(scope["method"], scope["path"], body)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        caller = await caller_key(scope)
+        # The body is not authenticated by the route yet: only a verified caller gets priority
+        if name == "critical" and not caller.startswith("user:"):
+            name = "standard"
+        lane = self.lanes[name]
+
+        limiter = self.critical_limiter if name == "critical" else self.limiter
+        retry_after = limiter.check(caller)
+        if retry_after:
+            ADMISSION_REQUESTS.inc(name, "rate_limited")
+            await _reject(send, 429, "Too many requests", retry_after)
+            return
+
+        start = time.perf_counter()
+        if not await lane.acquire():
+            ADMISSION_REQUESTS.inc(name, "shed")
+            await _reject(send, 503, "Server busy, retry shortly", settings.ADMISSION_RETRY_AFTER_SECONDS)
+            return
+        ADMISSION_REQUESTS.inc(name, "admitted")
+        ADMISSION_WAIT.observe(time.perf_counter() - start, name)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
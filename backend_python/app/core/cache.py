@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry expiry.
+    When full, the least recently used entry is evicted. ``on_evict(key,
+    value)`` is called for every entry that is evicted, found expired or
+    invalidated (not for ``clear``), so owners can drop what they keep
+    alongside it.
+    Not thread-safe: meant to be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 60.0,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            if self.on_evict:
+                self.on_evict(key, value)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            evicted, (_, old) = self._data.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(evicted, old)
+
+    def invalidate(self, key: Hashable) -> None:
+        item = self._data.pop(key, None)
+        if item is not None and self.on_evict:
+            self.on_evict(key, item[1])
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
@@ -9,4 +9,138 @@ class Settings(BaseModel):
     JWT_SECRET: str = os.getenv("JWT_SECRET", "")
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
 
+    # Async data-access layer (shared keep-alive HTTP pool to PostgREST)
+    DB_MAX_CONNECTIONS: int = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+    DB_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("DB_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    DB_TIMEOUT_SECONDS: float = float(os.getenv("DB_TIMEOUT_SECONDS", "10"))
+    # "postgrest" (Supabase REST API) or "postgres" (asyncpg pool straight to DATABASE_URL)
+    DATABASE_BACKEND: str = os.getenv("DATABASE_BACKEND", "postgrest")
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # asyncpg pool per worker (DB_MAX_CONNECTIONS sizes the PostgREST HTTP pool); keep
+    # workers x DB_POOL_MAX_CONNECTIONS under the server's or pooler's connection limit
+    DB_MIN_CONNECTIONS: int = int(os.getenv("DB_MIN_CONNECTIONS", "1"))
+    DB_POOL_MAX_CONNECTIONS: int = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "20"))
+    # Prepared statements kept per connection; 0 behind a transaction-mode pooler
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1024"))
+
+    # Auth: "local" verifies JWTs in-process, "remote" always asks Supabase Auth
+    AUTH_VERIFY_MODE: str = os.getenv("AUTH_VERIFY_MODE", "local")
+    AUTH_REMOTE_FALLBACK: bool = os.getenv("AUTH_REMOTE_FALLBACK", "false").lower() == "true"
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    JWT_AUDIENCE: str = os.getenv("JWT_AUDIENCE", "authenticated")
+    JWT_JWKS_URL: str = os.getenv("JWT_JWKS_URL", "")
+    JWT_JWKS_TTL_SECONDS: float = float(os.getenv("JWT_JWKS_TTL_SECONDS", "600"))
+
+    # In-memory geohash index behind the /nearby endpoints
+    GEO_INDEX_PRECISION: int = int(os.getenv("GEO_INDEX_PRECISION", "5"))
+    GEO_INDEX_REFRESH_SECONDS: float = float(os.getenv("GEO_INDEX_REFRESH_SECONDS", "300"))
+
+    # How often the columnar donor registry behind /donors/ and matching is rebuilt
+    DONOR_REGISTRY_REFRESH_SECONDS: float = float(os.getenv("DONOR_REGISTRY_REFRESH_SECONDS", "300"))
+
+    # How often inventory counters are rebuilt from the database
+    INVENTORY_RECONCILE_SECONDS: float = float(os.getenv("INVENTORY_RECONCILE_SECONDS", "300"))
+
+    # Largest accepted bulk batch upload
+    BULK_INGEST_MAX_ROWS: int = int(os.getenv("BULK_INGEST_MAX_ROWS", "5000"))
+
+    # How often the FEFO batch index is rebuilt from the database
+    FEFO_REFRESH_SECONDS: float = float(os.getenv("FEFO_REFRESH_SECONDS", "300"))
+
+    # Read-through cache for /blood-banks/search/{blood_type}; inventory writes on this
+    # worker invalidate it immediately, the TTL bounds staleness from other workers
+    STOCK_SEARCH_CACHE_TTL_SECONDS: float = float(os.getenv("STOCK_SEARCH_CACHE_TTL_SECONDS", "30"))
+    STOCK_SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("STOCK_SEARCH_CACHE_MAX_ENTRIES", "256"))
+
+    # How often the admin dashboard snapshot is rebuilt
+    ADMIN_STATS_REFRESH_SECONDS: float = float(os.getenv("ADMIN_STATS_REFRESH_SECONDS", "60"))
+
+    # Keyset pagination on list endpoints
+    PAGE_DEFAULT_SIZE: int = int(os.getenv("PAGE_DEFAULT_SIZE", "50"))
+    PAGE_MAX_SIZE: int = int(os.getenv("PAGE_MAX_SIZE", "200"))
+
+    # Rows fetched per page while streaming /admin/export
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # Keyset page size when the in-memory indexes load a whole table
+    TABLE_LOAD_BATCH_SIZE: int = int(os.getenv("TABLE_LOAD_BATCH_SIZE", "1000"))
+
+    # Socket.IO room backplane: "" (in-process), "local", "local:///dir", "redis://..." or "amqp://..."
+    SOCKETIO_BACKPLANE: str = os.getenv("SOCKETIO_BACKPLANE", "")
+
+    # Pending request lifecycle events awaiting Socket.IO fan-out; oldest dropped when full
+    REQUEST_EVENT_QUEUE_SIZE: int = int(os.getenv("REQUEST_EVENT_QUEUE_SIZE", "10000"))
+
+    # Socket.IO flow control: updates to one request within the window are merged,
+    # and each client's outbound queue is capped (oldest messages dropped)
+    SOCKET_COALESCE_WINDOW_MS: float = float(os.getenv("SOCKET_COALESCE_WINDOW_MS", "250"))
+    SOCKET_CLIENT_QUEUE_MAX: int = int(os.getenv("SOCKET_CLIENT_QUEUE_MAX", "256"))
+
+    # Geohash alert rooms: clients join the cell holding their location (donors the cell's
+    # room for their blood type) and an alert goes to every cell covering ALERT_RADIUS_KM
+    # around the hospital
+    ALERT_CELL_PRECISION: int = int(os.getenv("ALERT_CELL_PRECISION", "5"))
+    ALERT_RADIUS_KM: float = float(os.getenv("ALERT_RADIUS_KM", "20"))
+
+    # Response cache for public directory GETs (per worker) and the Cache-Control sent
+    # to browsers (max-age) and the Vercel edge (s-maxage, stale-while-revalidate).
+    # Writes invalidate only their own worker's entries, so keep the TTL within s-maxage
+    HTTP_CACHE_TTL_SECONDS: float = float(os.getenv("HTTP_CACHE_TTL_SECONDS", "30"))
+    HTTP_CACHE_MAX_ENTRIES: int = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "2048"))
+    HTTP_CACHE_MAX_AGE: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+    HTTP_CACHE_S_MAXAGE: int = int(os.getenv("HTTP_CACHE_S_MAXAGE", "30"))
+    HTTP_CACHE_STALE_WHILE_REVALIDATE: int = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", "120"))
+
+    # List endpoints serialization: "trusted" (project database rows onto the response
+    # model without revalidating), "validate" (prebuilt TypeAdapter) or "off"
+    FAST_RESPONSE_MODE: str = os.getenv("FAST_RESPONSE_MODE", "trusted")
+    # JSON bodies at least this large are gzip/brotli-compressed if the client accepts it
+    RESPONSE_COMPRESS_MIN_BYTES: int = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "16384"))
+
+    # Prometheus metrics at /metrics (per worker); with METRICS_TOKEN set, scrapes must
+    # send "Authorization: Bearer <token>"
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+    # Cold start: import each endpoint module on the first request under its prefix
+    # (on by default on Vercel, where every cold start pays for every import)
+    LAZY_ROUTERS: bool = os.getenv("LAZY_ROUTERS", "true" if os.getenv("VERCEL") else "false").lower() == "true"
+
+    # Concurrent identical reads of one hospital, inventory or request share a query
+    SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+    # Admission control (per worker): critical emergency writes from verified callers
+    # always run; the standard and browse (directory/admin reads) lanes run at most
+    # CONCURRENCY requests with QUEUE more waiting up to ADMISSION_MAX_WAIT_SECONDS,
+    # beyond that a 503 with Retry-After
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_STANDARD_CONCURRENCY: int = int(os.getenv("ADMISSION_STANDARD_CONCURRENCY", "64"))
+    ADMISSION_STANDARD_QUEUE: int = int(os.getenv("ADMISSION_STANDARD_QUEUE", "256"))
+    ADMISSION_BROWSE_CONCURRENCY: int = int(os.getenv("ADMISSION_BROWSE_CONCURRENCY", "16"))
+    ADMISSION_BROWSE_QUEUE: int = int(os.getenv("ADMISSION_BROWSE_QUEUE", "64"))
+    ADMISSION_MAX_WAIT_SECONDS: float = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "2"))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+    # Per-user token bucket (0 disables); behind a proxy set RATE_LIMIT_TRUST_PROXY so
+    # anonymous callers are keyed by X-Forwarded-For
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "60"))
+    RATE_LIMIT_TRUST_PROXY: bool = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+    # Separate per-user bucket for the critical lane; keep it at least as large as the above
+    RATE_LIMIT_CRITICAL_PER_SECOND: float = float(os.getenv("RATE_LIMIT_CRITICAL_PER_SECOND", "20"))
+    RATE_LIMIT_CRITICAL_BURST: float = float(os.getenv("RATE_LIMIT_CRITICAL_BURST", "120"))
+
+    # Background maintenance jobs (app/services/maintenance.py), started from the lifespan.
+    # Leader election keeps database-writing jobs on one worker: "none", "local" /
+    # "local:///dir" (file locks, one host) or "database" (scheduler_leases, any host)
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+    SCHEDULER_LEADER_ELECTION: str = os.getenv("SCHEDULER_LEADER_ELECTION", "local")
+    # Longest a job may run; also how long a database lease outlives a dead leader
+    SCHEDULER_LEASE_SECONDS: float = float(os.getenv("SCHEDULER_LEASE_SECONDS", "120"))
+    # When expired batches are written off (cron, UTC)
+    BATCH_EXPIRY_CRON: str = os.getenv("BATCH_EXPIRY_CRON", "5 * * * *")
+    # Pending requests are raised to urgent, then critical, after waiting this long
+    REQUEST_ESCALATION_SECONDS: float = float(os.getenv("REQUEST_ESCALATION_SECONDS", "60"))
+    ESCALATE_TO_URGENT_MINUTES: float = float(os.getenv("ESCALATE_TO_URGENT_MINUTES", "30"))
+    ESCALATE_TO_CRITICAL_MINUTES: float = float(os.getenv("ESCALATE_TO_CRITICAL_MINUTES", "120"))
+
 settings = Settings()
@@ -1,12 +1,66 @@
-from supabase import create_client, Client
+from typing import TYPE_CHECKING, Optional
 from app.core.config import settings
+from app.core.repository import Repository, PostgrestRepository
+from app.core.metrics import InstrumentedRepository
 
-if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
-    # Fallback/mock for build time if keys aren't present
-    print("Warning: Supabase credentials not found. Database features will fail.")
-    supabase: Client = None
-else:
-    supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+if TYPE_CHECKING:
+    from supabase import Client
 
-def get_supabase() -> Client:
+# The supabase SDK (gotrue, postgrest, realtime, storage) is only needed for Auth
+# calls, so it is imported and the client built on first use, not on cold start.
+supabase: Optional["Client"] = None
+_warned = False
+
+def supabase_configured() -> bool:
+    return supabase is not None or bool(settings.SUPABASE_URL and settings.SUPABASE_KEY)
+
+def get_supabase() -> Optional["Client"]:
+    global supabase, _warned
+    if supabase is None:
+        if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+            if not _warned:
+                # Fallback/mock for build time if keys aren't present
+                print("Warning: Supabase credentials not found. Database features will fail.")
+                _warned = True
+            return None
+        from supabase import create_client
+        supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
     return supabase
+
+# Async repository used by the service layer (created lazily, shared per worker)
+_repository: Optional[Repository] = None
+
+def get_repository() -> Optional[Repository]:
+    global _repository
+    if _repository is None and settings.DATABASE_BACKEND == "postgres" and settings.DATABASE_URL:
+        from app.core.postgres_repository import PostgresRepository
+        _repository = PostgresRepository(
+            settings.DATABASE_URL,
+            min_size=settings.DB_MIN_CONNECTIONS,
+            max_size=settings.DB_POOL_MAX_CONNECTIONS,
+            statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+            timeout=settings.DB_TIMEOUT_SECONDS,
+        )
+    elif _repository is None and settings.SUPABASE_URL and settings.SUPABASE_KEY:
+        _repository = PostgrestRepository(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            max_connections=settings.DB_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.DB_MAX_KEEPALIVE_CONNECTIONS,
+            timeout=settings.DB_TIMEOUT_SECONDS,
+        )
+    if settings.METRICS_ENABLED and _repository is not None and not isinstance(_repository, InstrumentedRepository):
+        # Every round trip is timed per table and operation (see metrics.py)
+        _repository = InstrumentedRepository(_repository)
+    return _repository
+
+def set_repository(repository: Optional[Repository]) -> None:
+    """Swap the active repository (benchmarks, tests, alternative backends)."""
+    global _repository
+    _repository = repository
+
+async def close_repository() -> None:
+    global _repository
+    if _repository is not None:
+        await _repository.close()
+        _repository = None
@@ -0,0 +1,168 @@
+"""
+Geohash helpers and an in-memory geohash-grid spatial index.
+
+The index buckets points by geohash cell, so a radius query only visits the
+cells that cover the circle instead of scanning every row of a city.
+"""
+import math
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geohash_encode(lat: float, lng: float, precision: int = 5) -> str:
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def cell_size_degrees(precision: int) -> Tuple[float, float]:
+    """(lat_step, lng_step) of a geohash cell at ``precision``."""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def _normalize_lng(lng: float) -> float:
+    return ((lng + 180.0) % 360.0) - 180.0
+
+
+def _cover_grid(lat: float, lng: float, radius_km: float, precision: int):
+    lat_step, lng_step = cell_size_degrees(precision)
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lat_min, lat_max = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # Longitude span widens towards the poles; use the widest latitude in range
+    widest = max(abs(lat_min), abs(lat_max))
+    cos_lat = math.cos(math.radians(min(widest, 89.9)))
+    dlng = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    lat_steps = int(math.ceil((lat_max - lat_min) / lat_step)) + 1
+    lng_steps = int(math.ceil((2 * dlng) / lng_step)) + 1
+    return lat_min, lat_max, lat_step, lat_steps, lng - dlng, lng + dlng, lng_step, lng_steps
+
+
+def covering_cell_count(lat: float, lng: float, radius_km: float, precision: int = 5) -> int:
+    """Upper bound on ``len(cells_covering(...))`` without enumerating the cells."""
+    grid = _cover_grid(lat, lng, radius_km, precision)
+    return grid[3] * grid[7]
+
+
+def cells_covering(lat: float, lng: float, radius_km: float, precision: int = 5) -> Set[str]:
+    """Geohash cells that together cover the circle of ``radius_km`` around a point."""
+    lat_min, lat_max, lat_step, lat_steps, lng_min, lng_max, lng_step, lng_steps = _cover_grid(
+        lat, lng, radius_km, precision
+    )
+    cells = set()
+    for i in range(lat_steps):
+        cell_lat = min(lat_max, lat_min + i * lat_step, 89.999999)
+        for j in range(lng_steps):
+            cell_lng = _normalize_lng(min(lng_max, lng_min + j * lng_step))
+            cells.add(geohash_encode(cell_lat, cell_lng, precision))
+    return cells
+
+
+class SpatialIndex:
+    """
+    Geohash-grid index of ``id -> (lat, lng, payload)``.
+    Upserts and removals are O(1); queries visit only the covering cells.
+    """
+
+    def __init__(self, precision: int = 5):
+        self.precision = precision
+        self._points: Dict[Hashable, Tuple[float, float, str, Any]] = {}
+        self._cells: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    def clear(self) -> None:
+        self._points.clear()
+        self._cells.clear()
+
+    def upsert(self, key: Hashable, lat: Optional[float], lng: Optional[float], payload: Any = None) -> None:
+        self.remove(key)
+        if lat is None or lng is None:
+            return
+        cell = geohash_encode(lat, lng, self.precision)
+        self._points[key] = (lat, lng, cell, payload)
+        self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        existing = self._points.pop(key, None)
+        if existing is None:
+            return
+        members = self._cells.get(existing[2])
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self._cells[existing[2]]
+
+    def _candidates(self, lat: float, lng: float, radius_km: float) -> Iterable[Hashable]:
+        # Past this size, scanning the occupied points is cheaper than the cover
+        if covering_cell_count(lat, lng, radius_km, self.precision) >= len(self._points):
+            return list(self._points.keys())
+        cover = cells_covering(lat, lng, radius_km, self.precision)
+        return [key for cell in cover for key in self._cells.get(cell, ())]
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, Hashable, Any]]:
+        """All ``(distance_km, key, payload)`` within ``radius_km``, nearest first."""
+        results = []
+        for key in self._candidates(lat, lng, radius_km):
+            p_lat, p_lng, _, payload = self._points[key]
+            distance = haversine_km(lat, lng, p_lat, p_lng)
+            if distance <= radius_km:
+                results.append((distance, key, payload))
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def nearest(
+        self, lat: float, lng: float, k: int, radius_km: Optional[float] = None, predicate=None
+    ) -> List[Tuple[float, Hashable, Any]]:
+        """
+        Up to ``k`` nearest entries (optionally within ``radius_km`` and matching
+        ``predicate(payload)``). The search ring doubles until it holds k hits.
+        """
+        limit = radius_km if radius_km is not None else math.pi * EARTH_RADIUS_KM
+        lat_step, _ = cell_size_degrees(self.precision)
+        ring = min(limit, math.radians(lat_step) * EARTH_RADIUS_KM)
+        while True:
+            hits = [hit for hit in self.within(lat, lng, ring) if predicate is None or predicate(hit[2])]
+            if len(hits) >= k or ring >= limit:
+                return hits[:k]
+            ring = min(limit, ring * 2)
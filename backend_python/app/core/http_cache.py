@@ -0,0 +1,132 @@
+"""
+Response cache with validators for public, read-heavy GET endpoints.
+
+Entries are keyed by path and query string and hold the encoded body, so a
+hit costs neither a database query nor serialization. Every response carries
+an ETag (one per content-encoding, since the bytes differ) and a
+``Cache-Control`` that lets the Vercel edge serve it too; conditional
+requests that still match get a bodiless 304. There is no Last-Modified:
+the rows carry no reliable change time, and the time of caching is not one.
+Write paths drop entries by tag (``hospitals``, ``blood_bank:12``, ...).
+Invalidation is per worker: other workers pick up a write when their entry
+expires, so HTTP_CACHE_TTL_SECONDS defaults to the edge's s-maxage.
+"""
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from fastapi import HTTPException, Request, Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.serialization import build_response, encode_body, response_encoding
+
+
+class CachedResponse:
+    __slots__ = ("body", "digest", "headers", "compressed", "tags")
+
+    def __init__(self, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        self.digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.headers = headers or {}
+        self.compressed: Dict[str, bytes] = {}
+        self.tags: Tuple[str, ...] = ()
+
+    def etag(self, encoding: Optional[str]) -> str:
+        """Strong ETag of the representation sent with ``encoding`` (None: identity)."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" matches "x"
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+class ResponseCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.entries = TTLCache(
+            max_entries=max_entries or settings.HTTP_CACHE_MAX_ENTRIES,
+            ttl=settings.HTTP_CACHE_TTL_SECONDS if ttl is None else ttl,
+            on_evict=self._forget,
+        )
+        # tag -> keys of live entries; pruned as entries leave the cache
+        self.tags: Dict[str, Set[Hashable]] = {}
+        # Bumped by every invalidation; a load that raced one is not stored
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_control() -> str:
+        return (
+            f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, s-maxage={settings.HTTP_CACHE_S_MAXAGE}, "
+            f"stale-while-revalidate={settings.HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+        )
+
+    def invalidate(self, *tags: str) -> None:
+        self.version += 1
+        for tag in tags:
+            for key in self.tags.pop(tag, ()):
+                self.entries.invalidate(key)
+
+    def clear(self) -> None:
+        self.version += 1
+        self.entries.clear()
+        self.tags.clear()
+
+    def _forget(self, key: Hashable, entry: CachedResponse) -> None:
+        for tag in entry.tags:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+    def _store(self, key: Hashable, entry: CachedResponse, tags: Iterable[str]) -> None:
+        entry.tags = tuple(tags)
+        for tag in entry.tags:
+            self.tags.setdefault(tag, set()).add(key)
+        self.entries.set(key, entry)
+
+    async def serve(
+        self,
+        request: Request,
+        tags: Iterable[str],
+        load: Callable[[], Awaitable[Any]],
+        model: Any = None,
+        not_found: Optional[str] = None,
+    ) -> Response:
+        """
+        Cached response for ``request``, calling ``load`` only on a miss.
+        ``not_found`` turns a ``None`` result into a (never cached) 404.
+        """
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            version = self.version
+            data = await load()
+            if data is None and not_found:
+                raise HTTPException(status_code=404, detail=not_found)
+            headers = {}
+            next_cursor = getattr(data, "next_cursor", None)
+            if next_cursor:
+                headers[NEXT_CURSOR_HEADER] = next_cursor
+            entry = CachedResponse(encode_body(data, model), headers)
+            if version == self.version:
+                self._store(key, entry, tags)
+        else:
+            self.hits += 1
+
+        etag = entry.etag(response_encoding(request, entry.body))
+        headers = {"ETag": etag, "Cache-Control": self.cache_control(), **entry.headers}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            if len(entry.body) >= settings.RESPONSE_COMPRESS_MIN_BYTES:
+                headers["Vary"] = "Accept-Encoding"
+            return Response(status_code=304, headers=headers)
+        return build_response(request, entry.body, headers=headers, compressed=entry.compressed)
+
+response_cache = ResponseCache()
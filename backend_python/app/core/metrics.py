@@ -0,0 +1,337 @@
+"""
+Prometheus metrics for the API, the database layer and Socket.IO.
+
+``MetricsMiddleware`` times every HTTP request under its route template (never
+the raw path, so ids in URLs do not create series) and keeps a per-request
+``RequestStats`` in a context variable. ``InstrumentedRepository`` wraps the
+active repository and adds each round trip's duration to it, and auth and
+serialization report their time with ``record_phase``. When the request ends
+the middleware observes where its time went:
+
+    beos_http_request_duration_seconds{method,route}
+    beos_http_request_phase_seconds{route,phase="db|auth|serialization"}
+    beos_http_request_db_round_trips{route}
+    beos_db_call_duration_seconds{table,operation}
+
+Socket.IO rooms are read at scrape time and labelled by kind (city, blood
+type, geohash cell, personal), not by name: clients choose room names.
+
+Everything is per process; with several workers Prometheus scrapes each one.
+``render()`` produces the text exposition format served at ``/metrics``.
+"""
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.repository import Repository
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"}
+PHASES = ("db", "auth", "serialization")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], Any] = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+    def render(self) -> List[str]:
+        return self.header() + list(self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        self.values[labelvalues] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self.values.get(labelvalues)
+        if series is None:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            series = self.values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {_format_value(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labelvalues)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        # Called before each scrape to refresh gauges computed from live state
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        for collect in self.collectors:
+            collect()
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "beos_http_requests_total", "HTTP requests by route template and status class.", ("method", "route", "status")))
+HTTP_DURATION = registry.register(Histogram(
+    "beos_http_request_duration_seconds", "HTTP request latency, first byte in to last byte out.", ("method", "route")))
+HTTP_PHASE = registry.register(Histogram(
+    "beos_http_request_phase_seconds", "Time one request spent in each phase.", ("route", "phase")))
+HTTP_DB_ROUND_TRIPS = registry.register(Histogram(
+    "beos_http_request_db_round_trips", "Database round trips made by one request.", ("route",),
+    buckets=ROUND_TRIP_BUCKETS))
+DB_DURATION = registry.register(Histogram(
+    "beos_db_call_duration_seconds", "Database round-trip latency by table (or RPC function) and operation.",
+    ("table", "operation")))
+DB_ERRORS = registry.register(Counter(
+    "beos_db_errors_total", "Database calls that raised.", ("table", "operation")))
+SOCKET_CONNECTIONS = registry.register(Gauge(
+    "beos_socket_connections", "Connected Socket.IO clients on this worker."))
+SOCKET_ROOMS = registry.register(Gauge(
+    "beos_socket_rooms", "Socket.IO rooms with at least one member, by kind.", ("kind",)))
+SOCKET_ROOM_MEMBERS = registry.register(Gauge(
+    "beos_socket_room_members", "Room memberships by room kind (a client in two rooms counts twice).", ("kind",)))
+SOCKET_EMITS = registry.register(Counter(
+    "beos_socket_emits_total", "Socket.IO emits by event and target.", ("event", "target")))
+
+
+class RequestStats:
+    __slots__ = ("db_calls", "db", "auth", "serialization")
+
+    def __init__(self):
+        self.db_calls = 0
+        self.db = 0.0
+        self.auth = 0.0
+        self.serialization = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Charge ``seconds`` of ``auth`` or ``serialization`` work to the current request, if any."""
+    stats = _request_stats.get()
+    if stats is not None:
+        setattr(stats, phase, getattr(stats, phase) + seconds)
+
+
+class InstrumentedRepository(Repository):
+    """Times every call of the wrapped repository; anything else is passed through."""
+
+    def __init__(self, inner: Repository):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    async def _timed(self, table: str, operation: str, call, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await call(*args, **kwargs)
+        except Exception:
+            DB_ERRORS.inc(table, operation)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            DB_DURATION.observe(elapsed, table, operation)
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.db_calls += 1
+                stats.db += elapsed
+
+    async def select(self, table, columns="*", filters=(), order=None, desc=False, limit=None):
+        return await self._timed(table, "select", self.inner.select, table, columns, filters, order, desc, limit)
+
+    async def insert(self, table, data):
+        return await self._timed(table, "insert", self.inner.insert, table, data)
+
+    async def update(self, table, values, filters):
+        return await self._timed(table, "update", self.inner.update, table, values, filters)
+
+    async def delete(self, table, filters):
+        return await self._timed(table, "delete", self.inner.delete, table, filters)
+
+    async def upsert(self, table, data, on_conflict):
+        return await self._timed(table, "upsert", self.inner.upsert, table, data, on_conflict)
+
+    async def count(self, table, filters=()):
+        return await self._timed(table, "count", self.inner.count, table, filters)
+
+    async def rpc(self, function, params=None):
+        return await self._timed(function, "rpc", self.inner.rpc, function, params)
+
+    async def close(self):
+        await self.inner.close()
+
+
+def _route_template(scope) -> str:
+    """Path template of the route that handled ``scope`` (``/api/v1/donors/{donor_id}``)."""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    templates = getattr(app, "_metrics_route_templates", None)
+    if templates is None or endpoint not in templates:
+        templates = {}
+        for route in getattr(app, "routes", ()):
+            templates.setdefault(getattr(route, "endpoint", None), getattr(route, "path", "unmatched"))
+        # Remember misses too, so an unknown endpoint does not rebuild the map on every request
+        templates.setdefault(endpoint, "unmatched")
+        app._metrics_route_templates = templates
+    return templates.get(endpoint, "unmatched")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency, status and phase breakdown."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+            route = _route_template(scope)
+            HTTP_REQUESTS.inc(method, route, f"{status // 100}xx")
+            HTTP_DURATION.observe(elapsed, method, route)
+            HTTP_DB_ROUND_TRIPS.observe(stats.db_calls, route)
+            for phase in PHASES:
+                HTTP_PHASE.observe(getattr(stats, phase), route, phase)
+
+
+def room_kind(room: Optional[str]) -> str:
+    if room is None:
+        return "all"
+    for prefix, kind in (("city_", "city"), ("type_", "blood_type"), ("geo_", "geo")):
+        if room.startswith(prefix):
+            return kind
+    # Rooms clients join are prefixed; the rest are the per-client rooms named after a sid
+    return "personal"
+
+
+def emit_target(room: Any) -> str:
+    if room is None:
+        return "broadcast"
+    if isinstance(room, (list, tuple, set)):
+        return "rooms"
+    return room_kind(room)
+
+
+def socket_collector(sio, namespace: str = "/") -> Callable[[], None]:
+    """Scrape-time gauges from the server's room table (``manager.rooms[namespace][room] -> members``)."""
+
+    def collect():
+        rooms = sio.manager.rooms.get(namespace, {})
+        kinds = {kind: [0, 0] for kind in ("city", "blood_type", "geo", "personal")}
+        connections = 0
+        for room, members in list(rooms.items()):
+            if room is None:
+                connections = len(members)
+                continue
+            kind = room_kind(room)
+            kinds[kind][0] += 1
+            kinds[kind][1] += len(members)
+        SOCKET_CONNECTIONS.set(connections)
+        for kind, (count, members) in kinds.items():
+            SOCKET_ROOMS.set(count, kind)
+            SOCKET_ROOM_MEMBERS.set(members, kind)
+
+    return collect
+
+
+def flow_collector(socket_metrics) -> Callable[[], None]:
+    """Expose ``SocketMetrics`` counters (coalescing, deltas, drops) as ``beos_socket_<name>_total``."""
+    counters: Dict[str, Counter] = {}
+    for name in socket_metrics.snapshot():
+        counters[name] = registry.register(Counter(
+            f"beos_socket_{name}_total", f"Socket fan-out counter '{name}' (see SocketMetrics)."))
+
+    def collect():
+        for name, value in socket_metrics.snapshot().items():
+            if name in counters:
+                counters[name].values[()] = value
+
+    return collect
+
+
+def render() -> str:
+    return registry.render()
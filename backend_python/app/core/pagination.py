@@ -0,0 +1,134 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered by the table's identity ``id`` and continue from the last
+id seen (``id > last`` or ``id < last``), so every page is an index range
+scan on the primary key no matter how deep the client pages. The cursor
+handed to clients is an opaque token; the page itself stays a plain JSON
+array and the token travels in the ``X-Next-Cursor`` response header.
+"""
+import base64
+import json
+from typing import Any, AsyncIterator, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+
+from app.core.config import settings
+from app.core.repository import Filter, Repository, Row
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: Any, desc: bool) -> str:
+    raw = json.dumps({"id": last_id, "desc": desc}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str, desc: bool) -> Any:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id, cursor_desc = data["id"], data["desc"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_desc != desc or not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return last_id
+
+
+class PageParams:
+    """
+    ``limit`` / ``cursor`` query parameters shared by every list endpoint.
+    Limits above ``PAGE_MAX_SIZE`` are clamped rather than rejected.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(None, ge=1, description="Page size (capped at the server maximum)"),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    ):
+        self.limit = min(limit or settings.PAGE_DEFAULT_SIZE, settings.PAGE_MAX_SIZE)
+        self.cursor = cursor
+
+
+class Page(list):
+    """Rows of one page; ``next_cursor`` is None on the last page."""
+
+    def __init__(self, rows: List[Row], next_cursor: Optional[str] = None):
+        super().__init__(rows)
+        self.next_cursor = next_cursor
+
+
+async def fetch_after(
+    repo: Repository,
+    table: str,
+    after_id: Optional[int],
+    limit: int,
+    filters: Sequence[Filter] = (),
+    desc: bool = False,
+    columns: str = "*",
+) -> Page:
+    """Up to ``limit`` rows past ``after_id`` in id order (from the start when it is None)."""
+    filters = list(filters)
+    if after_id is not None:
+        filters.append(("id", "lt" if desc else "gt", after_id))
+    # One extra row tells us whether another page exists without a count query
+    rows = await repo.select(table, columns=columns, filters=filters, order="id", desc=desc, limit=limit + 1)
+    if len(rows) <= limit:
+        return Page(rows)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(rows[-1]["id"], desc))
+
+
+async def fetch_page(
+    repo: Repository,
+    table: str,
+    page: PageParams,
+    filters: Sequence[Filter] = (),
+    desc: bool = False,
+    columns: str = "*",
+) -> Page:
+    after_id = decode_cursor(page.cursor, desc) if page.cursor else None
+    return await fetch_after(repo, table, after_id, page.limit, filters=filters, desc=desc, columns=columns)
+
+
+async def iter_pages(
+    repo: Repository,
+    table: str,
+    columns: str = "*",
+    filters: Sequence[Filter] = (),
+    batch_size: int = 1000,
+) -> AsyncIterator[Page]:
+    """
+    Yield every matching row in id order, one keyset page at a time.
+
+    Only an empty page ends the walk: PostgREST caps each response at its
+    max-rows setting (1000 by default), so a short page may not be the last.
+    """
+    after_id = None
+    while True:
+        rows = await fetch_after(repo, table, after_id, batch_size, filters=filters, columns=columns)
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1]["id"]
+
+
+async def fetch_all(
+    repo: Repository,
+    table: str,
+    columns: str = "*",
+    filters: Sequence[Filter] = (),
+    batch_size: Optional[int] = None,
+) -> List[Row]:
+    """Every matching row in id order, read in keyset pages of ``TABLE_LOAD_BATCH_SIZE``."""
+    rows: List[Row] = []
+    async for page in iter_pages(repo, table, columns, filters, batch_size or settings.TABLE_LOAD_BATCH_SIZE):
+        rows.extend(page)
+    return rows
+
+
+def set_next_cursor(response: Response, page: List[Row]) -> None:
+    next_cursor = getattr(page, "next_cursor", None)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
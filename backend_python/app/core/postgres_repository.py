@@ -0,0 +1,331 @@
+"""
+Repository backend that talks to Postgres directly.
+
+``PostgresRepository`` runs the same ``(column, operator, value)`` queries as
+``PostgrestRepository`` over an asyncpg connection pool instead of HTTP. Every
+query shape compiles to one parameterized statement, which asyncpg prepares
+once per connection and reuses from its statement cache, so a repeated
+lookup costs one protocol round trip with binary parameters and no HTTP, JSON
+or REST-layer work. Writes that must be atomic across rows (allocation,
+batch ingest) stay database functions called through ``rpc``, exactly as
+with PostgREST, which cannot hold a transaction open between HTTP calls.
+
+Values are converted to the column types of the table (read once from
+``information_schema``) on the way in, and rows come back shaped like
+PostgREST's JSON (ISO dates, string UUIDs), so services see no difference.
+
+Selected with ``DATABASE_BACKEND=postgres`` and ``DATABASE_URL``; needs the
+optional ``asyncpg`` package. Behind Supabase's transaction-mode pooler
+(port 6543) set ``DB_STATEMENT_CACHE_SIZE=0``: it cannot keep prepared
+statements across transactions.
+"""
+import json
+import re
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.repository import OPERATORS, Filter, Repository, RepositoryError, Row
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - optional dependency
+    asyncpg = None
+
+COMPARISONS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "like": "LIKE", "ilike": "ILIKE"}
+IS_VALUES = {None: "NULL", "null": "NULL", True: "TRUE", "true": "TRUE", False: "FALSE", "false": "FALSE"}
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+Coerce = Callable[[str, Any], Any]
+
+
+def quote_identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise RepositoryError(f"Invalid identifier: {name!r}", status_code=400)
+    return f'"{name}"'
+
+
+def _columns_sql(columns: str) -> str:
+    if columns.strip() == "*":
+        return "*"
+    return ", ".join(quote_identifier(c.strip()) for c in columns.split(","))
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _no_coerce(column: str, value: Any) -> Any:
+    return value
+
+
+def where_sql(filters: Sequence[Filter], args: List[Any], coerce: Coerce = _no_coerce) -> str:
+    """``WHERE`` clause for ``filters``; parameters are appended to ``args``."""
+    clauses = []
+    for column, op, value in filters:
+        if op not in OPERATORS:
+            raise RepositoryError(f"Unsupported filter operator: {op}", status_code=400)
+        target = quote_identifier(column)
+        value = _plain(value)
+        if op == "is":
+            key = value.lower() if isinstance(value, str) else value
+            if key not in IS_VALUES:
+                raise RepositoryError(f"Unsupported value for is: {value!r}", status_code=400)
+            clauses.append(f"{target} IS {IS_VALUES[key]}")
+        elif op == "in":
+            args.append([coerce(column, _plain(v)) for v in value])
+            clauses.append(f"{target} = ANY(${len(args)})")
+        else:
+            args.append(value if op in ("like", "ilike") else coerce(column, value))
+            clauses.append(f"{target} {COMPARISONS[op]} ${len(args)}")
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def select_sql(
+    table: str,
+    columns: str = "*",
+    filters: Sequence[Filter] = (),
+    order: Optional[str] = None,
+    desc: bool = False,
+    limit: Optional[int] = None,
+    coerce: Coerce = _no_coerce,
+) -> Tuple[str, List[Any]]:
+    args: List[Any] = []
+    sql = f"SELECT {_columns_sql(columns)} FROM {quote_identifier(table)}{where_sql(filters, args, coerce)}"
+    if order:
+        sql += f" ORDER BY {quote_identifier(order)} {'DESC' if desc else 'ASC'}"
+    if limit is not None:
+        args.append(int(limit))
+        sql += f" LIMIT ${len(args)}"
+    return sql, args
+
+
+def insert_sql(
+    table: str, rows: List[Row], on_conflict: Optional[str] = None, coerce: Coerce = _no_coerce
+) -> Tuple[str, List[Any]]:
+    """Multi-row ``INSERT ... RETURNING *``; keys missing from a row take the column default."""
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    args: List[Any] = []
+    values = []
+    for row in rows:
+        slots = []
+        for column in columns:
+            if column in row:
+                args.append(coerce(column, _plain(row[column])))
+                slots.append(f"${len(args)}")
+            else:
+                slots.append("DEFAULT")
+        values.append(f"({', '.join(slots)})")
+    sql = (
+        f"INSERT INTO {quote_identifier(table)} ({', '.join(quote_identifier(c) for c in columns)}) "
+        f"VALUES {', '.join(values)}"
+    )
+    if on_conflict:
+        keys = [c.strip() for c in on_conflict.split(",")]
+        updates = [c for c in columns if c not in keys]
+        target = ", ".join(quote_identifier(k) for k in keys)
+        if updates:
+            assignments = ", ".join(f"{quote_identifier(c)} = EXCLUDED.{quote_identifier(c)}" for c in updates)
+            sql += f" ON CONFLICT ({target}) DO UPDATE SET {assignments}"
+        else:
+            sql += f" ON CONFLICT ({target}) DO NOTHING"
+    return sql + " RETURNING *", args
+
+
+def update_sql(table: str, values: Row, filters: Sequence[Filter], coerce: Coerce = _no_coerce) -> Tuple[str, List[Any]]:
+    args: List[Any] = []
+    assignments = []
+    for column, value in values.items():
+        args.append(coerce(column, _plain(value)))
+        assignments.append(f"{quote_identifier(column)} = ${len(args)}")
+    where = where_sql(filters, args, coerce)
+    return f"UPDATE {quote_identifier(table)} SET {', '.join(assignments)}{where} RETURNING *", args
+
+
+def delete_sql(table: str, filters: Sequence[Filter], coerce: Coerce = _no_coerce) -> Tuple[str, List[Any]]:
+    args: List[Any] = []
+    return f"DELETE FROM {quote_identifier(table)}{where_sql(filters, args, coerce)} RETURNING *", args
+
+
+def count_sql(table: str, filters: Sequence[Filter], coerce: Coerce = _no_coerce) -> Tuple[str, List[Any]]:
+    args: List[Any] = []
+    return f"SELECT count(*) FROM {quote_identifier(table)}{where_sql(filters, args, coerce)}", args
+
+
+def rpc_sql(function: str, params: Row) -> Tuple[str, List[Any]]:
+    # Named notation, like PostgREST's /rpc: argument order does not matter
+    args: List[Any] = []
+    named = []
+    for name, value in params.items():
+        value = _plain(value)
+        args.append(json.dumps(value) if isinstance(value, (dict, list)) else value)
+        named.append(f"{quote_identifier(name)} => ${len(args)}")
+    return f"SELECT * FROM {quote_identifier(function)}({', '.join(named)})", args
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+# information_schema data_type -> converter for values arriving as JSON-ish strings
+_PARSERS: Dict[str, Callable[[Any], Any]] = {
+    "date": lambda v: date.fromisoformat(v[:10]) if isinstance(v, str) else v,
+    "timestamp with time zone": lambda v: _parse_timestamp(v) if isinstance(v, str) else v,
+    "timestamp without time zone": lambda v: _parse_timestamp(v) if isinstance(v, str) else v,
+    "uuid": lambda v: uuid.UUID(str(v)) if v is not None and not isinstance(v, uuid.UUID) else v,
+    "bigint": lambda v: int(v) if isinstance(v, str) else v,
+    "integer": lambda v: int(v) if isinstance(v, str) else v,
+    "double precision": lambda v: float(v) if isinstance(v, (str, int)) and not isinstance(v, bool) else v,
+    "jsonb": lambda v: json.dumps(v) if not isinstance(v, str) else v,
+    "json": lambda v: json.dumps(v) if not isinstance(v, str) else v,
+}
+
+
+def to_json_value(value: Any) -> Any:
+    """Postgres value as PostgREST would have returned it in JSON."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _row(record: Any) -> Row:
+    return {key: to_json_value(value) for key, value in record.items()}
+
+
+class PostgresRepository(Repository):
+    """
+    Direct Postgres backend over a lazily created asyncpg pool.
+    Query errors raise ``RepositoryError`` with Postgres' message (so e.g.
+    ``stale allocation`` from consume_blood_batches reads the same as via PostgREST).
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 20,
+        statement_cache_size: int = 1024,
+        timeout: float = 10.0,
+        schema: str = "public",
+    ):
+        if asyncpg is None:
+            raise RepositoryError("DATABASE_BACKEND=postgres requires the 'asyncpg' package")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self.timeout = timeout
+        self.schema = schema
+        self.pool = None
+        self._column_types: Dict[str, Dict[str, str]] = {}
+
+    async def _get_pool(self):
+        if self.pool is None:
+            pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                statement_cache_size=self.statement_cache_size,
+                command_timeout=self.timeout,
+                server_settings={"search_path": self.schema},
+            )
+            # Another task may have created one while we were connecting
+            if self.pool is None:
+                self.pool = pool
+            else:
+                await pool.close()
+        return self.pool
+
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[Any]:
+        try:
+            pool = await self._get_pool()
+            async with pool.acquire() as connection:
+                yield connection
+        except (OSError, asyncpg.InterfaceError, asyncpg.CannotConnectNowError) as e:
+            raise RepositoryError(f"Database unavailable: {e}", status_code=503) from e
+
+    async def _types(self, table: str) -> Dict[str, str]:
+        types = self._column_types.get(table)
+        if types is None:
+            records = await self._run(
+                "fetch",
+                "SELECT column_name, data_type FROM information_schema.columns "
+                "WHERE table_schema = $1 AND table_name = $2",
+                [self.schema, table],
+            )
+            types = {record["column_name"]: record["data_type"] for record in records}
+            self._column_types[table] = types
+        return types
+
+    async def _coercer(self, table: str) -> Coerce:
+        types = await self._types(table)
+
+        def coerce(column: str, value: Any) -> Any:
+            parser = _PARSERS.get(types.get(column, ""))
+            if parser is None or value is None:
+                return value
+            try:
+                return parser(value)
+            except (TypeError, ValueError) as e:
+                raise RepositoryError(f"Invalid value for {table}.{column}: {value!r}", status_code=400) from e
+
+        return coerce
+
+    async def _run(self, method: str, sql: str, args: Sequence[Any]) -> Any:
+        async with self._acquire() as connection:
+            try:
+                return await getattr(connection, method)(sql, *args)
+            except asyncpg.PostgresError as e:
+                raise RepositoryError(getattr(e, "message", None) or str(e), status_code=400) from e
+
+    async def select(self, table, columns="*", filters=(), order=None, desc=False, limit=None):
+        sql, args = select_sql(table, columns, filters, order, desc, limit, coerce=await self._coercer(table))
+        return [_row(record) for record in await self._run("fetch", sql, args)]
+
+    async def insert(self, table, data):
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return []
+        sql, args = insert_sql(table, rows, coerce=await self._coercer(table))
+        return [_row(record) for record in await self._run("fetch", sql, args)]
+
+    async def upsert(self, table, data, on_conflict):
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return []
+        sql, args = insert_sql(table, rows, on_conflict=on_conflict, coerce=await self._coercer(table))
+        return [_row(record) for record in await self._run("fetch", sql, args)]
+
+    async def update(self, table, values, filters):
+        sql, args = update_sql(table, values, filters, coerce=await self._coercer(table))
+        return [_row(record) for record in await self._run("fetch", sql, args)]
+
+    async def delete(self, table, filters):
+        sql, args = delete_sql(table, filters, coerce=await self._coercer(table))
+        return [_row(record) for record in await self._run("fetch", sql, args)]
+
+    async def count(self, table, filters=()):
+        sql, args = count_sql(table, filters, coerce=await self._coercer(table))
+        return await self._run("fetchval", sql, args)
+
+    async def rpc(self, function, params=None):
+        sql, args = rpc_sql(function, params or {})
+        records = await self._run("fetch", sql, args)
+        # Scalar functions (RETURNS JSONB) come back as one column named after the function
+        if len(records) == 1 and list(records[0].keys()) == [function]:
+            value = records[0][function]
+            return json.loads(value) if isinstance(value, str) and value[:1] in "{[" else to_json_value(value)
+        return [_row(record) for record in records]
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
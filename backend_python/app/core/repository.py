@@ -0,0 +1,224 @@
+"""
+Async data-access layer.
+
+Services talk to the database through a ``Repository`` instead of the
+synchronous supabase client. Every call is awaited, so a slow PostgREST
+round trip only suspends the coroutine that issued it instead of the whole
+event loop (and every Socket.IO connection on the worker).
+
+Filters are plain ``(column, operator, value)`` tuples, e.g.
+``("units", "gte", 1)``, so the same service code can run against any
+backend that understands them.
+"""
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+Filter = Tuple[str, str, Any]
+Row = Dict[str, Any]
+
+OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "in", "is"}
+
+
+class RepositoryError(Exception):
+    """Raised when the backend rejects a query or cannot be reached."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Repository(ABC):
+    """
+    Backend-agnostic interface used by the service layer.
+    All methods return plain row dicts; a backend missing one of the
+    abstract methods cannot be instantiated.
+    """
+
+    @abstractmethod
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Sequence[Filter] = (),
+        order: Optional[str] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[Row]:
+        ...
+
+    async def select_one(self, table: str, filters: Sequence[Filter], columns: str = "*") -> Optional[Row]:
+        rows = await self.select(table, columns=columns, filters=filters, limit=1)
+        return rows[0] if rows else None
+
+    @abstractmethod
+    async def insert(self, table: str, data: Union[Row, List[Row]]) -> List[Row]:
+        ...
+
+    @abstractmethod
+    async def update(self, table: str, values: Row, filters: Sequence[Filter]) -> List[Row]:
+        ...
+
+    @abstractmethod
+    async def delete(self, table: str, filters: Sequence[Filter]) -> List[Row]:
+        ...
+
+    @abstractmethod
+    async def upsert(self, table: str, data: Union[Row, List[Row]], on_conflict: str) -> List[Row]:
+        """Insert, or merge into the row that collides on the ``on_conflict`` columns."""
+        ...
+
+    @abstractmethod
+    async def count(self, table: str, filters: Sequence[Filter] = ()) -> int:
+        ...
+
+    @abstractmethod
+    async def rpc(self, function: str, params: Optional[Row] = None) -> Any:
+        """Call a database function (see supabase_schema.sql) in one round trip."""
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _quote(value: Any) -> str:
+    # Values inside in.(...) lists must be quoted if they contain reserved characters
+    text = _format_value(value)
+    if any(ch in text for ch in ',()" '):
+        text = '"' + text.replace('"', '\\"') + '"'
+    return text
+
+
+def _to_params(filters: Sequence[Filter]) -> List[Tuple[str, str]]:
+    params = []
+    for column, op, value in filters:
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if op == "in":
+            params.append((column, f"in.({','.join(_quote(v) for v in value)})"))
+        else:
+            params.append((column, f"{op}.{_format_value(value)}"))
+    return params
+
+
+class PostgrestRepository(Repository):
+    """
+    Talks to Supabase's PostgREST endpoint over one shared ``httpx.AsyncClient``.
+    The client keeps a bounded pool of keep-alive connections, so concurrent
+    requests reuse TCP/TLS sessions instead of reconnecting per query.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout: float = 10.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Accept": "application/json",
+        }
+        self.client = client or httpx.AsyncClient(
+            base_url=f"{url.rstrip('/')}/rest/v1",
+            headers=headers,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=timeout,
+        )
+
+    async def _request(
+        self,
+        method: str,
+        table: str,
+        params: Optional[List[Tuple[str, str]]] = None,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        try:
+            response = await self.client.request(method, f"/{table}", params=params, json=json, headers=headers)
+        except httpx.HTTPError as e:
+            raise RepositoryError(f"{method} {table} failed: {e}") from e
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise RepositoryError(message, status_code=response.status_code)
+        return response
+
+    async def select(self, table, columns="*", filters=(), order=None, desc=False, limit=None):
+        params = [("select", columns)] + _to_params(filters)
+        if order:
+            params.append(("order", f"{order}.{'desc' if desc else 'asc'}"))
+        if limit is not None:
+            params.append(("limit", str(limit)))
+        response = await self._request("GET", table, params=params)
+        return response.json()
+
+    async def insert(self, table, data):
+        response = await self._request(
+            "POST", table, json=data, headers={"Prefer": "return=representation"}
+        )
+        return response.json()
+
+    async def upsert(self, table, data, on_conflict):
+        response = await self._request(
+            "POST", table, params=[("on_conflict", on_conflict)], json=data,
+            headers={"Prefer": "resolution=merge-duplicates,return=representation"},
+        )
+        return response.json()
+
+    async def update(self, table, values, filters):
+        response = await self._request(
+            "PATCH", table, params=_to_params(filters), json=values,
+            headers={"Prefer": "return=representation"},
+        )
+        return response.json()
+
+    async def delete(self, table, filters):
+        response = await self._request(
+            "DELETE", table, params=_to_params(filters),
+            headers={"Prefer": "return=representation"},
+        )
+        return response.json()
+
+    async def count(self, table, filters=()):
+        # HEAD + count=exact: PostgREST returns the total in Content-Range, no rows
+        response = await self._request(
+            "HEAD", table, params=[("select", "*")] + _to_params(filters),
+            headers={"Prefer": "count=exact"},
+        )
+        content_range = response.headers.get("content-range", "*/0")
+        total = content_range.rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else 0
+
+    async def rpc(self, function, params=None):
+        response = await self._request("POST", f"rpc/{function}", json=params or {})
+        return response.json() if response.content else None
+
+    async def close(self):
+        await self.client.aclose()
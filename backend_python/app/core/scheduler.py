@@ -0,0 +1,316 @@
+"""
+In-process asyncio scheduler for periodic maintenance jobs.
+
+Jobs run on an ``Every(seconds)`` interval or a ``Cron("m h dom mon dow")``
+schedule (UTC), each fire delayed by up to ``jitter`` seconds so workers and
+jobs do not hit the database in lockstep. A fire that comes round while the
+previous run of the same job is still going is skipped, and a run is cut off
+after ``lease_seconds``.
+
+Jobs that write shared state (``leader=True``) run on one worker only: before
+each run the worker must hold the job's lease from the leader election.
+``SCHEDULER_LEADER_ELECTION`` selects it:
+
+* ``""`` / ``"none"``: every worker is the leader (single worker)
+* ``"local"`` or ``"local:///path/to/dir"``: an exclusive ``flock`` on a file
+  per job, held for the life of the process; released by the kernel when the
+  worker dies, so another one takes over at its next fire
+* ``"database"``: a row per job in ``scheduler_leases`` (supabase_schema.sql),
+  taken for ``lease_seconds`` and renewed by every run of the holder; workers
+  on different hosts take over once it expires
+
+Jobs that refresh this worker's in-memory caches use ``leader=False``.
+
+Runs are counted as ``beos_scheduler_runs_total{job,outcome}`` and timed as
+``beos_scheduler_run_seconds{job}``.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, FrozenSet, IO, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import Counter, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_RUNS = registry.register(Counter(
+    "beos_scheduler_runs_total", "Scheduled job fires by outcome.", ("job", "outcome")))
+SCHEDULER_RUN_SECONDS = registry.register(Histogram(
+    "beos_scheduler_run_seconds", "Duration of scheduled job runs.", ("job",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)))
+
+DEFAULT_LOCK_DIR = os.path.join(tempfile.gettempdir(), "beos-scheduler")
+
+
+class Every:
+    """Fixed interval between fires."""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_run(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+
+# (lowest, highest) per cron field: minute, hour, day of month, month, day of week
+# (Sunday is both 0 and 7)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _cron_field(text: str, lowest: int, highest: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        part, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if part == "*":
+            start, stop = lowest, highest
+        elif "-" in part:
+            start, stop = (int(bound) for bound in part.split("-", 1))
+        else:
+            start = int(part)
+            stop = highest if step_text else start
+        if step <= 0 or not lowest <= start <= stop <= highest:
+            raise ValueError(f"Invalid cron field: {text!r}")
+        values.update(range(start, stop + 1, step))
+    return frozenset(values)
+
+
+class Cron:
+    """
+    Standard five-field cron expression in UTC: ``*``, lists, ranges and
+    ``/step``. Like cron, when both day fields are restricted a day matching
+    either one fires.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _cron_field(text, lowest, highest) for text, (lowest, highest) in zip(fields, CRON_FIELDS)
+        )
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        # isoweekday: Monday 1 .. Sunday 7; cron: Sunday 0 .. Saturday 6
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_run(self, after: datetime) -> datetime:
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Five years covers every valid expression (29 February included)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Awaitable[object]]
+    schedule: object
+    jitter: float = 0.0
+    # Run on one worker only (see the module docstring)
+    leader: bool = True
+    run_at_start: bool = False
+    lease_seconds: float = field(default_factory=lambda: settings.SCHEDULER_LEASE_SECONDS)
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    last_started: Optional[datetime] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+
+
+class LeaderElection:
+    """Every worker leads every job."""
+
+    async def acquire(self, job: str, ttl: float) -> bool:
+        return True
+
+    async def release(self, job: str) -> None:
+        pass
+
+
+class LocalLeaderElection(LeaderElection):
+    """Workers on one host: an exclusive ``flock`` on ``directory/<job>.lock``."""
+
+    def __init__(self, directory: str = DEFAULT_LOCK_DIR):
+        import fcntl
+
+        self._fcntl = fcntl
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._held: Dict[str, IO] = {}
+
+    async def acquire(self, job: str, ttl: float) -> bool:
+        if job in self._held:
+            return True
+        handle = open(os.path.join(self.directory, f"{job}.lock"), "a")
+        try:
+            self._fcntl.flock(handle, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._held[job] = handle
+        return True
+
+    async def release(self, job: str) -> None:
+        handle = self._held.pop(job, None)
+        if handle is not None:
+            self._fcntl.flock(handle, self._fcntl.LOCK_UN)
+            handle.close()
+
+
+class DatabaseLeaderElection(LeaderElection):
+    """Workers anywhere: a lease row per job, see acquire_scheduler_lease in supabase_schema.sql."""
+
+    def __init__(self, owner: Optional[str] = None):
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self, job: str, ttl: float) -> bool:
+        from app.core.database import get_repository
+
+        repo = get_repository()
+        if not repo:
+            return False
+        return bool(await repo.rpc("acquire_scheduler_lease", {
+            "p_job": job, "p_owner": self.owner, "p_ttl_seconds": ttl,
+        }))
+
+    async def release(self, job: str) -> None:
+        from app.core.database import get_repository
+
+        repo = get_repository()
+        if repo:
+            await repo.rpc("release_scheduler_lease", {"p_job": job, "p_owner": self.owner})
+
+
+def create_leader_election(url: str) -> LeaderElection:
+    if not url or url == "none":
+        return LeaderElection()
+    if url == "local" or url.startswith("local://"):
+        return LocalLeaderElection(url[len("local://"):] or DEFAULT_LOCK_DIR)
+    if url == "database":
+        return DatabaseLeaderElection()
+    raise ValueError(f"Unsupported SCHEDULER_LEADER_ELECTION: {url}")
+
+
+class Scheduler:
+    def __init__(self, election: Optional[LeaderElection] = None):
+        self.election = election or LeaderElection()
+        self.jobs: Dict[str, Job] = {}
+        self._loops: List[asyncio.Task] = []
+
+    def add(self, job: Job) -> Job:
+        if job.name in self.jobs:
+            raise ValueError(f"Job {job.name!r} is already scheduled")
+        self.jobs[job.name] = job
+        return job
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        return {
+            name: {
+                "runs": job.runs,
+                "failures": job.failures,
+                "skipped": job.skipped,
+                "running": job.task is not None and not job.task.done(),
+                "last_started": job.last_started.isoformat() if job.last_started else None,
+                "last_duration": job.last_duration,
+                "last_error": job.last_error,
+            }
+            for name, job in self.jobs.items()
+        }
+
+    def start(self) -> None:
+        if not self._loops:
+            self._loops = [asyncio.create_task(self._loop(job)) for job in self.jobs.values()]
+
+    async def stop(self) -> None:
+        tasks = self._loops + [job.task for job in self.jobs.values() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loops = []
+        for job in self.jobs.values():
+            if job.leader:
+                try:
+                    await self.election.release(job.name)
+                except Exception as e:
+                    logger.warning(f"Could not release the {job.name} lease: {str(e)}")
+
+    async def _loop(self, job: Job) -> None:
+        if job.run_at_start:
+            self.fire(job)
+        while True:
+            now = datetime.now(timezone.utc)
+            delay = (job.schedule.next_run(now) - now).total_seconds() + random.uniform(0, job.jitter)
+            await asyncio.sleep(delay)
+            self.fire(job)
+
+    def fire(self, job: Job) -> Optional[asyncio.Task]:
+        """Start a run unless the previous one is still going."""
+        if job.task is not None and not job.task.done():
+            job.skipped += 1
+            SCHEDULER_RUNS.inc(job.name, "overlap")
+            logger.warning(f"Scheduled job {job.name} is still running, skipping this run")
+            return None
+        job.task = asyncio.create_task(self.run(job))
+        return job.task
+
+    async def run(self, job: Job) -> bool:
+        """One run of ``job`` on this worker if it leads it; True if it ran successfully."""
+        try:
+            if job.leader and not await self.election.acquire(job.name, job.lease_seconds):
+                SCHEDULER_RUNS.inc(job.name, "not_leader")
+                return False
+        except Exception as e:
+            SCHEDULER_RUNS.inc(job.name, "error")
+            logger.error(f"Leader election for {job.name} failed: {str(e)}")
+            return False
+
+        job.last_started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            # Past the lease another worker may take over, so the run must be over by then
+            await asyncio.wait_for(job.func(), job.lease_seconds)
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e) or type(e).__name__
+            SCHEDULER_RUNS.inc(job.name, "error")
+            logger.error(f"Scheduled job {job.name} failed: {job.last_error}")
+            return False
+        finally:
+            job.runs += 1
+            job.last_duration = time.perf_counter() - start
+            SCHEDULER_RUN_SECONDS.observe(job.last_duration, job.name)
+        job.last_error = None
+        SCHEDULER_RUNS.inc(job.name, "success")
+        return True
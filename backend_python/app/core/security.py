@@ -1,48 +1,208 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.database import get_supabase
-from supabase import Client
+from app.core.database import get_supabase, supabase_configured
+from app.core.metrics import record_phase
+from app.core.tokens import InvalidTokenError, UnverifiableTokenError, decode_unverified, verify_token
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import httpx
 import logging
+import time
 
-# Security scheme
-security = HTTPBearer()
+# Security scheme (missing credentials are reported as 401 below, not 403)
+security = HTTPBearer(auto_error=False)
 
 logger = logging.getLogger(__name__)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+class AuthenticatedUser(dict):
     """
-    Validates the JWT token using Supabase Auth.
-    Returns the user data if valid.
+    Verified user claims. Behaves like a dict (``user.get("sub")``) and
+    also exposes the attributes of the Supabase ``User`` object (``user.id``).
     """
-    token = credentials.credentials
+
+    @property
+    def id(self):
+        return self.get("id") or self.get("sub")
+
+    @property
+    def email(self):
+        return self.get("email")
+
+    @property
+    def role(self):
+        return self.get("role")
+
+    @property
+    def user_metadata(self) -> Dict[str, Any]:
+        return self.get("user_metadata") or {}
+
+    @property
+    def app_metadata(self) -> Dict[str, Any]:
+        return self.get("app_metadata") or {}
+
+class SigningKeyCache:
+    """
+    JWK set fetched from Supabase Auth and kept for ``ttl`` seconds.
+    An unknown ``kid`` triggers a refresh, at most once per ``min_refresh_interval``.
+    """
+
+    def __init__(self, url: str, ttl: float = 600, min_refresh_interval: float = 30):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _needs_refresh(self, kid: Optional[str]) -> bool:
+        age = time.monotonic() - self._fetched_at
+        if age > self.ttl:
+            return True
+        return kid is not None and kid not in self.keys and age > self.min_refresh_interval
+
+    async def get_keys(self, kid: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        if self._needs_refresh(kid):
+            async with self._lock:
+                # Another request may have refreshed while we waited
+                if self._needs_refresh(kid):
+                    await self._refresh()
+        return self.keys
+
+    async def _refresh(self):
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(self.url, headers={"apikey": settings.SUPABASE_KEY})
+                response.raise_for_status()
+                self.keys = {k["kid"]: k for k in response.json().get("keys", []) if "kid" in k}
+        except Exception as e:
+            logger.warning(f"Could not refresh JWT signing keys: {str(e)}")
+        finally:
+            self._fetched_at = time.monotonic()
+
+_token_cache = TTLCache(max_entries=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+_signing_keys: Optional[SigningKeyCache] = None
+
+def get_signing_keys() -> Optional[SigningKeyCache]:
+    global _signing_keys
+    if _signing_keys is None:
+        url = settings.JWT_JWKS_URL or (
+            f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if settings.SUPABASE_URL else ""
+        )
+        if url:
+            _signing_keys = SigningKeyCache(url, ttl=settings.JWT_JWKS_TTL_SECONDS)
+    return _signing_keys
+
+def _cache_ttl(claims: Dict[str, Any]) -> float:
+    # Never keep a user cached past the token's own expiry
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        return min(settings.AUTH_CACHE_TTL_SECONDS, exp - time.time())
+    return settings.AUTH_CACHE_TTL_SECONDS
+
+def _unauthorized(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def verify_locally(token: str) -> AuthenticatedUser:
+    header, _, _, _ = decode_unverified(token)
+    keys = None
+    if header.get("alg", "").startswith(("RS", "ES")) and get_signing_keys():
+        keys = await get_signing_keys().get_keys(header.get("kid"))
+    claims = verify_token(
+        token,
+        secret=settings.JWT_SECRET,
+        keys=keys,
+        audience=settings.JWT_AUDIENCE or None,
+        leeway=5,
+    )
+    return AuthenticatedUser(claims, id=claims.get("sub"))
+
+async def verify_remotely(token: str) -> AuthenticatedUser:
     supabase = get_supabase()
-    
     if not supabase:
-        # Dev fallback if Supabase is not configured
-        if settings.ENVIRONMENT == "development":
-            return {"id": "mock-uuid", "email": "dev@example.com", "role": "admin"}
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Authentication service unavailable"
-        )
+        raise UnverifiableTokenError("Supabase Auth is not configured")
+    # The SDK call is synchronous; keep it off the event loop
+    response = await asyncio.to_thread(supabase.auth.get_user, token)
+    if not response or not response.user:
+        raise InvalidTokenError("Unknown user")
+    return AuthenticatedUser(response.user.model_dump(mode="json"))
 
+async def verified_user(token: str) -> Optional[AuthenticatedUser]:
+    """
+    The token's user if it is cached or checks out locally (signature, expiry,
+    audience), else None. Never asks Supabase Auth, so it is cheap enough to
+    call before routing (see admission.py).
+    """
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    user = _token_cache.get(cache_key)
+    if user is not None:
+        return user
     try:
-        user = supabase.auth.get_user(token)
-        if not user:
+        user = await verify_locally(token)
+        ttl = _cache_ttl(decode_unverified(token)[1])
+    except InvalidTokenError:
+        return None
+    _token_cache.set(cache_key, user, ttl=ttl)
+    return user
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
+    """
+    Validates the JWT token (in-process by default, Supabase Auth as fallback).
+    Returns the user data if valid.
+    """
+    start = time.perf_counter()
+    try:
+        return await _authenticate(credentials)
+    finally:
+        record_phase("auth", time.perf_counter() - start)
+
+async def _authenticate(credentials: Optional[HTTPAuthorizationCredentials]):
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    token = credentials.credentials
+
+    # Local verification never needs the SDK, so do not build the client just to check for it
+    if not supabase_configured():
+        # Dev fallback if Supabase is not configured
+        if settings.ENVIRONMENT == "development":
+            return AuthenticatedUser({"id": "mock-uuid", "email": "dev@example.com", "role": "admin"})
+        if settings.AUTH_VERIFY_MODE != "local":
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service unavailable"
             )
-        return user.user
+
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    user = _token_cache.get(cache_key)
+    if user is not None:
+        return user
+
+    try:
+        if settings.AUTH_VERIFY_MODE == "local":
+            try:
+                user = await verify_locally(token)
+            except UnverifiableTokenError:
+                if not settings.AUTH_REMOTE_FALLBACK:
+                    raise
+                user = await verify_remotely(token)
+        else:
+            user = await verify_remotely(token)
     except Exception as e:
         logger.error(f"Auth error: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized()
+
+    try:
+        ttl = _cache_ttl(decode_unverified(token)[1])
+    except InvalidTokenError:
+        ttl = settings.AUTH_CACHE_TTL_SECONDS
+    _token_cache.set(cache_key, user, ttl=ttl)
+    return user
 
 async def get_current_active_user(current_user = Depends(get_current_user)):
     return current_user
@@ -0,0 +1,229 @@
+"""
+Fast JSON responses for large lists of database rows.
+
+FastAPI's default path validates every returned row against
+``response_model``, converts it back with ``jsonable_encoder`` and encodes it
+with the stdlib. ``fast_response`` replaces that with, depending on
+``FAST_RESPONSE_MODE``:
+
+* ``trusted``: rows that came straight from our own database are only
+  projected onto the model's fields (defaults filled in), never revalidated
+* ``validate``: one prebuilt ``TypeAdapter`` per model validates and dumps in
+  pydantic-core
+* ``off``: ``jsonable_encoder`` as FastAPI would
+
+encodes with orjson when it is installed, and gzip- or brotli-compresses
+bodies above ``RESPONSE_COMPRESS_MIN_BYTES`` when the client accepts it.
+"""
+import gzip
+import json
+import time
+import typing
+from datetime import date, datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, TypeAdapter
+
+from app.core.config import settings
+from app.core.metrics import record_phase
+from app.core.pagination import NEXT_CURSOR_HEADER
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+# Fields with no default and no value in the row serialize as null, like the database
+_MISSING = object()
+
+
+def _fallback_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_fallback_default, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSONResponse encoded with orjson (stdlib json when orjson is missing)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = dumps(content)
+        record_phase("serialization", time.perf_counter() - start)
+        return body
+
+
+@lru_cache(maxsize=None)
+def adapter_for(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _mentions_model(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+    return any(_mentions_model(arg) for arg in typing.get_args(annotation))
+
+
+@lru_cache(maxsize=None)
+def projection_for(model: Any) -> Optional[Tuple[Tuple[str, Any, Optional[Callable[[], Any]]], ...]]:
+    """
+    ``((field, default, default_factory), ...)`` for a flat model or
+    ``List[model]``, or None if the model nests other models (those go
+    through the TypeAdapter).
+    """
+    if typing.get_origin(model) in (list, List):
+        model = typing.get_args(model)[0]
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        return None
+    fields = []
+    for name, field in model.model_fields.items():
+        if _mentions_model(field.annotation):
+            return None
+        default = _MISSING if field.is_required() or field.default_factory else field.default
+        fields.append((field.alias or name, default, field.default_factory))
+    return tuple(fields)
+
+
+def _project(row: Dict[str, Any], fields: Tuple[Tuple[str, Any, Optional[Callable[[], Any]]], ...]) -> Dict[str, Any]:
+    out = {}
+    for name, default, factory in fields:
+        value = row.get(name, _MISSING)
+        if value is _MISSING:
+            # A fresh value per row, as pydantic does (a shared list would alias across rows)
+            value = factory() if factory is not None else default
+        out[name] = None if value is _MISSING else value
+    return out
+
+
+def encode_body(data: Any, model: Any = None, mode: Optional[str] = None) -> bytes:
+    """JSON for ``data`` as ``response_model=model`` would render it."""
+    start = time.perf_counter()
+    body = _encode(data, model, mode or settings.FAST_RESPONSE_MODE)
+    record_phase("serialization", time.perf_counter() - start)
+    return body
+
+
+def _encode(data: Any, model: Any, mode: str) -> bytes:
+    if model is None or mode == "off":
+        return dumps(jsonable_encoder(data))
+    if mode == "trusted":
+        fields = projection_for(model)
+        if fields is not None:
+            if isinstance(data, dict):
+                return dumps(_project(data, fields))
+            return dumps([_project(row, fields) for row in data])
+    adapter = adapter_for(model)
+    return adapter.dump_json(adapter.validate_python(data))
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Coding -> q-value from an Accept-Encoding header (q defaults to 1)."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    weights = _accepted_encodings(accept_encoding)
+
+    def accepts(coding: str) -> bool:
+        # q=0 refuses a coding; "*" stands for every coding not listed
+        return weights.get(coding, weights.get("*", 0.0)) > 0
+
+    if brotli is not None and accepts("br"):
+        return "br"
+    if accepts("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    start = time.perf_counter()
+    if encoding == "br":
+        body = brotli.compress(body, quality=4)
+    else:
+        body = gzip.compress(body, compresslevel=5)
+    record_phase("serialization", time.perf_counter() - start)
+    return body
+
+
+def response_encoding(request: Request, body: bytes) -> Optional[str]:
+    """Content-Encoding ``build_response`` will send ``body`` with, if any."""
+    if len(body) < settings.RESPONSE_COMPRESS_MIN_BYTES:
+        return None
+    return negotiate_encoding(request.headers.get("accept-encoding", ""))
+
+
+def build_response(
+    request: Request,
+    body: bytes,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    compressed: Optional[Dict[str, bytes]] = None,
+) -> Response:
+    """
+    JSON response for an encoded ``body``, compressed when large enough.
+    ``compressed`` memoizes encoded variants for bodies that are served again.
+    """
+    headers = dict(headers or {})
+    if len(body) >= settings.RESPONSE_COMPRESS_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = response_encoding(request, body)
+        if encoding:
+            if compressed is None:
+                body = compress(body, encoding)
+            else:
+                if encoding not in compressed:
+                    compressed[encoding] = compress(body, encoding)
+                body = compressed[encoding]
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def fast_response(
+    request: Request,
+    data: Any,
+    model: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Serialize ``data`` through the fast path; see the module docstring.
+    A ``Page``'s cursor is sent as X-Next-Cursor.
+    """
+    headers = dict(headers or {})
+    next_cursor = getattr(data, "next_cursor", None)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return build_response(request, encode_body(data, model), headers=headers)
@@ -0,0 +1,95 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+During a burst thousands of clients ask for the same hospital, inventory or
+request at once. ``SingleFlight.do(key, load)`` runs ``load`` for the first
+caller only; everyone who asks for the same key while it is in flight awaits
+that one call and gets its result (or its exception). The database sees one
+query per key per burst. Nothing is kept once the call completes: caching is
+the response cache's job, this only merges calls that overlap in time.
+
+The shared load runs as its own task, so a caller that disconnects does not
+cancel it for the others. Results are shared objects: treat them as
+read-only. Write paths call ``forget(key)`` so readers arriving after a write
+start a fresh query instead of joining one that began before it.
+
+Calls are counted per flight as ``beos_single_flight_calls_total{flight,role}``
+(role ``leader`` ran the query, ``follower`` shared it); the coalescing ratio
+is followers / all calls.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, registry
+
+SINGLE_FLIGHT_CALLS = registry.register(Counter(
+    "beos_single_flight_calls_total", "Coalesced reads: leaders ran the query, followers shared it.",
+    ("flight", "role")))
+SINGLE_FLIGHT_RATIO = registry.register(Gauge(
+    "beos_single_flight_coalescing_ratio", "Share of calls served by another caller's in-flight query.",
+    ("flight",)))
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.enabled = settings.SINGLE_FLIGHT_ENABLED
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    @property
+    def coalescing_ratio(self) -> float:
+        total = self.leaders + self.followers
+        return self.followers / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "in_flight": len(self._calls),
+            "coalescing_ratio": round(self.coalescing_ratio, 4),
+        }
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await load()
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            SINGLE_FLIGHT_CALLS.inc(self.name, "leader")
+            task = asyncio.ensure_future(load())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.followers += 1
+            SINGLE_FLIGHT_CALLS.inc(self.name, "follower")
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+    def forget(self, key: Hashable) -> None:
+        """Callers from now on start a new query; ones already waiting keep the old result."""
+        self._calls.pop(key, None)
+
+
+def _collect_ratios(flights):
+    def collect():
+        for flight in flights:
+            SINGLE_FLIGHT_RATIO.set(flight.coalescing_ratio, flight.name)
+
+    return collect
+
+
+# One flight per hot read path, keyed by id
+hospital_reads = SingleFlight("hospital")
+inventory_reads = SingleFlight("inventory")
+request_reads = SingleFlight("request")
+
+registry.collectors.append(_collect_ratios((hospital_reads, inventory_reads, request_reads)))
@@ -1,14 +1,72 @@
 import socketio
 import logging
+from functools import lru_cache
+from app.core.config import settings
+from app.core.geo import cells_covering, geohash_encode
+from app.core.metrics import flow_collector, registry, socket_collector
+from app.core.socket_backplane import create_client_manager
+from app.core.socket_flow import BoundedAsyncServer, SocketMetrics, UpdateCoalescer
+from app.services.compatibility import BLOOD_TYPES
 
 logger = logging.getLogger(__name__)
 
 # Create a Socket.IO server within FastAPI (ASGI)
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+# With several workers, SOCKETIO_BACKPLANE makes rooms span all of them (see socket_backplane.py)
+client_manager = create_client_manager(settings.SOCKETIO_BACKPLANE)
+socket_metrics = SocketMetrics()
+sio = BoundedAsyncServer(
+    async_mode='asgi', cors_allowed_origins='*', client_manager=client_manager,
+    max_client_queue=settings.SOCKET_CLIENT_QUEUE_MAX, metrics=socket_metrics,
+)
+
+GEO_ROOM_PREFIX = 'geo_'
+
+def city_room(city: str) -> str:
+    # Case and spacing variants of a city name share one room
+    return f"city_{' '.join(str(city).split()).lower()}"
+
+def geo_room(lat: float, lng: float, blood_type: str = None) -> str:
+    """A cell's room; donors join the one for their blood type, everyone else the plain one."""
+    room = GEO_ROOM_PREFIX + geohash_encode(lat, lng, settings.ALERT_CELL_PRECISION)
+    return f"{room}_{blood_type}" if blood_type else room
+
+@lru_cache(maxsize=4096)
+def _covering_rooms(lat: float, lng: float, radius_km: float, precision: int) -> tuple:
+    return tuple(sorted(GEO_ROOM_PREFIX + cell for cell in cells_covering(lat, lng, radius_km, precision)))
+
+def geo_rooms(lat: float, lng: float, radius_km: float, blood_types: tuple = ()) -> list:
+    """
+    Rooms of every geohash cell covering the circle, plain and per blood type
+    in ``blood_types``; cost grows with the cells, not the members.
+    """
+    cells = _covering_rooms(lat, lng, radius_km, settings.ALERT_CELL_PRECISION)
+    return list(cells) + [f"{room}_{blood_type}" for room in cells for blood_type in blood_types]
+
+def _coordinates(payload):
+    if isinstance(payload, dict):
+        lat, lng = payload.get('lat', payload.get('latitude')), payload.get('lng', payload.get('longitude'))
+    elif isinstance(payload, (list, tuple)) and len(payload) == 2:
+        lat, lng = payload
+    else:
+        return None
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+# Request events merged per request before fan-out; the rest go out immediately
+COALESCED_EVENTS = {'request-updated', 'request-fulfilled', 'request-cancelled'}
 
 class SocketManager:
-    def __init__(self, sio_server: socketio.AsyncServer):
+    def __init__(self, sio_server: socketio.AsyncServer, metrics: SocketMetrics):
         self.sio = sio_server
+        self.metrics = metrics
+        self.coalescer = UpdateCoalescer(
+            self.emit_to_rooms, settings.SOCKET_COALESCE_WINDOW_MS / 1000, metrics
+        )
         self.register_handlers()
 
     def register_handlers(self):
@@ -24,17 +82,59 @@ class SocketManager:
         @self.sio.on('join-city')
         async def handle_join_city(sid, city):
             logger.info(f"Socket {sid} joining city room: {city}")
-            self.sio.enter_room(sid, f"city_{city}")
+            await self.sio.enter_room(sid, city_room(city))
 
         @self.sio.on('join-blood-type')
         async def handle_join_blood_type(sid, blood_type):
             logger.info(f"Socket {sid} joining blood type room: {blood_type}")
-            self.sio.enter_room(sid, f"type_{blood_type}")
+            await self.sio.enter_room(sid, f"type_{blood_type}")
+
+        @self.sio.on('join-location')
+        async def handle_join_location(sid, payload):
+            coordinates = _coordinates(payload)
+            if coordinates is None:
+                return {'error': 'Expected {lat, lng}'}
+            blood_type = payload.get('blood_type') if isinstance(payload, dict) else None
+            if blood_type is not None and blood_type not in BLOOD_TYPES:
+                return {'error': 'Unknown blood_type'}
+            # Donors hear only requests they can give to; other clients every request nearby
+            room = geo_room(*coordinates, blood_type)
+            # A client follows one location: leave the cell it was in before
+            for previous in self.sio.rooms(sid):
+                if previous.startswith(GEO_ROOM_PREFIX) and previous != room:
+                    await self.sio.leave_room(sid, previous)
+            await self.sio.enter_room(sid, room)
+            return {'room': room}
 
     async def emit_to_city(self, city: str, event: str, data: dict):
-        await self.sio.emit(event, data, room=f"city_{city}")
+        await self.sio.emit(event, data, room=city_room(city))
+
+    async def emit_to_blood_type(self, blood_type: str, event: str, data: dict):
+        await self.sio.emit(event, data, room=f"type_{blood_type}")
+
+    async def emit_to_rooms(self, rooms: list, event: str, data: dict):
+        # One emit to the union of rooms: a client in several of them receives it once
+        self.metrics.emitted += 1
+        await self.sio.emit(event, data, room=rooms)
+
+    async def emit_request_event(self, rooms: list, event: str, request: dict):
+        """
+        Lifecycle events for one request. Updates are coalesced and sent as deltas
+        (see UpdateCoalescer); new requests and alerts go out at once.
+        """
+        if event in COALESCED_EVENTS and self.coalescer.window > 0:
+            self.coalescer.submit(rooms, event, request)
+            return
+        await self.emit_to_rooms(rooms, event, {**request, 'rev': self.coalescer.remember(request)})
 
     async def emit_broadcast(self, event: str, data: dict):
         await self.sio.emit(event, data)
 
-socket_manager = SocketManager(sio)
+socket_manager = SocketManager(sio, socket_metrics)
+registry.collectors.append(socket_collector(sio))
+registry.collectors.append(flow_collector(socket_metrics))
+
+async def close_socket_backplane():
+    close = getattr(client_manager, "close", None)
+    if close:
+        await close()
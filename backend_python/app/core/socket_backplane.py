@@ -0,0 +1,162 @@
+"""
+Socket.IO client managers that share rooms across uvicorn workers.
+
+Each worker keeps its own connected clients. An emit to a room is delivered
+to the local members and published on a backplane, and every other worker
+delivers it to its own members of that room.
+
+``SOCKETIO_BACKPLANE`` selects the implementation:
+
+* ``""`` / ``"memory"``: in-process only (single worker, the default)
+* ``"local"`` or ``"local:///path/to/dir"``: workers on one host exchange
+  messages over Unix sockets in a shared directory, no broker needed
+* ``"redis://..."`` / ``"amqp://..."``: python-socketio's Redis / RabbitMQ
+  managers for workers spread over several hosts
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional, Set
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_DIR = os.path.join(tempfile.gettempdir(), "beos-socketio")
+# Longest accepted backplane message; alerts are a few hundred bytes
+MAX_MESSAGE_BYTES = 1 << 20
+# sun_path holds 108 bytes on Linux and 104 on macOS, including the terminating NUL
+MAX_SOCKET_PATH = 103
+
+
+class LocalPubSubManager(AsyncPubSubManager):
+    """
+    Backplane for workers on the same host.
+
+    Every listening worker serves a Unix socket named after its host id inside
+    ``directory/channel``. Publishing writes the message as one JSON line to a
+    persistent connection to each socket found there, waiting on the stream's
+    flow control if a peer falls behind. Sockets of workers that died are
+    removed the first time a connection to them is refused.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str = DEFAULT_LOCAL_DIR, channel: str = "socketio", write_only: bool = False,
+                 logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.directory = os.path.join(directory, channel)
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.host_id}.sock")
+        if len(os.fsencode(self.path)) > MAX_SOCKET_PATH:
+            # bind() would fail on every retry of the listener; refuse up front instead
+            raise ValueError(f"Socket.IO backplane directory is too long for a Unix socket path: {directory}")
+        self._writers: Dict[str, asyncio.StreamWriter] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._inbox: Optional[asyncio.Queue] = None
+        self._readers: Set[asyncio.Task] = set()
+
+    def _peers(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, name) for name in names
+                if name.endswith(".sock") and os.path.join(self.directory, name) != self.path]
+
+    async def _writer(self, peer: str) -> Optional[asyncio.StreamWriter]:
+        writer = self._writers.get(peer)
+        if writer is not None and not writer.is_closing():
+            return writer
+        try:
+            _, writer = await asyncio.open_unix_connection(peer)
+        except (ConnectionRefusedError, FileNotFoundError):
+            try:
+                os.unlink(peer)
+            except OSError:
+                pass
+            return None
+        self._writers[peer] = writer
+        return writer
+
+    async def _publish(self, data):
+        payload = self.json.dumps(data).encode() + b"\n"
+        if len(payload) > MAX_MESSAGE_BYTES:
+            logger.error(f"Socket.IO backplane message of {len(payload)} bytes exceeds {MAX_MESSAGE_BYTES}")
+            return
+        writers = []
+        for peer in self._peers():
+            writer = await self._writer(peer)
+            if writer is not None:
+                writer.write(payload)
+                writers.append((peer, writer))
+        for peer, writer in writers:
+            try:
+                await writer.drain()
+            except (ConnectionError, OSError) as e:
+                logger.warning(f"Socket.IO backplane lost {peer}: {str(e)}")
+                self._writers.pop(peer, None)
+                writer.close()
+
+    async def _receive(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._readers.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await self._inbox.put(line)
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Socket.IO backplane connection dropped: {str(e)}")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._readers.discard(task)
+            writer.close()
+
+    async def _listen(self):
+        if self._server is None:
+            self._inbox = asyncio.Queue()
+            self._server = await asyncio.start_unix_server(self._receive, path=self.path, limit=MAX_MESSAGE_BYTES)
+        while True:
+            yield await self._inbox.get()
+
+    async def close(self) -> None:
+        listener = getattr(self, "thread", None)
+        if listener is not None:
+            listener.cancel()
+            try:
+                await listener
+            except asyncio.CancelledError:
+                pass
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for task in list(self._readers):
+            task.cancel()
+        await asyncio.gather(*self._readers, return_exceptions=True)
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def create_client_manager(url: str) -> Optional[socketio.AsyncManager]:
+    """Client manager for ``SOCKETIO_BACKPLANE``; None means in-process rooms."""
+    url = (url or "").strip()
+    if not url or url == "memory":
+        return None
+    if url == "local" or url.startswith("local://"):
+        directory = url[len("local://"):] if url.startswith("local://") else ""
+        return LocalPubSubManager(directory or DEFAULT_LOCAL_DIR)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return socketio.AsyncRedisManager(url)
+    if url.startswith("amqp://"):
+        return socketio.AsyncAioPikaManager(url)
+    raise ValueError(f"Unsupported SOCKETIO_BACKPLANE: {url}")
@@ -0,0 +1,173 @@
+"""
+Flow control for Socket.IO fan-out during request surges.
+
+* ``BoundedAsyncServer`` caps every client's outbound Engine.IO queue and
+  drops that client's oldest queued messages when it cannot keep up, so one
+  slow phone neither grows server memory nor delays anyone else.
+* ``UpdateCoalescer`` merges updates to the same request that arrive within a
+  short window and sends only the fields that changed since the last emit,
+  tagged with the revision they apply to.
+
+``BoundedAsyncServer`` hooks ``AsyncServer._send_eio_packet`` and reads the
+Engine.IO socket's ``queue``, neither of which is public API: python-socketio
+and python-engineio are pinned in requirements.txt, and test_socket_flow.py
+fails if an upgrade stops routing emits through the hook.
+"""
+import asyncio
+import itertools
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import socketio
+from engineio import packet as eio_packet
+
+from app.core.cache import TTLCache
+from app.core.metrics import SOCKET_EMITS, emit_target
+
+logger = logging.getLogger(__name__)
+
+
+class SocketMetrics:
+    """Counters for the real-time layer, exposed via ``snapshot``."""
+
+    def __init__(self):
+        self.emitted = 0
+        self.coalesced = 0
+        self.deltas_sent = 0
+        self.full_sent = 0
+        self.unchanged_skipped = 0
+        self.dropped = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class BoundedAsyncServer(socketio.AsyncServer):
+    """
+    AsyncServer whose per-client outbound queue holds at most
+    ``max_client_queue`` packets. When a client is full, its oldest queued
+    messages are dropped down to three quarters of the cap (control packets
+    and the writer's shutdown sentinel are always kept, in order).
+    """
+
+    def __init__(self, *args, max_client_queue: int = 256, metrics: Optional[SocketMetrics] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_client_queue = max_client_queue
+        self.metrics = metrics or SocketMetrics()
+        if not hasattr(socketio.AsyncServer, "_send_eio_packet"):
+            logger.error(
+                f"python-socketio {socketio.__version__} has no _send_eio_packet: "
+                "per-client queues are unbounded (see requirements.txt for the supported version)"
+            )
+
+    def _trim(self, queue: asyncio.Queue) -> None:
+        if queue.qsize() < self.max_client_queue:
+            return
+        items = []
+        while True:
+            try:
+                items.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+            queue.task_done()
+        excess = len(items) - self.max_client_queue * 3 // 4
+        for item in items:
+            if excess > 0 and item is not None and item.packet_type == eio_packet.MESSAGE:
+                excess -= 1
+                self.metrics.dropped += 1
+                continue
+            queue.put_nowait(item)
+
+    async def emit(self, event, data=None, to=None, room=None, *args, **kwargs):
+        SOCKET_EMITS.inc(event, emit_target(to if to is not None else room))
+        await super().emit(event, data, to, room, *args, **kwargs)
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        socket = self.eio.sockets.get(eio_sid)
+        if socket is not None and eio_pkt.packet_type == eio_packet.MESSAGE:
+            self._trim(socket.queue)
+        await super()._send_eio_packet(eio_sid, eio_pkt)
+
+
+Emit = Callable[[List[str], str, Dict[str, Any]], Awaitable[None]]
+
+
+class UpdateCoalescer:
+    """
+    Per-request update merging with delta encoding.
+
+    ``submit`` records an update and returns at once; one flush per
+    ``window`` seconds emits a single event per request with the union of the
+    rooms it was addressed to and the latest event name.
+
+    Every emitted state gets a revision (``rev``), unique to this worker.
+    Payloads carry only fields that differ from what was last emitted for
+    that request, marked ``"delta": true`` with the ``base`` revision they
+    apply to, or the full row if it was never emitted from here. A client
+    whose copy is at any other revision (loaded over REST, joined late, or
+    last updated by another worker) refetches the row instead of merging.
+    """
+
+    def __init__(self, emit: Emit, window: float, metrics: SocketMetrics, max_tracked: int = 10000):
+        self.emit = emit
+        self.window = window
+        self.metrics = metrics
+        self.pending: Dict[Any, Tuple[List[str], str, Dict[str, Any]]] = {}
+        # request id -> (rev, row as last emitted)
+        self.last_sent = TTLCache(max_entries=max_tracked, ttl=24 * 3600)
+        self._worker = uuid.uuid4().hex[:8]
+        self._revisions = itertools.count(1)
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def remember(self, row: Dict[str, Any]) -> Optional[str]:
+        """Record a full row emitted elsewhere (e.g. ``new-request``) as the delta base; returns its rev."""
+        if row.get("id") is None:
+            return None
+        rev = f"{self._worker}.{next(self._revisions)}"
+        self.last_sent.set(row["id"], (rev, dict(row)))
+        return rev
+
+    def submit(self, rooms: List[str], event: str, row: Dict[str, Any]) -> None:
+        request_id = row.get("id")
+        queued = self.pending.get(request_id)
+        if queued is None:
+            self.pending[request_id] = (list(rooms), event, dict(row))
+        else:
+            queued_rooms, _, fields = queued
+            fields.update(row)
+            self.pending[request_id] = (queued_rooms + [r for r in rooms if r not in queued_rooms], event, fields)
+            self.metrics.coalesced += 1
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    def payload(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        last = self.last_sent.get(row.get("id"))
+        if last is None:
+            self.metrics.full_sent += 1
+            return {**row, "rev": self.remember(row)}
+        base_rev, base = last
+        changed = {key: value for key, value in row.items() if base.get(key) != value}
+        if not changed:
+            self.metrics.unchanged_skipped += 1
+            return None
+        self.metrics.deltas_sent += 1
+        rev = self.remember({**base, **row})
+        return {"id": row["id"], "delta": True, "base": base_rev, "rev": rev, **changed}
+
+    async def flush(self) -> None:
+        pending, self.pending = self.pending, {}
+        for rooms, event, row in pending.values():
+            data = self.payload(row)
+            if data is None:
+                continue
+            try:
+                await self.emit(rooms, event, data)
+            except Exception as e:
+                logger.error(f"Failed to emit coalesced {event} for request {row.get('id')}: {str(e)}")
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        # Updates submitted while this flush is emitting schedule the next one
+        self._flush_task = None
+        await self.flush()
@@ -0,0 +1,124 @@
+"""
+In-process JWT verification for Supabase access tokens.
+
+HS256/384/512 tokens are checked against the project's JWT secret with the
+standard library. RS256/ES256 tokens are checked against a JWK set, which
+needs the optional ``cryptography`` package.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional
+
+try:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+    from cryptography.exceptions import InvalidSignature
+except ImportError:  # pragma: no cover - optional dependency
+    rsa = None
+
+HMAC_ALGORITHMS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+
+class InvalidTokenError(Exception):
+    """The token is malformed, forged or expired."""
+
+
+class UnverifiableTokenError(InvalidTokenError):
+    """No key is available locally to check this token's signature."""
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _b64int(segment: str) -> int:
+    return int.from_bytes(_b64decode(segment), "big")
+
+
+def decode_unverified(token: str):
+    """Split a compact JWS into (header, claims, signing_input, signature)."""
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64decode(header_b64))
+        claims = json.loads(_b64decode(payload_b64))
+        signature = _b64decode(signature_b64)
+    except (ValueError, TypeError) as e:
+        raise InvalidTokenError("Malformed token") from e
+    if not isinstance(header, dict) or not isinstance(claims, dict):
+        raise InvalidTokenError("Malformed token")
+    return header, claims, f"{header_b64}.{payload_b64}".encode(), signature
+
+
+def _verify_asymmetric(alg: str, jwk: Dict[str, Any], signing_input: bytes, signature: bytes) -> bool:
+    if rsa is None:
+        raise UnverifiableTokenError(f"{alg} verification requires the 'cryptography' package")
+    try:
+        if alg == "RS256" and jwk.get("kty") == "RSA":
+            key = rsa.RSAPublicNumbers(_b64int(jwk["e"]), _b64int(jwk["n"])).public_key()
+            key.verify(signature, signing_input, padding.PKCS1v15(), hashes.SHA256())
+            return True
+        if alg == "ES256" and jwk.get("kty") == "EC" and jwk.get("crv") == "P-256":
+            key = ec.EllipticCurvePublicNumbers(_b64int(jwk["x"]), _b64int(jwk["y"]), ec.SECP256R1()).public_key()
+            if len(signature) != 64:
+                return False
+            der = encode_dss_signature(int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big"))
+            key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+            return True
+    except (InvalidSignature, KeyError, ValueError):
+        return False
+    raise UnverifiableTokenError(f"Key {jwk.get('kid')} cannot verify {alg}")
+
+
+def verify_token(
+    token: str,
+    secret: Optional[str] = None,
+    keys: Optional[Dict[str, Dict[str, Any]]] = None,
+    audience: Optional[str] = None,
+    leeway: float = 0,
+) -> Dict[str, Any]:
+    """
+    Check signature, expiry and audience and return the token's claims.
+
+    ``keys`` maps JWK ``kid`` to the JWK itself. Raises ``InvalidTokenError``
+    when the token is bad and ``UnverifiableTokenError`` when it may be fine
+    but no matching secret/key is available here.
+    """
+    header, claims, signing_input, signature = decode_unverified(token)
+    alg = header.get("alg")
+
+    if alg in HMAC_ALGORITHMS:
+        if not secret:
+            raise UnverifiableTokenError("No JWT secret configured")
+        expected = hmac.new(secret.encode(), signing_input, HMAC_ALGORITHMS[alg]).digest()
+        if not hmac.compare_digest(expected, signature):
+            raise InvalidTokenError("Signature verification failed")
+    elif alg in ASYMMETRIC_ALGORITHMS:
+        jwk = (keys or {}).get(header.get("kid"))
+        if jwk is None:
+            raise UnverifiableTokenError(f"Unknown signing key: {header.get('kid')}")
+        if not _verify_asymmetric(alg, jwk, signing_input, signature):
+            raise InvalidTokenError("Signature verification failed")
+    else:
+        # Never accept "none" or algorithms we cannot check
+        raise InvalidTokenError(f"Unsupported algorithm: {alg}")
+
+    now = time.time()
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        raise InvalidTokenError("Token has no expiry")
+    if exp + leeway < now:
+        raise InvalidTokenError("Token expired")
+    nbf = claims.get("nbf")
+    if isinstance(nbf, (int, float)) and nbf - leeway > now:
+        raise InvalidTokenError("Token not yet valid")
+    if audience:
+        aud = claims.get("aud")
+        audiences = aud if isinstance(aud, list) else [aud]
+        if audience not in audiences:
+            raise InvalidTokenError("Invalid audience")
+    return claims
@@ -1,18 +1,48 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-from app.api.api import api_router
+from app.api.api import include_api_routers
 from app.core.config import settings
+from app.core.database import close_repository
+from app.core import metrics
+from app.core.admission import AdmissionMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.serialization import FastJSONResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Imported here, not at module level: serverless functions never run the lifespan
+    from app.services.maintenance import create_scheduler
+    from app.services.request_events import request_events
+
+    scheduler = create_scheduler() if settings.SCHEDULER_ENABLED else None
+    if scheduler:
+        scheduler.start()
+    background_tasks = [
+        asyncio.create_task(request_events.run()),
+    ]
+    yield
+    for task in background_tasks:
+        task.cancel()
+    if scheduler:
+        await scheduler.stop()
+    # Release pooled keep-alive connections held by the repository
+    await close_repository()
+    await close_socket_backplane()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Blood Emergency Operating System API",
     version="2.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -21,18 +51,27 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
+if settings.ADMISSION_ENABLED:
+    # Inside CORS, so browsers can read the 429/503 responses
+    app.add_middleware(AdmissionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+if settings.METRICS_ENABLED:
+    # Outermost, so CORS and error handling count towards request latency
+    app.add_middleware(metrics.MetricsMiddleware)
+
+include_api_routers(app, settings.API_V1_STR, lazy=settings.LAZY_ROUTERS)
 
 # Socket.IO Integration
-from app.core.socket import sio
+from app.core.socket import sio, close_socket_backplane
 import socketio
 
 # Wrap FastAPI with Socket.IO
@@ -45,3 +84,10 @@ app = socketio.ASGIApp(sio, other_asgi_app=fastapi_app)
 @fastapi_app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+if settings.METRICS_ENABLED:
+    @fastapi_app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics(request: Request):
+        if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+            return Response(status_code=401)
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, root_validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, root_validator
+from typing import Optional, List, Dict
 from datetime import date
 from uuid import UUID
 
@@ -35,6 +35,12 @@ class BloodBankResponse(BloodBankBase):
     class Config:
         from_attributes = True
 
+class BloodBankStockResponse(BloodBankResponse):
+    units_available: int
+
+class BloodBankNearbyResponse(BloodBankResponse):
+    distance_km: float
+
 # Inventory Models
 class BloodInventoryUpdate(BaseModel):
     blood_type: str
@@ -66,3 +72,35 @@ class BloodBatchResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class BloodAllocationRequest(BaseModel):
+    blood_type: str
+    units: int = Field(..., gt=0)
+
+class BatchAllocation(BaseModel):
+    batch_id: int
+    units: int
+    expiry_date: Optional[date] = None
+
+class BloodAllocationResponse(BaseModel):
+    blood_type: str
+    units_requested: int
+    units_allocated: int
+    shortfall: int
+    allocations: List[BatchAllocation]
+    # Units of this blood type left at the bank
+    inventory_units: int
+
+class NearExpiryBatch(BaseModel):
+    id: int
+    blood_bank_id: int
+    blood_type: str
+    units: int
+    expiry_date: date
+    days_left: int
+
+class BloodBatchBulkResponse(BaseModel):
+    inserted: int
+    batches: List[BloodBatchResponse]
+    # Units per blood type after the intake
+    inventory: Dict[str, int]
@@ -32,3 +32,6 @@ class HospitalResponse(HospitalBase):
 
     class Config:
         from_attributes = True
+
+class HospitalNearbyResponse(HospitalResponse):
+    distance_km: float
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Literal, Union
+from typing import List, Optional, Literal, Union
 from datetime import date, datetime
 from enum import Enum
 
@@ -61,6 +61,9 @@ class Donor(DonorBase):
     last_donation: Optional[date] = None
     created_at: Optional[datetime] = None
 
+class NearbyDonor(Donor):
+    distance_km: float
+
 class HospitalBase(BaseModel):
     name: str
     address: str
@@ -117,6 +120,23 @@ class BloodRequest(BloodRequestBase):
     created_at: Optional[datetime] = None
     fulfilled_at: Optional[datetime] = None
 
+class DonorMatch(Donor):
+    distance_km: Optional[float] = None
+    score: float
+
+class BloodBankMatch(BloodBank):
+    units_available: int
+    distance_km: Optional[float] = None
+    score: float
+
+class RequestMatches(BaseModel):
+    request_id: int
+    blood_type: BloodType
+    compatible_types: List[BloodType]
+    urgency: UrgencyLevel
+    donors: List[DonorMatch]
+    blood_banks: List[BloodBankMatch]
+
 class BloodBatchBase(BaseModel):
     blood_bank_id: int
     blood_type: BloodType
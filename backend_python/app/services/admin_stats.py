@@ -0,0 +1,52 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.core.database import get_repository
+
+COUNTED_TABLES = {
+    "donors": "donors",
+    "hospitals": "hospitals",
+    "blood_banks": "blood_banks",
+    "requests": "blood_requests",
+}
+
+class AdminStats:
+    """
+    Snapshot of the admin dashboard figures.
+
+    The maintenance scheduler rebuilds it every ``ADMIN_STATS_REFRESH_SECONDS``: the
+    head-only counts run concurrently and the request/donation aggregates come
+    from one database function, so serving the dashboard never scans a table.
+    """
+
+    def __init__(self):
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.refreshed_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            repo = get_repository()
+            if not repo:
+                return self.snapshot
+            *counts, aggregates = await asyncio.gather(
+                *(repo.count(table) for table in COUNTED_TABLES.values()),
+                repo.rpc("admin_activity_stats"),
+            )
+            self.snapshot = {
+                **dict(zip(COUNTED_TABLES, counts)),
+                **(aggregates or {}),
+                "generated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.refreshed_at = time.monotonic()
+            return self.snapshot
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        # Only the first call (before the scheduler's first refresh) waits on the database
+        if self.snapshot is None:
+            return await self.refresh()
+        return self.snapshot
+
+admin_stats = AdminStats()
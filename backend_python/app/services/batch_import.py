@@ -0,0 +1,93 @@
+"""
+Parsing for bulk batch uploads: a JSON array, NDJSON (one object per line)
+or CSV with a ``blood_type,units,expiry_date`` header.
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.models.blood_bank_models import BloodBatchCreate
+from app.models.schemas import BloodType
+
+VALID_BLOOD_TYPES = {bt.value for bt in BloodType}
+
+
+class BatchImportError(ValueError):
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors
+
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> str:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    name = (filename or "").lower()
+    if content_type in ("text/csv", "application/csv") or name.endswith(".csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl") or name.endswith(
+        (".ndjson", ".jsonl")
+    ):
+        return "ndjson"
+    return "json"
+
+
+def _records(body: bytes, fmt: str) -> List[Tuple[int, Any]]:
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise BatchImportError([{"row": None, "error": f"Upload is not UTF-8 text (invalid byte at offset {e.start})"}])
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        try:
+            # Header is line 1, so data rows start at 2
+            return [(reader.line_num, {k.strip(): (v or "").strip() for k, v in row.items() if k}) for row in reader]
+        except csv.Error as e:
+            raise BatchImportError([{"row": reader.line_num, "error": f"Invalid CSV: {e}"}])
+    if fmt == "ndjson":
+        records = []
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            if line.strip():
+                try:
+                    records.append((line_no, json.loads(line)))
+                except json.JSONDecodeError as e:
+                    raise BatchImportError([{"row": line_no, "error": f"Invalid JSON: {e.msg}"}])
+        return records
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise BatchImportError([{"row": None, "error": f"Invalid JSON: {e.msg}"}])
+    if isinstance(data, dict):
+        data = data.get("batches")
+    if not isinstance(data, list):
+        raise BatchImportError([{"row": None, "error": "Expected a JSON array of batches"}])
+    return list(enumerate(data, start=1))
+
+
+def parse_batches(body: bytes, fmt: str, max_rows: int) -> List[BloodBatchCreate]:
+    """Validate every row up front; raises ``BatchImportError`` listing all bad rows."""
+    records = _records(body, fmt)
+    if not records:
+        raise BatchImportError([{"row": None, "error": "No batches in upload"}])
+    if len(records) > max_rows:
+        raise BatchImportError([{"row": None, "error": f"Too many batches (max {max_rows})"}])
+
+    batches, errors = [], []
+    for row, record in records:
+        try:
+            batch = BloodBatchCreate.model_validate(record)
+        except ValidationError as e:
+            errors.append({"row": row, "error": "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            )})
+            continue
+        if batch.blood_type not in VALID_BLOOD_TYPES:
+            errors.append({"row": row, "error": f"blood_type: invalid value {batch.blood_type!r}"})
+        elif batch.units <= 0:
+            errors.append({"row": row, "error": "units: must be positive"})
+        else:
+            batches.append(batch)
+    if errors:
+        raise BatchImportError(errors)
+    return batches
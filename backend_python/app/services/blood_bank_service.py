@@ -1,120 +1,195 @@
-from supabase import Client
 from typing import List, Optional
+from datetime import datetime
+from app.core.repository import Repository
+from app.core.pagination import PageParams, fetch_all, fetch_page
+from app.core.http_cache import response_cache
+from app.core.single_flight import inventory_reads
 from app.models.blood_bank_models import (
     BloodBankCreate, BloodBankUpdate, BloodInventoryUpdate, BloodBatchCreate
 )
+from app.services.location_service import blood_bank_locations
+from app.services.inventory_counters import inventory_counters
+from app.services.fefo_index import fefo_index
+from app.services.stock_search_cache import stock_search_cache
+from app.core.repository import RepositoryError
+
+
+def _inventory_changed(bank_id: int, blood_type: str, units: int) -> None:
+    """Record a bank's new unit count and drop every cached read that showed the old one."""
+    inventory_counters.set_units(bank_id, blood_type, units)
+    stock_search_cache.invalidate(blood_type)
+    inventory_reads.forget(bank_id)
+    response_cache.invalidate(f"inventory:{bank_id}")
+
 
 class BloodBankService:
-    def __init__(self, supabase_client: Client):
-        self.supabase = supabase_client
+    def __init__(self, repository: Repository):
+        self.repo = repository
 
     # --- Blood Bank Profile Management ---
 
-    def get_blood_banks(self, city: str = None, blood_type: str = None, min_units: int = 1):
-        if blood_type:
-            # Complex query: Find blood banks that have enough inventory of specific blood type
-            # This generally requires a join or two-step query in Supabase-py if relationships aren't perfect
-            # For simplicity, we'll fetch inventory separately or use a stored procedure if available.
-            # Here: Fetch inventory matching criteria, then fetch blood banks.
-            inventory = self.supabase.table("blood_inventory")\
-                .select("blood_bank_id")\
-                .eq("blood_type", blood_type)\
-                .gte("units", min_units)\
-                .execute()
-            
-            ids = [item['blood_bank_id'] for item in inventory.data]
-            if not ids:
-                return []
-            
-            query = self.supabase.table("blood_banks").select("*").in_("id", ids)
-            if city:
-                query = query.ilike("city", f"%{city}%")
-            return query.execute().data
-        
-        else:
-            query = self.supabase.table("blood_banks").select("*")
-            if city:
-                query = query.ilike("city", f"%{city}%")
-            return query.execute().data
-
-    def get_blood_bank_by_id(self, bank_id: int):
-        return self.supabase.table("blood_banks").select("*").eq("id", bank_id).single().execute().data
-
-    def get_blood_bank_by_user_id(self, user_id: str):
-        return self.supabase.table("blood_banks").select("*").eq("user_id", user_id).single().execute().data
-
-    def create_blood_bank(self, bank: BloodBankCreate, user_id: str):
+    async def get_blood_banks(self, page: PageParams, city: str = None):
+        filters = []
+        if city:
+            filters.append(("city", "ilike", f"%{city}%"))
+        return await fetch_page(self.repo, "blood_banks", page, filters=filters)
+
+    async def search_stock(self, blood_type: str, min_units: int = 1, city: str = None):
+        """
+        Banks holding at least ``min_units`` of ``blood_type`` with their unit count.
+        One joined query (search_blood_banks in supabase_schema.sql), cached per blood type.
+        """
+        city = city.strip() if city else None
+        params = {"p_blood_type": blood_type, "p_min_units": min_units, "p_city": city or None}
+        return await stock_search_cache.get_or_load(
+            blood_type,
+            (min_units, city.lower() if city else None),
+            lambda: self.repo.rpc("search_blood_banks", params),
+        )
+
+    async def get_nearby_blood_banks(self, lat: float, lng: float, k: int = 20, radius_km: Optional[float] = None):
+        return await blood_bank_locations.nearby(lat, lng, k, radius_km=radius_km)
+
+    async def get_blood_bank_by_id(self, bank_id: int):
+        return await self.repo.select_one("blood_banks", [("id", "eq", bank_id)])
+
+    async def get_blood_bank_by_user_id(self, user_id: str):
+        return await self.repo.select_one("blood_banks", [("user_id", "eq", user_id)])
+
+    async def create_blood_bank(self, bank: BloodBankCreate, user_id: str):
         data = bank.model_dump()
         data["user_id"] = user_id
-        return self.supabase.table("blood_banks").insert(data).execute().data[0]
+        new_bank = (await self.repo.insert("blood_banks", data))[0]
+        blood_bank_locations.upsert(new_bank)
+        inventory_counters.set_bank_city(new_bank["id"], new_bank.get("city"))
+        response_cache.invalidate("blood_banks")
+        return new_bank
 
-    def update_blood_bank(self, bank_id: int, update: BloodBankUpdate):
+    async def update_blood_bank(self, bank_id: int, update: BloodBankUpdate):
         data = update.model_dump(exclude_unset=True)
-        return self.supabase.table("blood_banks").update(data).eq("id", bank_id).execute().data[0]
+        updated = (await self.repo.update("blood_banks", data, [("id", "eq", bank_id)]))[0]
+        blood_bank_locations.upsert(updated)
+        inventory_counters.set_bank_city(updated["id"], updated.get("city"))
+        # Search results embed the bank profile, so every blood type may be stale
+        stock_search_cache.invalidate()
+        response_cache.invalidate("blood_banks", f"blood_bank:{bank_id}")
+        return updated
 
     # --- Inventory Management ---
 
-    def get_inventory(self, bank_id: int):
-        return self.supabase.table("blood_inventory").select("*").eq("blood_bank_id", bank_id).execute().data
-
-    def update_inventory(self, bank_id: int, inventory: BloodInventoryUpdate):
-        # Check if exists
-        existing = self.supabase.table("blood_inventory")\
-            .select("*")\
-            .eq("blood_bank_id", bank_id)\
-            .eq("blood_type", inventory.blood_type)\
-            .execute().data
-        
-        if existing:
-            # Update
-            return self.supabase.table("blood_inventory")\
-                .update({"units": inventory.units})\
-                .eq("id", existing[0]['id'])\
-                .execute().data[0]
-        else:
-            # Insert
-            return self.supabase.table("blood_inventory")\
-                .insert({
-                    "blood_bank_id": bank_id, 
-                    "blood_type": inventory.blood_type, 
-                    "units": inventory.units
-                })\
-                .execute().data[0]
+    async def get_inventory(self, bank_id: int):
+        # Concurrent reads of one bank's inventory share one query
+        return await inventory_reads.do(
+            bank_id, lambda: self.repo.select("blood_inventory", filters=[("blood_bank_id", "eq", bank_id)])
+        )
+
+    async def update_inventory(self, bank_id: int, inventory: BloodInventoryUpdate):
+        # Single round trip: insert or overwrite on the (blood_bank_id, blood_type) unique key
+        rows = await self.repo.upsert("blood_inventory", {
+            "blood_bank_id": bank_id,
+            "blood_type": inventory.blood_type,
+            "units": inventory.units,
+            "updated_at": datetime.utcnow().isoformat(),
+        }, on_conflict="blood_bank_id,blood_type")
+        _inventory_changed(bank_id, inventory.blood_type, inventory.units)
+        return rows[0]
                 
-    def get_total_inventory_stats(self):
-        # Implementation depends on aggregator availability or raw fetch
-        # Fetch all inventory and sum in python for MVP
-        data = self.supabase.table("blood_inventory").select("*").execute().data
-        stats = {}
-        for item in data:
-            btype = item['blood_type']
-            stats[btype] = stats.get(btype, 0) + item['units']
-        return stats
+    async def get_total_inventory_stats(self, city: str = None):
+        # Served from incrementally maintained counters; only the first call loads them
+        await inventory_counters.ensure_loaded()
+        return inventory_counters.totals(city)
 
     # --- Batch Management ---
     
-    def add_batch(self, bank_id: int, batch: BloodBatchCreate):
-        # Add batch
-        batch_data = batch.model_dump()
-        batch_data["blood_bank_id"] = bank_id
-        # Convert date to string for JSON serialization if necessary, though pydantic handles it usually
-        batch_data["expiry_date"] = batch.expiry_date.isoformat()
-        
-        new_batch = self.supabase.table("blood_batches").insert(batch_data).execute().data[0]
-        
-        # Auto-update summary inventory
-        current_inv = self.supabase.table("blood_inventory")\
-            .select("units")\
-            .eq("blood_bank_id", bank_id)\
-            .eq("blood_type", batch.blood_type)\
-            .execute().data
-            
-        current_units = current_inv[0]['units'] if current_inv else 0
-        new_units = current_units + batch.units
-        
-        self.update_inventory(bank_id, BloodInventoryUpdate(blood_type=batch.blood_type, units=new_units))
-        
-        return new_batch
-
-    def get_batches(self, bank_id: int):
-        return self.supabase.table("blood_batches").select("*").eq("blood_bank_id", bank_id).execute().data
+    async def add_batch(self, bank_id: int, batch: BloodBatchCreate):
+        result = await self.add_batches(bank_id, [batch])
+        return result["batches"][0]
+
+    async def add_batches(self, bank_id: int, batches: List[BloodBatchCreate]):
+        # One call inserts every batch and increments blood_inventory atomically
+        # (see ingest_blood_batches in supabase_schema.sql), so racing intakes never lose units
+        result = await self.repo.rpc("ingest_blood_batches", {
+            "p_blood_bank_id": bank_id,
+            "p_batches": [batch.model_dump(mode="json") for batch in batches],
+        })
+        for blood_type, units in result["inventory"].items():
+            _inventory_changed(bank_id, blood_type, units)
+        for new_batch in result["batches"]:
+            fefo_index.add(new_batch)
+        return {"inserted": len(result["batches"]), **result}
+
+    async def get_batches(self, bank_id: int):
+        return await self.repo.select("blood_batches", filters=[("blood_bank_id", "eq", bank_id)])
+
+    # --- FEFO Allocation ---
+
+    async def allocate_units(self, bank_id: int, blood_type: str, units: int):
+        """Draw units from the soonest-expiring batches of one bank."""
+        await fefo_index.ensure_loaded()
+        for attempt in range(2):
+            plan = fefo_index.plan(bank_id, blood_type, units)
+            if not plan:
+                break
+            # Read before the round trip: a reload meanwhile drops the batches this call empties
+            allocations = [
+                {"batch_id": batch_id, "units": take, "expiry_date": fefo_index.batches[batch_id].get("expiry_date")}
+                for batch_id, take in plan
+            ]
+            epoch = fefo_index.epoch
+            try:
+                result = await self.repo.rpc("consume_blood_batches", {
+                    "p_blood_bank_id": bank_id,
+                    "p_blood_type": blood_type,
+                    "p_allocations": [{"batch_id": batch_id, "units": take} for batch_id, take in plan],
+                })
+            except RepositoryError as e:
+                if "stale allocation" not in str(e) or attempt:
+                    raise
+                # Another worker consumed these batches first: reload this queue and replan once
+                fresh = await fetch_all(
+                    self.repo,
+                    "blood_batches",
+                    columns="id,blood_bank_id,blood_type,units,expiry_date",
+                    filters=[("blood_bank_id", "eq", bank_id), ("blood_type", "eq", blood_type), ("units", "gt", 0)],
+                )
+                fefo_index.replace_key(bank_id, blood_type, fresh)
+                continue
+            if fefo_index.epoch == epoch:
+                # Otherwise the index was rebuilt meanwhile, possibly already without these units
+                fefo_index.commit(plan)
+            _inventory_changed(bank_id, blood_type, result["units"])
+            allocated = sum(take for _, take in plan)
+            return {
+                "blood_type": blood_type,
+                "units_requested": units,
+                "units_allocated": allocated,
+                "shortfall": units - allocated,
+                "allocations": allocations,
+                "inventory_units": result["units"],
+            }
+        return {
+            "blood_type": blood_type,
+            "units_requested": units,
+            "units_allocated": 0,
+            "shortfall": units,
+            "allocations": [],
+            "inventory_units": inventory_counters.bank_totals(bank_id).get(blood_type, 0),
+        }
+
+    async def get_near_expiry(self, days: int, blood_type: str = None, limit: int = 100):
+        await fefo_index.ensure_loaded()
+        return fefo_index.near_expiry(days, blood_type=blood_type, limit=limit)
+
+    # --- Expiry ---
+
+    async def expire_batches(self):
+        """
+        Write off every batch past its expiry date and take its units out of
+        blood_inventory in one transaction (expire_blood_batches in supabase_schema.sql).
+        """
+        result = await self.repo.rpc("expire_blood_batches")
+        for batch_id in result["batches"]:
+            fefo_index.set_units(batch_id, 0)
+        for item in result["inventory"]:
+            _inventory_changed(item["blood_bank_id"], item["blood_type"], item["units"])
+        return {"expired_batches": len(result["batches"]), "expired_units": result["units"]}
@@ -0,0 +1,41 @@
+"""
+ABO/Rh compatibility between recipients and donors.
+
+Kept free of NumPy so request fan-out (request_events) can use it without
+pulling in the matching engine on a cold start.
+"""
+from typing import List, Optional
+
+BLOOD_TYPES = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+
+# Recipient -> donor types whose red cells it can receive
+RED_CELL_COMPATIBILITY = {
+    "O-": ["O-"],
+    "O+": ["O+", "O-"],
+    "A-": ["A-", "O-"],
+    "A+": ["A+", "A-", "O+", "O-"],
+    "B-": ["B-", "O-"],
+    "B+": ["B+", "B-", "O+", "O-"],
+    "AB-": ["AB-", "A-", "B-", "O-"],
+    "AB+": BLOOD_TYPES,
+}
+
+# Plasma flows the other way round: donor ABO -> recipient ABOs it can serve
+# (AB is the universal plasma donor; Rh does not matter)
+PLASMA_COMPATIBILITY = {
+    "O": ["O"],
+    "A": ["A", "O"],
+    "B": ["B", "O"],
+    "AB": ["AB", "A", "B", "O"],
+}
+PLASMA_COMPONENTS = {"plasma", "ffp", "fresh frozen plasma", "cryoprecipitate", "cryo"}
+
+
+def compatible_donor_types(recipient_type: str, component_type: Optional[str] = None) -> List[str]:
+    if recipient_type not in RED_CELL_COMPATIBILITY:
+        raise ValueError(f"Unknown blood type: {recipient_type}")
+    if component_type and component_type.strip().lower() in PLASMA_COMPONENTS:
+        recipient_abo = recipient_type.rstrip("+-")
+        donor_abos = {abo for abo, recipients in PLASMA_COMPATIBILITY.items() if recipient_abo in recipients}
+        return [bt for bt in BLOOD_TYPES if bt.rstrip("+-") in donor_abos]
+    return list(RED_CELL_COMPATIBILITY[recipient_type])
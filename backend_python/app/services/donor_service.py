@@ -1,5 +1,8 @@
-from app.core.database import get_supabase
+from app.core.database import get_repository
+from app.core.pagination import Page, PageParams, decode_cursor, encode_cursor
 from app.models import schemas
+from app.services.donor_registry import donor_registry
+from app.services.location_service import donor_locations
 from typing import List, Optional
 from fastapi import HTTPException
 import logging
@@ -8,67 +11,119 @@ logger = logging.getLogger(__name__)
 
 class DonorService:
     @staticmethod
-    async def get_donors(city: Optional[str] = None, blood_type: Optional[str] = None) -> List[schemas.Donor]:
-        supabase = get_supabase()
-        if not supabase:
-            return []
-        
-        query = supabase.table("donors").select("*")
-        if city:
-            query = query.eq("city", city)
-        if blood_type:
-            query = query.eq("blood_type", blood_type)
-        
+    async def get_donors(
+        page: PageParams,
+        city: Optional[str] = None,
+        blood_type: Optional[str] = None,
+        available: Optional[bool] = None,
+        eligible: Optional[bool] = None,
+    ) -> List[schemas.Donor]:
+        repo = get_repository()
+        if not repo:
+            return Page([])
+
+        # Blank query params mean "any", as before the registry
+        city, blood_type = city or None, blood_type or None
+        after_id = decode_cursor(page.cursor, False) if page.cursor else None
+        rows: List[dict] = []
         try:
-            response = query.execute()
-            return response.data
+            # The registry answers the filter in memory and only the candidates' rows are
+            # fetched, by primary key. It may lag other workers' writes, so every fetched row
+            # is checked again (and corrects the registry) and misses are made up for from
+            # the next candidates until the page plus one lookahead row is filled
+            await donor_registry.ensure_loaded()
+            while len(rows) <= page.limit:
+                wanted = page.limit + 1 - len(rows)
+                mask = donor_registry.mask(city=city, blood_type=blood_type, available=available, eligible=eligible)
+                ids = donor_registry.find(mask, after_id=after_id, limit=wanted)
+                if not ids:
+                    break
+                for row in await repo.select("donors", filters=[("id", "in", ids)], order="id"):
+                    donor_registry.upsert(row)
+                    if donor_registry.matches(row, city, blood_type, available, eligible):
+                        rows.append(row)
+                if len(ids) < wanted:
+                    break
+                after_id = ids[-1]
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching donors: {str(e)}")
             raise HTTPException(status_code=500, detail="Database query failed")
+        if len(rows) <= page.limit:
+            return Page(rows)
+        return Page(rows[:page.limit], encode_cursor(rows[page.limit - 1]["id"], False))
+
+    @staticmethod
+    async def get_nearby_donors(
+        lat: float,
+        lng: float,
+        k: int = 20,
+        radius_km: Optional[float] = None,
+        blood_type: Optional[str] = None,
+        available_only: bool = True,
+    ) -> List[dict]:
+        def matches(row: dict) -> bool:
+            if available_only and not row.get("available", True):
+                return False
+            return blood_type is None or row.get("blood_type") == blood_type
+
+        try:
+            return await donor_locations.nearby(lat, lng, k, radius_km=radius_km, predicate=matches)
+        except Exception as e:
+            logger.error(f"Error searching nearby donors: {str(e)}")
+            raise HTTPException(status_code=500, detail="Database query failed")
 
     @staticmethod
     async def create_donor(donor_data: schemas.DonorBase, user_id: int) -> schemas.Donor:
-        supabase = get_supabase()
-        if not supabase:
+        repo = get_repository()
+        if not repo:
             raise HTTPException(status_code=503, detail="Database unavailable")
             
-        data = donor_data.model_dump()
+        data = donor_data.model_dump(mode="json")
         data["user_id"] = user_id
         
         try:
-            response = supabase.table("donors").insert(data).execute()
-            if not response.data:
-                raise HTTPException(status_code=400, detail="Failed to create donor")
-            return response.data[0]
+            rows = await repo.insert("donors", data)
         except Exception as e:
             logger.error(f"Error creating donor: {str(e)}")
             raise HTTPException(status_code=500, detail="Database insert failed")
+        if not rows:
+            raise HTTPException(status_code=400, detail="Failed to create donor")
+        donor_locations.upsert(rows[0])
+        donor_registry.upsert(rows[0])
+        return rows[0]
 
     @staticmethod
     async def get_my_profile(user_id: int) -> Optional[schemas.Donor]:
-        supabase = get_supabase()
-        if not supabase:
+        repo = get_repository()
+        if not repo:
             return None
             
         try:
-            response = supabase.table("donors").select("*").eq("user_id", user_id).single().execute()
-            return response.data
+            return await repo.select_one("donors", [("user_id", "eq", user_id)])
         except Exception as e:
-             # Supabase single() raises error if no row found, catch it gracefully
+            logger.error(f"Error fetching donor profile: {str(e)}")
             return None
 
     @staticmethod
     async def update_status(donor_id: int, available: bool, user_id: int) -> schemas.Donor:
-        supabase = get_supabase()
-        if not supabase:
+        repo = get_repository()
+        if not repo:
              raise HTTPException(status_code=503, detail="Database unavailable")
             
         try:
             # Check ownership via user_id implicitly or RLS
-            response = supabase.table("donors").update({"available": available}).eq("id", donor_id).eq("user_id", user_id).execute()
-            if not response.data:
-                raise HTTPException(status_code=404, detail="Donor not found or unauthorized")
-            return response.data[0]
+            rows = await repo.update(
+                "donors",
+                {"available": available},
+                [("id", "eq", donor_id), ("user_id", "eq", user_id)],
+            )
         except Exception as e:
              logger.error(f"Error updating donor: {str(e)}")
              raise HTTPException(status_code=500, detail=str(e))
+        if not rows:
+            raise HTTPException(status_code=404, detail="Donor not found or unauthorized")
+        donor_locations.upsert(rows[0])
+        donor_registry.upsert(rows[0])
+        return rows[0]
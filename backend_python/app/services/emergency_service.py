@@ -1,5 +1,8 @@
-from app.core.database import get_supabase
+from app.core.database import get_repository
+from app.core.pagination import Page, PageParams, fetch_page
+from app.core.single_flight import request_reads
 from app.models import schemas
+from app.services.request_events import request_events
 from typing import List, Optional
 from datetime import datetime
 from fastapi import HTTPException
@@ -10,8 +13,8 @@ logger = logging.getLogger(__name__)
 class EmergencyService:
     @staticmethod
     async def create_request(request_data: schemas.BloodRequestBase, user_id: int) -> schemas.BloodRequest:
-        supabase = get_supabase()
-        if not supabase:
+        repo = get_repository()
+        if not repo:
              raise HTTPException(status_code=503, detail="Database unavailable")
 
         # In a real system, we'd lookup the hospital_id associated with this user_id
@@ -19,53 +22,62 @@ class EmergencyService:
         # We'll use a mock hospital ID or trust the input if we were admins
         
         # Override simple logic:
-        data = request_data.model_dump()
+        data = request_data.model_dump(mode="json")
         data["created_at"] = datetime.utcnow().isoformat()
         
         try:
-            response = supabase.table("blood_requests").insert(data).execute()
-            if not response.data:
-                raise HTTPException(status_code=400, detail="Failed to create request")
-            return response.data[0]
+            rows = await repo.insert("blood_requests", data)
         except Exception as e:
             logger.error(f"Error creating request: {str(e)}")
             raise HTTPException(status_code=500, detail="Database insert failed")
+        if not rows:
+            raise HTTPException(status_code=400, detail="Failed to create request")
+        request_events.publish("created", rows[0])
+        return rows[0]
 
     @staticmethod
-    async def get_requests(hospital_id: Optional[int] = None, status: Optional[str] = None) -> List[schemas.BloodRequest]:
-        supabase = get_supabase()
-        if not supabase:
-            return []
+    async def get_requests(
+        page: PageParams, hospital_id: Optional[int] = None, status: Optional[str] = None
+    ) -> List[schemas.BloodRequest]:
+        repo = get_repository()
+        if not repo:
+            return Page([])
             
-        query = supabase.table("blood_requests").select("*")
+        filters = []
         if hospital_id:
-            query = query.eq("hospital_id", hospital_id)
+            filters.append(("hospital_id", "eq", hospital_id))
         if status:
-            query = query.eq("status", status)
+            filters.append(("status", "eq", status))
             
         try:
-            response = query.order("created_at", desc=True).execute()
-            return response.data
+            # Newest first by identity id, which follows insertion order like created_at
+            # but walks the primary key index instead of sorting the table
+            return await fetch_page(repo, "blood_requests", page, filters=filters, desc=True)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error fetching requests: {str(e)}")
             raise HTTPException(status_code=500, detail="Database query failed")
 
     @staticmethod
     async def get_request_by_id(request_id: int) -> Optional[schemas.BloodRequest]:
-        supabase = get_supabase()
-        if not supabase:
+        repo = get_repository()
+        if not repo:
             return None
             
         try:
-            response = supabase.table("blood_requests").select("*").eq("id", request_id).single().execute()
-            return response.data
+            # Everyone watching the same request during a burst shares one query
+            return await request_reads.do(
+                request_id, lambda: repo.select_one("blood_requests", [("id", "eq", request_id)])
+            )
         except Exception as e:
+            logger.error(f"Error fetching request: {str(e)}")
             return None
 
     @staticmethod
     async def update_status(request_id: int, status: str) -> schemas.BloodRequest:
-        supabase = get_supabase()
-        if not supabase:
+        repo = get_repository()
+        if not repo:
              raise HTTPException(status_code=503, detail="Database unavailable")
             
         update_data = {"status": status}
@@ -73,10 +85,29 @@ class EmergencyService:
             update_data["fulfilled_at"] = datetime.utcnow().isoformat()
 
         try:
-            response = supabase.table("blood_requests").update(update_data).eq("id", request_id).execute()
-            if not response.data:
-                raise HTTPException(status_code=404, detail="Request not found")
-            return response.data[0]
+            rows = await repo.update("blood_requests", update_data, [("id", "eq", request_id)])
         except Exception as e:
             logger.error(f"Error updating request: {str(e)}")
             raise HTTPException(status_code=500, detail="Database update failed")
+        # Readers arriving from now on must not join a query that started before the update
+        request_reads.forget(request_id)
+        if not rows:
+            raise HTTPException(status_code=404, detail="Request not found")
+        request_events.publish("updated", rows[0])
+        return rows[0]
+
+    @staticmethod
+    async def escalate_pending(urgent_after_seconds: float, critical_after_seconds: float) -> List[schemas.BloodRequest]:
+        """Raise the urgency of requests left pending too long (escalate_pending_requests in supabase_schema.sql)."""
+        repo = get_repository()
+        if not repo:
+            return []
+
+        rows = await repo.rpc("escalate_pending_requests", {
+            "p_urgent_after_seconds": int(urgent_after_seconds),
+            "p_critical_after_seconds": int(critical_after_seconds),
+        })
+        for row in rows or []:
+            request_reads.forget(row["id"])
+            request_events.publish("escalated", row)
+        return rows or []
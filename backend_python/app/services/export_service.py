@@ -0,0 +1,74 @@
+"""
+Streaming exports of whole tables as NDJSON or CSV.
+
+Rows are read in keyset pages of ``EXPORT_BATCH_SIZE`` and each page is
+encoded and yielded before the next one is fetched, so a worker holds at
+most one page in memory and the first bytes reach the client while the
+rest of the table is still being read.
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+from app.core.config import settings
+from app.core.pagination import iter_pages
+from app.core.repository import Filter, Repository, Row
+
+# dataset -> (table, exported columns)
+EXPORTS: Dict[str, tuple] = {
+    "donors": ("donors", [
+        "id", "user_id", "name", "blood_type", "phone", "email", "city", "address",
+        "available", "last_donation", "latitude", "longitude", "created_at",
+    ]),
+    "hospitals": ("hospitals", [
+        "id", "user_id", "name", "address", "city", "phone", "email",
+        "latitude", "longitude", "emergency_contact", "verified", "created_at",
+    ]),
+    "blood_banks": ("blood_banks", [
+        "id", "user_id", "name", "address", "city", "phone", "email",
+        "latitude", "longitude", "operating_hours", "verified", "created_at",
+    ]),
+    "requests": ("blood_requests", [
+        "id", "hospital_id", "donor_id", "patient_name", "blood_type", "units", "component_type",
+        "urgency", "is_critical", "status", "contact_phone", "created_at", "fulfilled_at",
+    ]),
+    "users": ("users", ["id", "user_id", "email", "role", "created_at"]),
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def ndjson_chunks(pages: AsyncIterator[List[Row]]) -> AsyncIterator[bytes]:
+    async for rows in pages:
+        yield "".join(json.dumps(row, default=str, separators=(",", ":")) + "\n" for row in rows).encode()
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+async def csv_chunks(pages: AsyncIterator[List[Row]], columns: Sequence[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # The header goes out before the first page is read
+    yield buffer.getvalue().encode()
+    async for rows in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(row.get(column)) for column in columns] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+def export_stream(repo: Repository, dataset: str, fmt: str, filters: Sequence[Filter] = ()) -> AsyncIterator[bytes]:
+    table, columns = EXPORTS[dataset]
+    pages = iter_pages(repo, table, ",".join(columns), filters=filters, batch_size=settings.EXPORT_BATCH_SIZE)
+    if fmt == "csv":
+        return csv_chunks(pages, columns)
+    return ndjson_chunks(pages)
@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import get_repository
+from app.core.pagination import fetch_all
+
+logger = logging.getLogger(__name__)
+
+# Batches without an expiry date are used last and never reported as near expiry
+NO_EXPIRY = date.max.toordinal()
+
+def _expiry_ordinal(value: Any) -> int:
+    if not value:
+        return NO_EXPIRY
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.toordinal()
+
+class FefoIndex:
+    """
+    First-expired, first-out index over ``blood_batches`` with units left.
+
+    One min-heap of ``(expiry, batch_id, generation)`` per (bank, blood type)
+    drives allocation, and one heap across all banks drives near-expiry
+    queries. Every ``add`` gives the batch a new generation, so entries for
+    consumed or re-added batches are dropped lazily when they reach the top,
+    as are expired ones; every operation costs O(log n) per batch touched.
+
+    ``epoch`` counts rebuilds from the database. Changes made while a rebuild
+    is reading are replayed onto the new snapshot.
+    """
+
+    def __init__(self):
+        self.batches: Dict[Any, Dict[str, Any]] = {}
+        self.queues: Dict[Tuple[Any, str], List[Tuple[int, Any, int]]] = {}
+        self.by_expiry: List[Tuple[int, Any, int]] = []
+        # batch id -> generation of its current heap entries
+        self.generations: Dict[Any, int] = {}
+        self._next_generation = itertools.count()
+        self.epoch = 0
+        self.loaded_at: Optional[float] = None
+        # Changes seen while a reload is reading the database: (method, args)
+        self._pending: Optional[List[Tuple[str, tuple]]] = None
+        self._lock = asyncio.Lock()
+
+    def _is_live(self, entry: Tuple[int, Any, int]) -> bool:
+        return self.generations.get(entry[1]) == entry[2]
+
+    def _remove(self, batch_id: Any) -> None:
+        # Heap entries become stale and are skipped when they surface
+        self.batches.pop(batch_id, None)
+        self.generations.pop(batch_id, None)
+
+    def _record(self, method: str, *args: Any) -> None:
+        if self._pending is not None:
+            self._pending.append((method, args))
+
+    def add(self, batch: Dict[str, Any]) -> None:
+        if batch:
+            self._record("add", dict(batch))
+        self._add(batch)
+
+    def _add(self, batch: Dict[str, Any]) -> None:
+        if not batch or (batch.get("units") or 0) <= 0:
+            return
+        generation = next(self._next_generation)
+        entry = (_expiry_ordinal(batch.get("expiry_date")), batch["id"], generation)
+        self.batches[batch["id"]] = dict(batch)
+        self.generations[batch["id"]] = generation
+        heapq.heappush(self.queues.setdefault((batch["blood_bank_id"], batch["blood_type"]), []), entry)
+        heapq.heappush(self.by_expiry, entry)
+
+    def set_units(self, batch_id: Any, units: int) -> None:
+        # Absolute counts, so replaying onto a snapshot that already has them is harmless
+        self._record("set_units", batch_id, units)
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return
+        if units <= 0:
+            self._remove(batch_id)
+        else:
+            batch["units"] = units
+
+    def plan(self, bank_id: Any, blood_type: str, units: int, today: Optional[date] = None) -> List[Tuple[Any, int]]:
+        """
+        ``[(batch_id, units_to_take), ...]`` drawing from the soonest-expiring
+        unexpired batches. Does not change stock; see ``commit``.
+        """
+        today_ordinal = (today or date.today()).toordinal()
+        queue = self.queues.get((bank_id, blood_type), [])
+        taken, plan, remaining = [], [], units
+        while queue and remaining > 0:
+            entry = heapq.heappop(queue)
+            if not self._is_live(entry) or entry[0] < today_ordinal:
+                continue  # consumed, re-added or already expired
+            taken.append(entry)
+            take = min(remaining, self.batches[entry[1]]["units"])
+            plan.append((entry[1], take))
+            remaining -= take
+        for entry in taken:
+            heapq.heappush(queue, entry)
+        return plan
+
+    def commit(self, plan: List[Tuple[Any, int]]) -> None:
+        for batch_id, take in plan:
+            batch = self.batches.get(batch_id)
+            if batch is not None:
+                self.set_units(batch_id, batch["units"] - take)
+
+    def near_expiry(
+        self, days: int, today: Optional[date] = None, blood_type: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Unexpired batches expiring within ``days``, soonest first."""
+        today_ordinal = (today or date.today()).toordinal()
+        horizon = today_ordinal + days
+        popped, results = [], []
+        while self.by_expiry and self.by_expiry[0][0] <= horizon and len(results) < limit:
+            entry = heapq.heappop(self.by_expiry)
+            if not self._is_live(entry) or entry[0] < today_ordinal:
+                continue  # consumed, re-added or expired: dropped for good
+            popped.append(entry)
+            batch = self.batches[entry[1]]
+            if blood_type is None or batch["blood_type"] == blood_type:
+                results.append({**batch, "days_left": entry[0] - today_ordinal})
+        for entry in popped:
+            heapq.heappush(self.by_expiry, entry)
+        return results
+
+    def replace_key(self, bank_id: Any, blood_type: str, batches: List[Dict[str, Any]]) -> None:
+        """Reset one (bank, blood type) queue from fresh database rows."""
+        self._record("replace_key", bank_id, blood_type, [dict(batch) for batch in batches])
+        for batch_id in [i for i, b in self.batches.items() if b["blood_bank_id"] == bank_id and b["blood_type"] == blood_type]:
+            self._remove(batch_id)
+        self.queues.pop((bank_id, blood_type), None)
+        for batch in batches:
+            self._add(batch)
+
+    def _is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > settings.FEFO_REFRESH_SECONDS
+
+    async def ensure_loaded(self) -> None:
+        if self._is_stale():
+            await self.reload(force=False)
+
+    async def reload(self, force: bool = True) -> None:
+        """Rebuild from the database (the maintenance scheduler does this off the request path)."""
+        async with self._lock:
+            if not force and not self._is_stale():
+                return
+            repo = get_repository()
+            if not repo:
+                return
+            self._pending = []
+            try:
+                rows = await fetch_all(
+                    repo,
+                    "blood_batches",
+                    columns="id,blood_bank_id,blood_type,units,expiry_date",
+                    filters=[("units", "gt", 0)],
+                )
+            finally:
+                pending, self._pending = self._pending, None
+            fresh = FefoIndex()
+            for row in rows:
+                fresh._add(row)
+            for method, args in pending:
+                getattr(fresh, method)(*args)
+            self.epoch += 1
+            self.batches, self.queues, self.by_expiry = fresh.batches, fresh.queues, fresh.by_expiry
+            self.generations, self._next_generation = fresh.generations, fresh._next_generation
+            self.loaded_at = time.monotonic()
+
+fefo_index = FefoIndex()
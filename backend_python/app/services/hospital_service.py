@@ -1,35 +1,52 @@
-from supabase import Client
+from app.core.repository import Repository
+from app.core.pagination import PageParams, fetch_page
+from app.core.http_cache import response_cache
+from app.core.single_flight import hospital_reads
 from app.models.hospital_models import HospitalCreate, HospitalUpdate
+from app.services.location_service import hospital_locations
+from typing import Optional
 
 class HospitalService:
-    def __init__(self, supabase_client: Client):
-        self.supabase = supabase_client
+    def __init__(self, repository: Repository):
+        self.repo = repository
 
-    def get_hospitals(self, city: str = None, verified: bool = None):
-        query = self.supabase.table("hospitals").select("*")
+    async def get_hospitals(self, page: PageParams, city: str = None, verified: bool = None):
+        filters = []
         if city:
-            query = query.ilike("city", f"%{city}%")
+            filters.append(("city", "ilike", f"%{city}%"))
         if verified is not None:
-            query = query.eq("verified", verified)
+            filters.append(("verified", "eq", verified))
         
-        result = query.execute()
-        return result.data
+        return await fetch_page(self.repo, "hospitals", page, filters=filters)
 
-    def get_hospital_by_id(self, hospital_id: int):
-        result = self.supabase.table("hospitals").select("*").eq("id", hospital_id).single().execute()
-        return result.data
+    async def get_nearby_hospitals(self, lat: float, lng: float, k: int = 20, radius_km: Optional[float] = None,
+                                   verified: bool = None):
+        predicate = None
+        if verified is not None:
+            predicate = lambda row: bool(row.get("verified")) == verified
+        return await hospital_locations.nearby(lat, lng, k, radius_km=radius_km, predicate=predicate)
+
+    async def get_hospital_by_id(self, hospital_id: int):
+        # Concurrent lookups of the same hospital share one query
+        return await hospital_reads.do(
+            hospital_id, lambda: self.repo.select_one("hospitals", [("id", "eq", hospital_id)])
+        )
 
-    def get_hospital_by_user_id(self, user_id: str):
-        result = self.supabase.table("hospitals").select("*").eq("user_id", user_id).single().execute()
-        return result.data
+    async def get_hospital_by_user_id(self, user_id: str):
+        return await self.repo.select_one("hospitals", [("user_id", "eq", user_id)])
 
-    def create_hospital(self, hospital: HospitalCreate, user_id: str):
+    async def create_hospital(self, hospital: HospitalCreate, user_id: str):
         data = hospital.model_dump()
         data["user_id"] = user_id
-        result = self.supabase.table("hospitals").insert(data).execute()
-        return result.data[0]
+        rows = await self.repo.insert("hospitals", data)
+        hospital_locations.upsert(rows[0])
+        response_cache.invalidate("hospitals")
+        return rows[0]
 
-    def update_hospital(self, hospital_id: int, hospital_update: HospitalUpdate):
+    async def update_hospital(self, hospital_id: int, hospital_update: HospitalUpdate):
         data = hospital_update.model_dump(exclude_unset=True)
-        result = self.supabase.table("hospitals").update(data).eq("id", hospital_id).execute()
-        return result.data[0]
+        rows = await self.repo.update("hospitals", data, [("id", "eq", hospital_id)])
+        hospital_locations.upsert(rows[0])
+        hospital_reads.forget(hospital_id)
+        response_cache.invalidate("hospitals", f"hospital:{hospital_id}")
+        return rows[0]
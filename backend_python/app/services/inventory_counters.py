@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from app.core.database import get_repository
+from app.core.pagination import fetch_all
+
+logger = logging.getLogger(__name__)
+
+class InventoryCounters:
+    """
+    Running unit totals per blood type, per city and per bank.
+
+    Loaded once from ``blood_inventory``, then kept current by applying the
+    difference of every inventory write, so reads are O(1) and never touch
+    the database. A periodic reconciliation pass reloads from the database
+    to pick up writes made by other workers or outside the API.
+    """
+
+    def __init__(self):
+        self.by_bank: Dict[Any, Dict[str, int]] = {}
+        self.by_type: Dict[str, int] = {}
+        self.by_city: Dict[str, Dict[str, int]] = {}
+        self.bank_city: Dict[Any, str] = {}
+        self.loaded_at: Optional[float] = None
+        # Writes seen while a reconciliation is reading the database
+        self._pending: Optional[list] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _city_key(city: Optional[str]) -> str:
+        return (city or "").strip().lower()
+
+    def _apply(self, bank_id: Any, blood_type: str, delta: int) -> None:
+        if not delta:
+            return
+        self.by_type[blood_type] = self.by_type.get(blood_type, 0) + delta
+        city = self.bank_city.get(bank_id)
+        if city is not None:
+            city_totals = self.by_city.setdefault(city, {})
+            city_totals[blood_type] = city_totals.get(blood_type, 0) + delta
+
+    def set_units(self, bank_id: Any, blood_type: str, units: int) -> None:
+        """Record the new absolute unit count for one bank and blood type."""
+        if self._pending is not None:
+            self._pending.append((bank_id, blood_type, units))
+        bank = self.by_bank.setdefault(bank_id, {})
+        previous = bank.get(blood_type, 0)
+        bank[blood_type] = units
+        self._apply(bank_id, blood_type, units - previous)
+
+    def set_bank_city(self, bank_id: Any, city: Optional[str]) -> None:
+        """Attach a bank to a city (moves its existing units if the city changed)."""
+        new_city = self._city_key(city)
+        old_city = self.bank_city.get(bank_id)
+        if old_city == new_city:
+            return
+        units = self.by_bank.get(bank_id, {})
+        for blood_type, count in units.items():
+            self._apply(bank_id, blood_type, -count)
+        self.bank_city[bank_id] = new_city
+        for blood_type, count in units.items():
+            self._apply(bank_id, blood_type, count)
+
+    def totals(self, city: Optional[str] = None) -> Dict[str, int]:
+        if city is not None:
+            return dict(self.by_city.get(self._city_key(city), {}))
+        return dict(self.by_type)
+
+    def bank_totals(self, bank_id: Any) -> Dict[str, int]:
+        return dict(self.by_bank.get(bank_id, {}))
+
+    async def ensure_loaded(self) -> None:
+        if self.loaded_at is None:
+            await self.reconcile()
+
+    async def reconcile(self) -> None:
+        """Rebuild every counter from the database and swap them in at once."""
+        async with self._lock:
+            repo = get_repository()
+            if not repo:
+                return
+            self._pending = []
+            try:
+                banks = await fetch_all(repo, "blood_banks", columns="id,city")
+                inventory = await fetch_all(repo, "blood_inventory", columns="id,blood_bank_id,blood_type,units")
+            except Exception:
+                self._pending = None
+                raise
+
+            fresh = InventoryCounters()
+            for bank in banks:
+                fresh.bank_city[bank["id"]] = self._city_key(bank.get("city"))
+            for item in inventory:
+                fresh.set_units(item["blood_bank_id"], item["blood_type"], item["units"] or 0)
+            # Absolute values, so replaying writes the snapshot may already include is harmless
+            for bank_id, blood_type, units in self._pending:
+                fresh.set_units(bank_id, blood_type, units)
+            self._pending = None
+
+            if self.loaded_at is not None and fresh.by_type != self.by_type:
+                logger.info(f"Inventory counters drifted, reconciled {self.by_type} -> {fresh.by_type}")
+            self.by_bank, self.by_type = fresh.by_bank, fresh.by_type
+            self.by_city, self.bank_city = fresh.by_city, fresh.bank_city
+            self.loaded_at = time.monotonic()
+
+inventory_counters = InventoryCounters()
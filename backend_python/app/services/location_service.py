@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import get_repository
+from app.core.geo import SpatialIndex
+from app.core.pagination import fetch_all
+
+logger = logging.getLogger(__name__)
+
+class LocationIndex:
+    """
+    Spatial index over the latitude/longitude of one table.
+    Loaded from the database on first use, refreshed every
+    GEO_INDEX_REFRESH_SECONDS and kept current by the services' write paths.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.index = SpatialIndex(precision=settings.GEO_INDEX_PRECISION)
+        # Every row by id, including rows without coordinates
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        # Bumped on every change so derived snapshots know when to rebuild
+        self.version = 0
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > settings.GEO_INDEX_REFRESH_SECONDS
+
+    async def ensure_loaded(self) -> None:
+        if self._is_stale():
+            await self.reload(force=False)
+
+    async def reload(self, force: bool = True) -> None:
+        """Rebuild from the database (the maintenance scheduler does this off the request path)."""
+        async with self._lock:
+            if not force and not self._is_stale():
+                return
+            repo = get_repository()
+            if not repo:
+                return
+            rows = await fetch_all(repo, self.table)
+            index = SpatialIndex(precision=settings.GEO_INDEX_PRECISION)
+            for row in rows:
+                index.upsert(row["id"], row.get("latitude"), row.get("longitude"), row)
+            self.index = index
+            self.rows = {row["id"]: row for row in rows}
+            self.version += 1
+            self.loaded_at = time.monotonic()
+            logger.info(f"Loaded {len(index)} {self.table} locations into spatial index")
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        if row and "id" in row:
+            self.index.upsert(row["id"], row.get("latitude"), row.get("longitude"), row)
+            self.rows[row["id"]] = row
+            self.version += 1
+
+    def remove(self, row_id: Any) -> None:
+        self.index.remove(row_id)
+        self.rows.pop(row_id, None)
+        self.version += 1
+
+    async def nearby(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        radius_km: Optional[float] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to ``k`` rows nearest to (lat, lng), each with a ``distance_km`` field."""
+        await self.ensure_loaded()
+        hits = self.index.nearest(lat, lng, k, radius_km=radius_km, predicate=predicate)
+        return [{**row, "distance_km": round(distance, 3)} for distance, _, row in hits]
+
+donor_locations = LocationIndex("donors")
+hospital_locations = LocationIndex("hospitals")
+blood_bank_locations = LocationIndex("blood_banks")
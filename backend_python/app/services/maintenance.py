@@ -0,0 +1,85 @@
+"""
+Periodic maintenance, run by the scheduler the app lifespan starts.
+
+On the elected worker only (they write to the database):
+
+* ``expire_batches`` (``BATCH_EXPIRY_CRON``): write off batches past their
+  expiry date so they stop counting in ``blood_inventory``
+* ``escalate_requests`` (every ``REQUEST_ESCALATION_SECONDS``): raise the
+  urgency of requests left pending too long and alert on the result
+
+On every worker, for its own in-memory aggregates: admin stats, inventory
+counters, and the FEFO index, geo indexes and donor registry once something
+has loaded them. These run a little more often than the request-path
+staleness limits, so requests do not wait for a reload.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.core.database import get_repository
+from app.core.scheduler import Cron, Every, Job, Scheduler, create_leader_election
+from app.services.admin_stats import admin_stats
+from app.services.blood_bank_service import BloodBankService
+from app.services.donor_registry import donor_registry
+from app.services.emergency_service import EmergencyService
+from app.services.fefo_index import fefo_index
+from app.services.inventory_counters import inventory_counters
+from app.services.location_service import blood_bank_locations, donor_locations, hospital_locations
+
+logger = logging.getLogger(__name__)
+
+
+async def expire_batches() -> None:
+    repo = get_repository()
+    if not repo:
+        return
+    result = await BloodBankService(repo).expire_batches()
+    if result["expired_batches"]:
+        logger.info(f"Expired {result['expired_batches']} batches ({result['expired_units']} units)")
+
+
+async def escalate_requests() -> None:
+    escalated = await EmergencyService.escalate_pending(
+        settings.ESCALATE_TO_URGENT_MINUTES * 60, settings.ESCALATE_TO_CRITICAL_MINUTES * 60
+    )
+    if escalated:
+        logger.info(f"Escalated {len(escalated)} pending requests")
+
+
+async def refresh_fefo_index() -> None:
+    if fefo_index.loaded_at is not None:
+        await fefo_index.reload()
+
+
+async def refresh_donor_registry() -> None:
+    if donor_registry.loaded_at is not None:
+        await donor_registry.reload()
+
+
+async def refresh_geo_indexes() -> None:
+    loaded = [index for index in (donor_locations, hospital_locations, blood_bank_locations) if index.loaded_at]
+    await asyncio.gather(*(index.reload() for index in loaded))
+
+
+def _refresh(name: str, func: Callable[[], Awaitable[object]], seconds: float, run_at_start: bool = False) -> Job:
+    # Fires every 0.8-0.9 x seconds, before request paths see the data as stale
+    return Job(name, func, Every(seconds * 0.8), jitter=seconds * 0.1, leader=False, run_at_start=run_at_start)
+
+
+def create_scheduler() -> Scheduler:
+    scheduler = Scheduler(create_leader_election(settings.SCHEDULER_LEADER_ELECTION))
+    scheduler.add(Job("expire_batches", expire_batches, Cron(settings.BATCH_EXPIRY_CRON), jitter=30, run_at_start=True))
+    scheduler.add(Job(
+        "escalate_requests", escalate_requests, Every(settings.REQUEST_ESCALATION_SECONDS),
+        jitter=settings.REQUEST_ESCALATION_SECONDS * 0.1,
+    ))
+    scheduler.add(_refresh("admin_stats", admin_stats.refresh, settings.ADMIN_STATS_REFRESH_SECONDS, run_at_start=True))
+    scheduler.add(_refresh(
+        "inventory_counters", inventory_counters.reconcile, settings.INVENTORY_RECONCILE_SECONDS, run_at_start=True
+    ))
+    scheduler.add(_refresh("fefo_index", refresh_fefo_index, settings.FEFO_REFRESH_SECONDS))
+    scheduler.add(_refresh("geo_indexes", refresh_geo_indexes, settings.GEO_INDEX_REFRESH_SECONDS))
+    scheduler.add(_refresh("donor_registry", refresh_donor_registry, settings.DONOR_REGISTRY_REFRESH_SECONDS))
+    return scheduler
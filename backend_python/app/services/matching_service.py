@@ -0,0 +1,241 @@
+"""
+Matching engine: who can actually fill a blood request.
+
+Expands the request's blood type to every ABO/Rh-compatible donor type,
+filters available and eligible donors plus banks holding compatible stock,
+and ranks them with vectorized NumPy scoring on distance, stock and urgency.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.core.database import get_repository
+from app.core.geo import EARTH_RADIUS_KM
+from app.core.pagination import fetch_all
+from app.core.repository import RepositoryError
+from app.services.compatibility import compatible_donor_types
+from app.services.donor_registry import TYPE_CODES, DonorRegistry, donor_registry
+from app.services.location_service import blood_bank_locations, hospital_locations
+
+logger = logging.getLogger(__name__)
+
+# urgency -> (distance weight, secondary weight, distance scale in km)
+URGENCY_PROFILES = {
+    "critical": (0.8, 0.2, 5.0),
+    "urgent": (0.65, 0.35, 15.0),
+    "normal": (0.5, 0.5, 30.0),
+}
+
+
+def haversine_np(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    phi1 = np.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lngs - lng)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def _match_scores(type_codes: np.ndarray, recipient_type: str) -> np.ndarray:
+    # Exact matches first; universal O- donors are kept for when nothing else fits
+    scores = np.full(type_codes.shape, 0.7)
+    scores[type_codes == TYPE_CODES["O-"]] = 0.5
+    scores[type_codes == TYPE_CODES[recipient_type]] = 1.0
+    return scores
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if scores.size <= k:
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def rank_donors(
+    registry: DonorRegistry,
+    recipient_type: str,
+    component_type: Optional[str],
+    urgency: str,
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_km: float,
+    limit: int,
+    today: Optional[date] = None,
+) -> List[Tuple[int, float, float]]:
+    """Registry positions with (distance_km, score), best first."""
+    if len(registry) == 0:
+        return []
+    codes = np.array([TYPE_CODES[bt] for bt in compatible_donor_types(recipient_type, component_type)], np.int8)
+
+    mask = registry.available & np.isin(registry.type_codes, codes) & registry.eligible(today)
+    distance_weight, match_weight, scale = URGENCY_PROFILES.get(urgency, URGENCY_PROFILES["normal"])
+
+    if lat is not None and lng is not None:
+        distances = haversine_np(lat, lng, registry.lat, registry.lng)
+        # Donors without coordinates can still match, they just score no proximity
+        mask &= np.isnan(distances) | (distances <= radius_km)
+        proximity = np.where(np.isnan(distances), 0.0, np.exp(-np.nan_to_num(distances) / scale))
+    else:
+        distances = np.full(len(registry), np.nan)
+        proximity = np.zeros(len(registry))
+
+    candidates = np.flatnonzero(mask)
+    scores = distance_weight * proximity[candidates] + match_weight * _match_scores(
+        registry.type_codes[candidates], recipient_type
+    )
+    best = _top_k(scores, limit)
+    return [(int(candidates[j]), float(distances[candidates[j]]), float(scores[j])) for j in best]
+
+
+def rank_blood_banks(
+    banks: List[Dict[str, Any]],
+    units_by_bank: Dict[Any, Dict[str, int]],
+    recipient_type: str,
+    units_needed: int,
+    urgency: str,
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_km: float,
+    limit: int,
+) -> List[Tuple[int, float, float, int]]:
+    """Indices into ``banks`` with (distance_km, score, compatible units), best first."""
+    if not banks:
+        return []
+    n = len(banks)
+    units = np.fromiter((sum(units_by_bank.get(b["id"], {}).values()) for b in banks), np.float64, n)
+    exact = np.fromiter((units_by_bank.get(b["id"], {}).get(recipient_type, 0) for b in banks), np.float64, n)
+    lats = np.fromiter((np.nan if b.get("latitude") is None else b["latitude"] for b in banks), np.float64, n)
+    lngs = np.fromiter((np.nan if b.get("longitude") is None else b["longitude"] for b in banks), np.float64, n)
+    distance_weight, stock_weight, scale = URGENCY_PROFILES.get(urgency, URGENCY_PROFILES["normal"])
+
+    mask = units > 0
+    if lat is not None and lng is not None:
+        distances = haversine_np(lat, lng, lats, lngs)
+        mask &= np.isnan(distances) | (distances <= radius_km)
+        proximity = np.where(np.isnan(distances), 0.0, np.exp(-np.nan_to_num(distances) / scale))
+    else:
+        distances = np.full(n, np.nan)
+        proximity = np.zeros(n)
+
+    # Banks that can cover the whole request outrank partial stock; exact type preferred
+    coverage = np.minimum(units / max(units_needed, 1), 1.0)
+    exact_share = np.divide(exact, units, out=np.zeros(n), where=units > 0)
+    scores = distance_weight * proximity + stock_weight * (0.8 * coverage + 0.2 * exact_share)
+
+    candidates = np.flatnonzero(mask)
+    order = candidates[_top_k(scores[candidates], limit)]
+    return [(int(i), float(distances[i]), float(scores[i]), int(units[i])) for i in order]
+
+
+def _distance(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(value, 3)
+
+
+async def _donor_matches(repo, recipient_type, component_type, urgency, lat, lng, radius_km, limit) -> List[Dict[str, Any]]:
+    """
+    The best ``limit`` donors, ranked on the registry's columns with only their
+    profiles fetched, by primary key. The registry may lag other workers'
+    writes: a fetched row that no longer qualifies (or is gone) corrects it and
+    the next-ranked donors take its place.
+    """
+    compatible = set(compatible_donor_types(recipient_type, component_type))
+    accepted: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+    rejected = set()
+    while len(accepted) < limit:
+        ranked = rank_donors(
+            donor_registry, recipient_type, component_type, urgency, lat, lng, radius_km, limit + len(rejected)
+        )
+        ids = donor_registry.ids
+        pending = [
+            (donor_id, distance, score)
+            for donor_id, distance, score in ((int(ids[i]), distance, score) for i, distance, score in ranked)
+            if donor_id not in accepted and donor_id not in rejected
+        ]
+        if not pending:
+            break
+        rows = {row["id"]: row for row in await repo.select("donors", filters=[("id", "in", [p[0] for p in pending])])}
+        for donor_id, distance, score in pending:
+            row = rows.get(donor_id)
+            if row is not None:
+                donor_registry.upsert(row)
+            if row is None or row.get("blood_type") not in compatible or not DonorRegistry.matches(
+                row, available=True, eligible=True
+            ):
+                rejected.add(donor_id)
+                continue
+            accepted[donor_id] = (score, {**row, "distance_km": _distance(distance), "score": round(score, 4)})
+    best = sorted(accepted.values(), key=lambda match: match[0], reverse=True)[:limit]
+    return [donor for _, donor in best]
+
+
+class MatchingService:
+    @staticmethod
+    async def find_matches(
+        request_id: int,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        radius_km: float = 50,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        try:
+            return await MatchingService._find_matches(request_id, lat, lng, radius_km, limit)
+        except RepositoryError as e:
+            logger.error(f"Error matching request {request_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail="Database query failed")
+
+    @staticmethod
+    async def _find_matches(request_id, lat, lng, radius_km, limit) -> Dict[str, Any]:
+        repo = get_repository()
+        if not repo:
+            raise HTTPException(status_code=503, detail="Database unavailable")
+
+        request = await repo.select_one("blood_requests", [("id", "eq", request_id)])
+        if not request:
+            raise HTTPException(status_code=404, detail="Request not found")
+
+        recipient_type = request["blood_type"]
+        compatible = compatible_donor_types(recipient_type, request.get("component_type"))
+        urgency = "critical" if request.get("is_critical") else (request.get("urgency") or "normal")
+
+        if (lat is None or lng is None) and request.get("hospital_id"):
+            await hospital_locations.ensure_loaded()
+            hospital = hospital_locations.rows.get(request["hospital_id"]) or await repo.select_one(
+                "hospitals", [("id", "eq", request["hospital_id"])]
+            )
+            if hospital:
+                lat, lng = hospital.get("latitude"), hospital.get("longitude")
+
+        await donor_registry.ensure_loaded()
+        donors = await _donor_matches(
+            repo, recipient_type, request.get("component_type"), urgency, lat, lng, radius_km, limit
+        )
+
+        inventory = await fetch_all(
+            repo,
+            "blood_inventory",
+            columns="id,blood_bank_id,blood_type,units",
+            filters=[("blood_type", "in", compatible), ("units", "gt", 0)],
+        )
+        units_by_bank: Dict[Any, Dict[str, int]] = {}
+        for item in inventory:
+            units_by_bank.setdefault(item["blood_bank_id"], {})[item["blood_type"]] = item["units"]
+        await blood_bank_locations.ensure_loaded()
+        banks = [blood_bank_locations.rows[i] for i in units_by_bank if i in blood_bank_locations.rows]
+        blood_banks = [
+            {**banks[i], "units_available": units, "distance_km": _distance(distance), "score": round(score, 4)}
+            for i, distance, score, units in rank_blood_banks(
+                banks, units_by_bank, recipient_type, request.get("units") or 1, urgency, lat, lng, radius_km, limit
+            )
+        ]
+
+        return {
+            "request_id": request_id,
+            "blood_type": recipient_type,
+            "compatible_types": compatible,
+            "urgency": urgency,
+            "donors": donors,
+            "blood_banks": blood_banks,
+        }
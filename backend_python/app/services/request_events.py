@@ -0,0 +1,125 @@
+"""
+Real-time fan-out of blood request lifecycle events.
+
+Write paths call ``request_events.publish`` after a successful database
+write; that only puts the event on a bounded asyncio queue. A background
+consumer started in the app lifespan resolves the target rooms (the
+hospital's ``city_`` room and the geohash cells within ALERT_RADIUS_KM of the
+hospital, plain and for every compatible donor type) and emits to them, so
+socket fan-out never runs on the HTTP request path. Only requests whose
+hospital has no coordinates fall back to the nationwide ``type_`` rooms.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import get_repository
+from app.services.location_service import hospital_locations
+from app.services.compatibility import compatible_donor_types
+
+logger = logging.getLogger(__name__)
+
+# Lifecycle -> Socket.IO event names the frontend listens for
+STATUS_EVENTS = {
+    "fulfilled": "request-fulfilled",
+    "cancelled": "request-cancelled",
+}
+CREATED_EVENT = "new-request"
+UPDATED_EVENT = "request-updated"
+# Critical requests are also pushed to the floating alert overlay
+CRITICAL_EVENT = "emergency_broadcast"
+
+Emitter = Callable[[List[str], str, Dict[str, Any]], Awaitable[None]]
+
+
+def event_names(kind: str, request: Dict[str, Any]) -> List[str]:
+    critical = bool(request.get("is_critical") or request.get("urgency") == "critical")
+    if kind == "created":
+        return [CREATED_EVENT, CRITICAL_EVENT] if critical else [CREATED_EVENT]
+    if kind == "escalated":
+        # Raised by the escalation job: a request that became critical is alerted like a new one
+        return [UPDATED_EVENT, CRITICAL_EVENT] if critical else [UPDATED_EVENT]
+    return [STATUS_EVENTS.get(request.get("status"), UPDATED_EVENT)]
+
+
+def donor_types(request: Dict[str, Any]) -> List[str]:
+    try:
+        return compatible_donor_types(request.get("blood_type"), request.get("component_type"))
+    except ValueError:
+        return []
+
+
+async def _default_emit(rooms: List[str], event: str, data: Dict[str, Any]) -> None:
+    from app.core.socket import socket_manager
+    await socket_manager.emit_request_event(rooms, event, data)
+
+
+class RequestEventPipeline:
+    """Bounded queue of request events drained by one background consumer."""
+
+    def __init__(self, emit: Optional[Emitter] = None, maxsize: Optional[int] = None):
+        self.emit = emit or _default_emit
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize or settings.REQUEST_EVENT_QUEUE_SIZE)
+        self.dropped = 0
+
+    def publish(self, kind: str, request: Optional[Dict[str, Any]]) -> None:
+        """Queue ``created`` / ``updated`` / ``escalated`` for ``request``; never blocks the caller."""
+        if not request:
+            return
+        try:
+            self.queue.put_nowait((kind, dict(request)))
+        except asyncio.QueueFull:
+            # Keep the newest events: drop the oldest queued one
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.queue.put_nowait((kind, dict(request)))
+            self.dropped += 1
+            logger.warning(f"Request event queue full, dropped {self.dropped} events so far")
+
+    async def _hospital_of(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        hospital_id = request.get("hospital_id")
+        if not hospital_id:
+            return None
+        await hospital_locations.ensure_loaded()
+        hospital = hospital_locations.rows.get(hospital_id)
+        if hospital is None:
+            repo = get_repository()
+            if repo:
+                hospital = await repo.select_one(
+                    "hospitals", [("id", "eq", hospital_id)], columns="id,city,latitude,longitude"
+                )
+        return hospital
+
+    async def rooms_for(self, request: Dict[str, Any]) -> List[str]:
+        from app.core.socket import city_room, geo_rooms
+        types = donor_types(request)
+        hospital = await self._hospital_of(request)
+        if hospital and hospital.get("latitude") is not None and hospital.get("longitude") is not None:
+            # Everyone within the alert radius, across city lines; donors only if compatible
+            rooms = geo_rooms(hospital["latitude"], hospital["longitude"], settings.ALERT_RADIUS_KM, tuple(types))
+        else:
+            rooms = [f"type_{blood_type}" for blood_type in types]
+        if hospital and hospital.get("city"):
+            rooms.insert(0, city_room(hospital["city"]))
+        return rooms
+
+    async def dispatch(self, kind: str, request: Dict[str, Any]) -> None:
+        rooms = await self.rooms_for(request)
+        if not rooms:
+            return
+        for event in event_names(kind, request):
+            await self.emit(rooms, event, request)
+
+    async def run(self) -> None:
+        """Background consumer: emit queued events until cancelled."""
+        while True:
+            kind, request = await self.queue.get()
+            try:
+                await self.dispatch(kind, request)
+            except Exception as e:
+                logger.error(f"Failed to publish {kind} event for request {request.get('id')}: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+request_events = RequestEventPipeline()
@@ -0,0 +1,47 @@
+from typing import Any, Callable, Awaitable, Dict, Hashable, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+class StockSearchCache:
+    """
+    Read-through cache for blood bank stock searches, bucketed by blood type.
+
+    An inventory write for one type drops only that type's bucket. Each bucket
+    carries a generation number, so a search that was already in flight when
+    its bucket was invalidated does not store its (possibly stale) result.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or settings.STOCK_SEARCH_CACHE_MAX_ENTRIES
+        self.ttl = settings.STOCK_SEARCH_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.buckets: Dict[str, TTLCache] = {}
+        self.generations: Dict[str, int] = {}
+
+    def _bucket(self, blood_type: str) -> TTLCache:
+        bucket = self.buckets.get(blood_type)
+        if bucket is None:
+            bucket = self.buckets[blood_type] = TTLCache(max_entries=self.max_entries, ttl=self.ttl)
+        return bucket
+
+    async def get_or_load(self, blood_type: str, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        bucket = self._bucket(blood_type)
+        cached = bucket.get(key)
+        if cached is not None:
+            return cached
+        generation = self.generations.get(blood_type, 0)
+        value = await load()
+        if self.generations.get(blood_type, 0) == generation:
+            bucket.set(key, value)
+        return value
+
+    def invalidate(self, blood_type: Optional[str] = None) -> None:
+        """Drop one blood type's results, or every bucket when ``blood_type`` is None."""
+        types = [blood_type] if blood_type is not None else list(self.buckets)
+        for key in types:
+            self.generations[key] = self.generations.get(key, 0) + 1
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.clear()
+
+stock_search_cache = StockSearchCache()
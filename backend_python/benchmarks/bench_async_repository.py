@@ -0,0 +1,136 @@
+"""
+Blocking supabase client vs. async repository under concurrent load.
+
+Starts a local stand-in for PostgREST (uvicorn + Starlette, fixed injected
+latency per query) and fires N concurrent donor searches at it twice:
+
+  before  - the old code path: ``async def`` calling the synchronous
+            postgrest client's ``.execute()`` on the event loop
+  after   - ``DonorService.get_donors`` on the pooled ``PostgrestRepository``
+
+Latency is measured from the moment all requests are issued, so queueing
+behind a blocked event loop shows up in the percentiles.
+
+    cd backend_python
+    python -m benchmarks.bench_async_repository --concurrency 200 --latency-ms 20
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Never touch the real project from a benchmark
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+
+import uvicorn
+from postgrest import SyncPostgrestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.database import set_repository
+from app.core.pagination import PageParams
+from app.core.repository import PostgrestRepository
+from app.services.donor_service import DonorService
+
+ROWS = [
+    {"id": i, "name": f"Donor {i}", "blood_type": "O-", "phone": "000", "city": "Pune", "available": True}
+    for i in range(20)
+]
+
+
+def build_stand_in(latency: float) -> Starlette:
+    async def table(request):
+        await asyncio.sleep(latency)
+        return JSONResponse(ROWS)
+
+    return Starlette(routes=[Route("/rest/v1/{table}", table, methods=["GET"])])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_stand_in(port: int, latency: float) -> None:
+    uvicorn.run(build_stand_in(latency), host="127.0.0.1", port=port, log_level="error", backlog=4096)
+
+
+def start_stand_in(latency: float) -> str:
+    # Separate process so the stand-in never competes with the client for the GIL
+    port = free_port()
+    multiprocessing.Process(target=serve_stand_in, args=(port, latency), daemon=True).start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(label, call, concurrency):
+    start = time.perf_counter()
+    latencies = []
+
+    async def one():
+        await call()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(concurrency)))
+    total = time.perf_counter() - start
+    print(
+        f"{label:<8} p50={percentile(latencies, 50):8.1f}ms  p95={percentile(latencies, 95):8.1f}ms  "
+        f"p99={percentile(latencies, 99):8.1f}ms  wall={total * 1000:8.1f}ms"
+    )
+
+
+async def main(args):
+    url = start_stand_in(args.latency_ms / 1000)
+    headers = {"apikey": "bench", "Authorization": "Bearer bench"}
+
+    sync_client = SyncPostgrestClient(f"{url}/rest/v1", headers=headers)
+
+    async def blocking_call():
+        # What DonorService did before: sync .execute() inside async def
+        sync_client.from_("donors").select("*").eq("city", "Pune").execute()
+
+    repo = PostgrestRepository(url, "bench", max_connections=args.concurrency)
+    set_repository(repo)
+
+    async def async_call():
+        await DonorService.get_donors(PageParams(limit=len(ROWS), cursor=None), city="Pune")
+
+    # Warm both pools so connection setup is not part of the measurement
+    await blocking_call()
+    await async_call()
+
+    print(f"{args.concurrency} concurrent requests, {args.latency_ms}ms injected PostgREST latency")
+    for _ in range(args.rounds):
+        await run("before", blocking_call, args.concurrency)
+        await run("after", async_call, args.concurrency)
+
+    await repo.close()
+    sync_client.session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,160 @@
+"""
+Cold start of the Vercel entry point, with an import-time report and budget.
+
+Each run is a fresh interpreter that imports ``api/index.py`` exactly as the
+serverless function does, then serves the first emergency request
+(``GET /api/v1/emergency/``) on an in-memory repository. Reported: import
+time, first-request time and their sum (median of --runs), plus one
+``python -X importtime`` run broken down by top-level package and by the
+slowest ``app.*`` modules, so a new heavy import is easy to spot.
+
+--check compares the medians with benchmarks/cold_start_budget.json and exits 1
+if a budget is exceeded or a module listed under ``deferred_modules`` was
+imported before the first request. The budget is tracked with the code:
+tighten it when a change makes cold starts cheaper. Times are only comparable
+on similar machines; the deferred-module check holds everywhere.
+
+    cd backend_python
+    python -m benchmarks.bench_cold_start --check
+    python -m benchmarks.bench_cold_start --eager   # LAZY_ROUTERS=false, for comparison
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ENTRY_POINT = os.path.join(BACKEND, "..", "api", "index.py")
+BUDGET = os.path.join(os.path.dirname(__file__), "cold_start_budget.json")
+MARKER = "cold-start: imported"
+
+PROBE = """
+import asyncio, importlib.util, json, sys, time
+
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("vercel_entry", ENTRY_POINT)
+entry = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(entry)
+imported = time.perf_counter()
+print(MARKER, file=sys.stderr, flush=True)
+loaded = set(sys.modules)
+
+import httpx
+from app.core.database import set_repository
+from benchmarks.memory_repository import InMemoryRepository
+
+repo = InMemoryRepository()
+repo.seed("blood_requests", [{"hospital_id": 1, "patient_name": "P", "blood_type": "O-", "units": 2}])
+set_repository(repo)
+
+async def first_request():
+    transport = httpx.ASGITransport(app=entry.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://cold-start") as client:
+        begin = time.perf_counter()
+        response = await client.get("/api/v1/emergency/", headers={"Authorization": "Bearer cold-start"})
+        return time.perf_counter() - begin, response.status_code
+
+elapsed, status = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": elapsed * 1000,
+    "status": status,
+    "modules": sorted(loaded),
+}))
+"""
+
+
+def child_env(lazy: bool) -> dict:
+    env = dict(os.environ)
+    # Dev auth fallback and no real project: the probe measures our code, not the network
+    env.update(SUPABASE_URL="", SUPABASE_KEY="", ENVIRONMENT="development", METRICS_ENABLED="true")
+    env["LAZY_ROUTERS"] = "true" if lazy else "false"
+    env["PYTHONPATH"] = BACKEND + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def run_probe(lazy: bool, importtime: bool = False):
+    code = f"ENTRY_POINT = {os.path.abspath(ENTRY_POINT)!r}\nMARKER = {MARKER!r}\n" + PROBE
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    done = subprocess.run(command, cwd=BACKEND, env=child_env(lazy), capture_output=True, text=True)
+    if done.returncode != 0:
+        sys.exit(f"cold-start probe failed:\n{done.stderr[-4000:]}")
+    result = json.loads(done.stdout.strip().splitlines()[-1])
+    return result, done.stderr
+
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us) for every import before the entry point finished loading."""
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            break
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report_imports(rows, top: int):
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total = sum(by_package.values())
+    print(f"\nimport time by top-level package (self time, {total / 1000:.0f}ms total under -X importtime)")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<24} {self_us / 1000:8.1f}ms  {100 * self_us / total:5.1f}%")
+    print("slowest app modules (cumulative)")
+    for name, _, cumulative_us in sorted((r for r in rows if r[0].startswith("app")), key=lambda r: -r[2])[:top]:
+        print(f"  {name:<40} {cumulative_us / 1000:8.1f}ms")
+
+
+def check(medians, modules, budget) -> bool:
+    ok = True
+    for key in ("import_ms", "first_request_ms", "cold_start_ms"):
+        limit = budget.get(key)
+        if limit is not None and medians[key] > limit:
+            print(f"OVER BUDGET {key}: {medians[key]:.0f}ms > {limit}ms")
+            ok = False
+    for name in budget.get("deferred_modules", []):
+        if name in modules:
+            print(f"DEFERRED MODULE IMPORTED AT COLD START: {name}")
+            ok = False
+    return ok
+
+
+def main(args):
+    lazy = not args.eager
+    runs = [run_probe(lazy)[0] for _ in range(args.runs)]
+    if any(run["status"] != 200 for run in runs):
+        sys.exit(f"first request failed with status {runs[0]['status']}")
+    medians = {
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "first_request_ms": statistics.median(run["first_request_ms"] for run in runs),
+        "cold_start_ms": statistics.median(run["import_ms"] + run["first_request_ms"] for run in runs),
+    }
+    print(f"cold start, {'lazy' if lazy else 'eager'} routers, median of {args.runs} fresh interpreters")
+    for key, value in medians.items():
+        print(f"  {key:<18} {value:8.1f}")
+
+    _, stderr = run_probe(lazy, importtime=True)
+    report_imports(parse_importtime(stderr), args.top)
+
+    if args.check:
+        with open(BUDGET) as f:
+            budget = json.load(f)
+        if not check(medians, set(runs[0]["modules"]), budget):
+            sys.exit(1)
+        print("\nwithin cold-start budget")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--eager", action="store_true", help="import every router up front (LAZY_ROUTERS=false)")
+    parser.add_argument("--check", action="store_true", help="fail if over benchmarks/cold_start_budget.json")
+    main(parser.parse_args())
@@ -0,0 +1,111 @@
+"""
+Memory and filter latency of the columnar donor registry at a million donors.
+
+Builds a DonorRegistry over --donors synthetic donors and reports its memory,
+then times the /donors/ search filters (one page of --limit ids) against the
+same filter as a Python scan over row dicts, and incremental upserts:
+
+    cd backend_python
+    python -m benchmarks.bench_donor_registry --donors 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+
+from app.services.compatibility import BLOOD_TYPES
+from app.services.donor_registry import DONATION_INTERVAL_DAYS, DonorRegistry
+
+CITIES = [f"City {i}" for i in range(200)]
+
+FILTERS = {
+    "city": {"city": "City 7"},
+    "city+type": {"city": "City 7", "blood_type": "O-"},
+    "type+available+eligible": {"blood_type": "AB-", "available": True, "eligible": True},
+    "all four": {"city": "City 7", "blood_type": "O-", "available": True, "eligible": True},
+}
+
+
+def synthetic_donors(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    today = date.today()
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "blood_type": rng.choice(BLOOD_TYPES),
+            "city": rng.choice(CITIES),
+            "latitude": 19.0 + rng.uniform(-0.5, 0.5),
+            "longitude": 72.9 + rng.uniform(-0.5, 0.5),
+            "available": rng.random() < 0.8,
+            "last_donation": (today - timedelta(days=rng.randint(0, 365))).isoformat() if rng.random() < 0.5 else None,
+        }
+
+
+def row_scan(rows, limit, city=None, blood_type=None, available=None, eligible=None):
+    cutoff = (date.today() - timedelta(days=DONATION_INTERVAL_DAYS)).isoformat()
+    found = []
+    for row in rows:
+        if city is not None and row["city"] != city:
+            continue
+        if blood_type is not None and row["blood_type"] != blood_type:
+            continue
+        if available is not None and row["available"] != available:
+            continue
+        if eligible is not None and (row["last_donation"] is None or row["last_donation"] <= cutoff) != eligible:
+            continue
+        found.append(row["id"])
+        if len(found) == limit:
+            break
+    return found
+
+
+def timed(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[-1]
+
+
+def main(args):
+    rows = list(synthetic_donors(args.donors))
+    start = time.perf_counter()
+    registry = DonorRegistry.from_rows(rows)
+    print(f"build registry for {args.donors} donors: {(time.perf_counter() - start) * 1000:.0f}ms, "
+          f"{registry.nbytes / 2 ** 20:.1f} MB ({registry.nbytes / args.donors:.0f} bytes per donor)")
+
+    print(f"{'filter':<26} {'registry p50':>13} {'max':>9} {'row scan p50':>13} {'matches':>9}")
+    for name, criteria in FILTERS.items():
+        registry_p50, registry_max = timed(
+            lambda: registry.find(registry.mask(**criteria), limit=args.limit), args.iterations
+        )
+        # Deep pages: the scan has to walk the rows before the cursor too
+        scan_p50, _ = timed(lambda: row_scan(rows, None, **criteria), max(1, args.iterations // 10))
+        matches = int(registry.mask(**criteria).sum())
+        print(f"{name:<26} {registry_p50:11.2f}ms {registry_max:7.2f}ms {scan_p50:11.2f}ms {matches:>9}")
+
+    new = list(synthetic_donors(args.upserts, seed=2))
+    start = time.perf_counter()
+    for i, row in enumerate(new):
+        registry.upsert({**row, "id": args.donors + i + 1})
+    for row in rows[:args.upserts]:
+        registry.upsert({"id": row["id"], "available": not row["available"]})
+    elapsed = (time.perf_counter() - start) * 1e6 / (2 * args.upserts)
+    print(f"upsert (append + update): {elapsed:.1f}us each, {registry.nbytes / 2 ** 20:.1f} MB after growth")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--donors", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=51, help="ids per page (page size + 1)")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--upserts", type=int, default=10000)
+    main(parser.parse_args())
@@ -0,0 +1,58 @@
+"""
+Ranking cost of the matching engine over a synthetic donor registry.
+
+    cd backend_python
+    python -m benchmarks.bench_matching --donors 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+
+from app.services.donor_registry import DonorRegistry
+from app.services.matching_service import BLOOD_TYPES, rank_donors
+
+
+def synthetic_donors(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    today = date.today()
+    return [
+        {
+            "id": i,
+            "blood_type": rng.choice(BLOOD_TYPES),
+            "latitude": 19.0 + rng.uniform(-0.5, 0.5),
+            "longitude": 72.9 + rng.uniform(-0.5, 0.5),
+            "available": rng.random() < 0.8,
+            "last_donation": (today - timedelta(days=rng.randint(0, 365))).isoformat() if rng.random() < 0.5 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def main(args):
+    rows = synthetic_donors(args.donors)
+    start = time.perf_counter()
+    registry = DonorRegistry.from_rows(rows)
+    print(f"build registry for {args.donors} donors: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for urgency in ("critical", "urgent", "normal"):
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            rank_donors(registry, "A+", "Whole Blood", urgency, 19.05, 72.88, 50, 20)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"rank {urgency:<8} median={timings[len(timings) // 2]:.2f}ms  max={timings[-1]:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--donors", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,112 @@
+"""
+PostgREST over HTTP vs. direct Postgres with prepared statements.
+
+Runs the repository calls the services make most (donor lookup by id, a
+keyset donor page, a status count, the stock-search and admin-stats RPCs)
+against the same database through both backends and prints per-call latency:
+
+  postgrest  - ``PostgrestRepository`` on the Supabase REST API
+  postgres   - ``PostgresRepository`` on an asyncpg pool (DATABASE_URL)
+
+Read-only, so it is safe to point at a seeded staging project. Use the direct
+connection (port 5432) for the DSN; the transaction pooler needs
+``--statement-cache 0``, which turns prepared-statement reuse off.
+
+    cd backend_python
+    python -m benchmarks.bench_postgres_repository \\
+        --postgrest-url https://<ref>.supabase.co --key <service key> \\
+        --dsn postgresql://postgres:<password>@db.<ref>.supabase.co:5432/postgres
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Never touch the real project from a benchmark
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+
+from app.core.postgres_repository import PostgresRepository
+from app.core.repository import PostgrestRepository
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def operations(donor_id, city):
+    return {
+        "donor_by_id": lambda repo: repo.select_one("donors", [("id", "eq", donor_id)]),
+        "donor_page": lambda repo: repo.select(
+            "donors", filters=[("city", "eq", city), ("id", "gt", 0)], order="id", limit=50,
+        ),
+        "pending_count": lambda repo: repo.count("blood_requests", [("status", "eq", "pending")]),
+        "stock_search": lambda repo: repo.rpc(
+            "search_blood_banks", {"p_blood_type": "O-", "p_min_units": 1, "p_city": city},
+        ),
+        "admin_stats": lambda repo: repo.rpc("admin_activity_stats"),
+    }
+
+
+async def measure(repo, call, requests, concurrency):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            await call(repo)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, requests / (time.perf_counter() - start)
+
+
+async def main(args):
+    backends = {
+        "postgrest": PostgrestRepository(args.postgrest_url, args.key, max_connections=args.concurrency),
+        "postgres": PostgresRepository(
+            args.dsn, min_size=args.concurrency, max_size=args.concurrency,
+            statement_cache_size=args.statement_cache,
+        ),
+    }
+    first = await backends["postgres"].select_one("donors", [("id", "gt", 0)], columns="id,city")
+    if first is None:
+        sys.exit("No donors in the target database; seed it first")
+    ops = operations(first["id"], first["city"])
+
+    print(f"{args.requests} calls per operation, {args.concurrency} concurrent")
+    print(f"{'operation':<14} {'backend':<10} {'p50':>9} {'p95':>9} {'p99':>9} {'calls/s':>9}")
+    for name, call in ops.items():
+        if args.only and name not in args.only:
+            continue
+        for label, repo in backends.items():
+            # Warm the pool, the prepared statement and the column-type cache
+            for _ in range(args.concurrency):
+                await call(repo)
+            latencies, throughput = await measure(repo, call, args.requests, args.concurrency)
+            print(
+                f"{name:<14} {label:<10} {percentile(latencies, 50):7.2f}ms {percentile(latencies, 95):7.2f}ms "
+                f"{percentile(latencies, 99):7.2f}ms {throughput:9.0f}"
+            )
+
+    for repo in backends.values():
+        await repo.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--postgrest-url", default=os.getenv("BENCH_SUPABASE_URL"), required=not os.getenv("BENCH_SUPABASE_URL"))
+    parser.add_argument("--key", default=os.getenv("BENCH_SUPABASE_KEY"), required=not os.getenv("BENCH_SUPABASE_KEY"))
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL"), required=not os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--statement-cache", type=int, default=1024)
+    parser.add_argument("--only", nargs="*", help="operation names to run")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+"""
+Serialization cost of the large list endpoints (GET /donors, GET /requests).
+
+For --rows database-shaped rows per endpoint, times producing the response
+body four ways:
+
+  fastapi   - the default path: validate against response_model,
+              jsonable_encoder, stdlib json (what the endpoints did before)
+  validate  - prebuilt TypeAdapter, validate + dump_json in pydantic-core
+  trusted   - project rows onto the model's fields, encode with orjson
+  +gzip     - trusted plus compression, as sent to clients above
+              RESPONSE_COMPRESS_MIN_BYTES
+
+    cd backend_python
+    python -m benchmarks.bench_serialization --rows 200 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.serialization import compress, encode_body
+from app.models import schemas
+
+BLOOD_TYPES = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+CITIES = ["Pune", "Mumbai", "Delhi", "Chennai"]
+
+
+def donor_rows(n):
+    return [
+        {
+            "id": i, "user_id": f"5f0c6b9e-0000-4000-8000-{i:012d}", "name": f"Donor {i}",
+            "blood_type": BLOOD_TYPES[i % 8], "phone": f"98{i:08d}", "email": f"donor{i}@example.com",
+            "city": CITIES[i % 4], "address": f"{i} MG Road", "available": i % 3 != 0,
+            "latitude": 18.5 + i * 1e-5, "longitude": 73.8 + i * 1e-5,
+            "last_donation": "2024-01-15", "created_at": "2024-01-01T10:00:00+00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def request_rows(n):
+    return [
+        {
+            "id": i, "hospital_id": i % 50, "patient_name": f"Patient {i}", "age": 20 + i % 60,
+            "gender": "F" if i % 2 else "M", "blood_type": BLOOD_TYPES[i % 8], "units": 1 + i % 4,
+            "component_type": "Whole Blood", "urgency": ["normal", "urgent", "critical"][i % 3],
+            "is_critical": i % 3 == 2, "diagnosis": "Trauma", "doctor_name": "Dr. Rao",
+            "status": "pending", "contact_phone": "020-1234567", "hospital_name": f"Hospital {i % 50}",
+            "created_at": "2024-01-01T10:00:00+00:00",
+        }
+        for i in range(n)
+    ]
+
+
+ENDPOINTS = {
+    "GET /donors": (List[schemas.Donor], donor_rows),
+    "GET /requests": (List[schemas.BloodRequest], request_rows),
+}
+
+
+def fastapi_default(model, rows):
+    field = create_response_field(name="response", type_=model)
+    content = asyncio.run(serialize_response(field=field, response_content=rows))
+    return JSONResponse(content).body
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        body = fn()
+        samples.append(time.perf_counter() - began)
+    return statistics.median(samples) * 1000, len(body)
+
+
+def main(args):
+    for name, (model, make_rows) in ENDPOINTS.items():
+        for n in args.rows:
+            rows = make_rows(n)
+            trusted = encode_body(rows, model, mode="trusted")
+            variants = {
+                "fastapi": lambda: fastapi_default(model, rows),
+                "validate": lambda: encode_body(rows, model, mode="validate"),
+                "trusted": lambda: encode_body(rows, model, mode="trusted"),
+                "+gzip": lambda: compress(encode_body(rows, model, mode="trusted"), "gzip"),
+            }
+            print(f"{name}  rows={n}  ({len(trusted) / 1024:.0f} KiB uncompressed)")
+            baseline = None
+            for label, fn in variants.items():
+                ms, size = timed(fn, args.repeat)
+                baseline = baseline or ms
+                print(f"  {label:<9} {ms:8.2f}ms  {baseline / ms:5.1f}x  {size / 1024:7.0f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[200, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""
+Database queries per burst on the hot read paths, with and without single-flight.
+
+Fires --burst simultaneous identical requests at each of
+GET /hospitals/{id}, /blood-banks/{id}/inventory and /emergency/{id}
+(the real app in-process on an InMemoryRepository with --latency-ms per round
+trip, response cache emptied before every burst) and reports how many
+queries reached the database and the burst's latency percentiles:
+
+  off  - every request runs its own query (the old behaviour)
+  on   - concurrent identical reads share one in-flight query
+
+    cd backend_python
+    python -m benchmarks.bench_single_flight --burst 2000 --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+os.environ["ENVIRONMENT"] = "development"
+
+import httpx
+
+from app.core import single_flight
+from app.core.config import settings
+from app.core.database import set_repository
+from app.core.http_cache import response_cache
+from app.main import app
+from benchmarks.memory_repository import InMemoryRepository
+
+FLIGHTS = (single_flight.hospital_reads, single_flight.inventory_reads, single_flight.request_reads)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def burst(client, repo, path, size):
+    response_cache.clear()
+    queries = repo.calls
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        response = await client.get(path, headers={"Authorization": "Bearer bench"})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(size)))
+    return repo.calls - queries, latencies, (time.perf_counter() - start) * 1000
+
+
+async def main(args):
+    repo = InMemoryRepository(latency=args.latency_ms / 1000, max_connections=args.pool)
+    hospital = repo.seed("hospitals", [{"name": "City Hospital", "city": "Pune"}])[0]
+    bank = repo.seed("blood_banks", [{"name": "Central Bank", "city": "Pune"}])[0]
+    repo.seed("blood_inventory", [{"blood_bank_id": bank["id"], "blood_type": t, "units": 5} for t in ("O-", "A+")])
+    request = repo.seed("blood_requests", [{"hospital_id": hospital["id"], "blood_type": "O-", "units": 2}])[0]
+    set_repository(repo)
+
+    api = settings.API_V1_STR
+    paths = {
+        "hospital": f"{api}/hospitals/{hospital['id']}",
+        "inventory": f"{api}/blood-banks/{bank['id']}/inventory",
+        "request": f"{api}/emergency/{request['id']}",
+    }
+    print(f"bursts of {args.burst} identical requests, {args.latency_ms}ms per database round trip")
+    print(f"{'path':<10} {'single-flight':<14} {'queries':>8} {'p50':>9} {'p95':>9} {'wall':>9}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name, path in paths.items():
+            for enabled in (False, True):
+                for flight in FLIGHTS:
+                    flight.enabled = enabled
+                await burst(client, repo, path, 10)
+                queries, latencies, wall = await burst(client, repo, path, args.burst)
+                print(
+                    f"{name:<10} {'on' if enabled else 'off':<14} {queries:>8} {percentile(latencies, 50):7.1f}ms "
+                    f"{percentile(latencies, 95):7.1f}ms {wall:7.1f}ms"
+                )
+    for flight in FLIGHTS:
+        print(f"{flight.name:<10} {flight.snapshot()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--burst", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--pool", type=int, default=20, help="simulated database connections")
+    asyncio.run(main(parser.parse_args()))
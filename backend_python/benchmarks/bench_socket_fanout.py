@@ -0,0 +1,108 @@
+"""
+Fan-out throughput of Socket.IO room emits across workers on the local backplane.
+
+Each worker process runs an AsyncServer on LocalPubSubManager with --clients
+members in one city room. Worker 0 emits --events alerts to the room and
+every worker counts the packets it would write to its sockets, so the figures
+cover the backplane, room lookup and packet encoding but not the network.
+
+    cd backend_python
+    python -m benchmarks.bench_socket_fanout --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+
+import socketio
+
+from app.core.socket_backplane import LocalPubSubManager
+
+ROOM = "city_Pune"
+
+
+class CountingServer(socketio.AsyncServer):
+    """Counts outgoing Engine.IO packets instead of writing them to sockets."""
+
+    def __init__(self, expected, **kwargs):
+        super().__init__(async_mode="asgi", **kwargs)
+        self.sent = 0
+        self.expected = expected
+        self.done = asyncio.Event()
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        eio_pkt.encode()
+        self.sent += 1
+        if self.sent >= self.expected:
+            self.done.set()
+
+
+async def run_worker(index, directory, clients, events, ready, start, results):
+    manager = LocalPubSubManager(directory)
+    server = CountingServer(clients * events, client_manager=manager)
+    for c in range(clients):
+        sid = await manager.connect(f"eio-{index}-{c}", "/")
+        await manager.enter_room(sid, "/", ROOM)
+    server.manager_initialized = True
+    manager.initialize()
+    await asyncio.sleep(0.2)  # let the listener bind its socket
+    ready.set()
+
+    await asyncio.get_running_loop().run_in_executor(None, start.wait)
+    began = time.perf_counter()
+    if index == 0:
+        for n in range(events):
+            await server.emit("emergency-alert", {"request_id": n, "blood_type": "O-", "city": "Pune"}, room=ROOM)
+    await server.done.wait()
+    results.put((index, time.perf_counter() - began))
+    await manager.close()
+
+
+def worker_main(*args):
+    asyncio.run(run_worker(*args))
+
+
+def measure(workers, clients, events):
+    ctx = multiprocessing.get_context("spawn")
+    directory = tempfile.mkdtemp(prefix="bench-sio-")
+    readies = [ctx.Event() for _ in range(workers)]
+    start, results = ctx.Event(), ctx.Queue()
+    procs = [
+        ctx.Process(target=worker_main, args=(i, directory, clients, events, readies[i], start, results))
+        for i in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for ready in readies:
+        ready.wait()
+    start.set()
+    elapsed = max(results.get(timeout=120)[1] for _ in procs)
+    for proc in procs:
+        proc.join()
+    return elapsed
+
+
+def main(args):
+    print(f"{args.events} emits to a room with {args.clients} clients per worker")
+    for workers in args.workers:
+        elapsed = measure(workers, args.clients, args.events)
+        deliveries = workers * args.clients * args.events
+        print(
+            f"workers={workers:<2} {elapsed * 1000:8.1f}ms  "
+            f"{args.events / elapsed:9.0f} emits/s  {deliveries / elapsed:10.0f} deliveries/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--events", type=int, default=2000)
+    main(parser.parse_args())
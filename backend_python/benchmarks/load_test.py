@@ -0,0 +1,401 @@
+"""
+Load test of every router in app/api/api.py plus Socket.IO fan-out, with regression gates.
+
+The real FastAPI app runs in-process (httpx ASGITransport, lifespan started)
+on an InMemoryRepository seeded by benchmarks.seed, with --latency-ms of
+injected database latency per round trip, and a FakeSupabase behind
+get_supabase() so tokens go through the normal verification path. Each
+scenario is driven by --clients concurrent clients for --rounds rounds of
+--requests requests and reported as throughput and p50/p95/p99 latency (best
+round per metric). Socket fan-out creates critical requests while
+--socket-clients fake clients sit in city, blood type and geohash rooms, and
+times each event from the POST to the last packet.
+
+--check compares the run with benchmarks/baselines.json and exits 1 if any
+scenario's p95 or throughput is worse by more than --tolerance (or it saw
+errors); --save-baselines records the run as the new baseline. Baselines are
+only comparable on the machine and settings that recorded them.
+
+    cd backend_python
+    python -m benchmarks.load_test --save-baselines
+    python -m benchmarks.load_test --check
+    python -m benchmarks.load_test --only donors emergency --clients 100
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["SUPABASE_URL"] = ""
+os.environ["SUPABASE_KEY"] = ""
+os.environ["JWT_SECRET"] = "benchmark-secret"
+os.environ["AUTH_VERIFY_MODE"] = "local"
+os.environ["ENVIRONMENT"] = "benchmark"
+# Measure the endpoints, not the shedding: run with ADMISSION_ENABLED=true to include it
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_PER_SECOND", "0")
+os.environ.setdefault("RATE_LIMIT_CRITICAL_PER_SECOND", "0")
+
+import httpx
+
+from app.core import database
+from app.core.config import settings
+from app.core.socket import city_room, geo_room, sio
+from app.main import app, fastapi_app
+from app.services.request_events import request_events
+from benchmarks.memory_repository import FakeSupabase, InMemoryRepository, mint_token
+from benchmarks.seed import BLOOD_TYPES, Dataset, Scale, seed
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+API = settings.API_V1_STR
+
+# (method, path, keyword arguments for httpx)
+Call = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class Result:
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+class Tokens:
+    def __init__(self, data: Dataset, count: int = 50):
+        secret = settings.JWT_SECRET
+        self.admin = mint_token(secret, "00000000-0000-4000-8000-000000000001", role="admin")
+        # Index i signs in as the owner of donor_ids[i] / bank_ids[i]
+        self.donors = [mint_token(secret, user_id, role="donor") for user_id in data.donor_user_ids[:count]]
+        self.banks = [mint_token(secret, user_id, role="blood_bank") for user_id in data.bank_user_ids[:count]]
+
+
+def bearer(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def build_scenarios(data: Dataset, tokens: Tokens) -> Dict[str, Dict[str, Callable[[random.Random], Call]]]:
+    """router -> scenario -> factory of one randomized call."""
+    cities = list(data.cities)
+    admin = {"headers": bearer(tokens.admin)}
+
+    def point(rng):
+        lat, lng = data.cities[rng.choice(cities)]
+        return {"lat": lat + rng.uniform(-0.1, 0.1), "lng": lng + rng.uniform(-0.1, 0.1)}
+
+    def donor(rng):
+        i = rng.randrange(len(tokens.donors))
+        return data.donor_ids[i], {"headers": bearer(tokens.donors[i])}
+
+    def bank_user(rng):
+        return {"headers": bearer(rng.choice(tokens.banks))}
+
+    def new_request(rng):
+        urgency = rng.choice(["normal", "urgent", "critical"])
+        return {
+            "hospital_id": rng.choice(data.hospital_ids), "patient_name": "Load Test", "age": 40,
+            "blood_type": rng.choice(BLOOD_TYPES), "units": rng.randrange(1, 4),
+            "urgency": urgency, "is_critical": urgency == "critical",
+        }
+
+    return {
+        "auth": {
+            "auth_me": lambda rng: ("GET", "/auth/me", admin),
+            "auth_login": lambda rng: (
+                "POST", "/auth/login", {"json": {"email": f"user{rng.randrange(1000)}@example.com", "password": "x"}}
+            ),
+        },
+        "donors": {
+            "donors_search": lambda rng: ("GET", "/donors/", {
+                **admin, "params": {"city": rng.choice(cities), "blood_type": rng.choice(BLOOD_TYPES)},
+            }),
+            "donors_nearby": lambda rng: ("GET", "/donors/nearby", {**admin, "params": {**point(rng), "radius_km": 25}}),
+            "donors_me": lambda rng: ("GET", "/donors/me", donor(rng)[1]),
+            "donors_status": lambda rng: (lambda d: (
+                "PATCH", f"/donors/{d[0]}/status", {**d[1], "params": {"available": rng.random() < 0.7}}
+            ))(donor(rng)),
+        },
+        "emergency": {
+            "requests_list": lambda rng: ("GET", "/emergency/", {**admin, "params": {"status": "pending"}}),
+            "request_get": lambda rng: ("GET", f"/emergency/{rng.choice(data.request_ids)}", admin),
+            "request_matches": lambda rng: ("GET", f"/emergency/{rng.choice(data.request_ids)}/matches", admin),
+            "request_create": lambda rng: ("POST", "/emergency/", {**admin, "json": new_request(rng)}),
+            "request_status": lambda rng: (
+                "PATCH", f"/emergency/{rng.choice(data.request_ids)}/status",
+                {**admin, "params": {"status_update": rng.choice(["pending", "fulfilled", "cancelled"])}},
+            ),
+        },
+        "hospitals": {
+            "hospitals_list": lambda rng: ("GET", "/hospitals/", {"params": {"city": rng.choice(cities)}}),
+            "hospital_get": lambda rng: ("GET", f"/hospitals/{rng.choice(data.hospital_ids)}", {}),
+            "hospitals_nearby": lambda rng: ("GET", "/hospitals/nearby", {"params": point(rng)}),
+        },
+        "blood_banks": {
+            "banks_list": lambda rng: ("GET", "/blood-banks/", {"params": {"city": rng.choice(cities)}}),
+            "bank_get": lambda rng: ("GET", f"/blood-banks/{rng.choice(data.bank_ids)}", {}),
+            "bank_inventory": lambda rng: ("GET", f"/blood-banks/{rng.choice(data.bank_ids)}/inventory", {}),
+            "banks_search": lambda rng: (
+                "GET", f"/blood-banks/search/{rng.choice(BLOOD_TYPES)}", {"params": {"city": rng.choice(cities)}}
+            ),
+            "banks_nearby": lambda rng: ("GET", "/blood-banks/nearby", {"params": point(rng)}),
+            "inventory_total": lambda rng: ("GET", "/blood-banks/inventory/total", {"params": {"city": rng.choice(cities)}}),
+            "near_expiry": lambda rng: ("GET", "/blood-banks/inventory/near-expiry", {**admin, "params": {"days": 7}}),
+            "inventory_allocate": lambda rng: ("POST", "/blood-banks/inventory/allocate", {
+                **bank_user(rng), "json": {"blood_type": rng.choice(BLOOD_TYPES), "units": rng.randrange(1, 4)},
+            }),
+        },
+        "admin": {
+            "admin_stats": lambda rng: ("GET", "/admin/stats", admin),
+            "admin_users": lambda rng: ("GET", "/admin/users", admin),
+            "admin_export": lambda rng: (
+                "GET", "/admin/export/donors", {**admin, "params": {"format": "ndjson", "city": rng.choice(cities)}}
+            ),
+        },
+    }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: List[float], errors: int, wall: float) -> Result:
+    return Result(
+        requests=len(latencies), errors=errors, rps=round(len(latencies) / wall, 1),
+        p50_ms=round(percentile(latencies, 50), 2), p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+    )
+
+
+class PacketCounter:
+    """Stands in for the Engine.IO transport of the fake clients: encodes and counts packets."""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def __call__(self, eio_sid, eio_pkt):
+        eio_pkt.encode()
+        self.sent += 1
+
+
+packets = PacketCounter()
+
+
+async def settle() -> None:
+    """Let background fan-out from the previous scenario finish so it does not bleed into the next."""
+    await request_events.queue.join()
+    quiet_for = settings.SOCKET_COALESCE_WINDOW_MS / 1000 + 0.1
+    while True:
+        sent = packets.sent
+        await asyncio.sleep(quiet_for)
+        if packets.sent == sent and request_events.queue.empty():
+            return
+
+
+async def drive(
+    client: httpx.AsyncClient, make: Callable[[random.Random], Call], clients: int, total: int, warmup: int, seed: int
+) -> Result:
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        method, path, kwargs = make(rng)
+        await client.request(method, API + path, **kwargs)
+    await settle()
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker(n: int):
+        nonlocal remaining, errors
+        rng = random.Random(seed * 1000 + n)
+        while remaining > 0:
+            remaining -= 1
+            method, path, kwargs = make(rng)
+            began = time.perf_counter()
+            response = await client.request(method, API + path, **kwargs)
+            await response.aread()
+            latencies.append((time.perf_counter() - began) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(clients)))
+    result = summarize(latencies, errors, time.perf_counter() - began)
+    await settle()
+    return result
+
+
+async def join_socket_clients(data: Dataset, count: int, rng: random.Random) -> None:
+    """Fake connected clients in the rooms the frontend joins (city, blood type, geohash cell)."""
+    cities = list(data.cities)
+    for n in range(count):
+        sid = await sio.manager.connect(f"bench-{n}", "/")
+        city = rng.choice(cities)
+        lat, lng = data.cities[city]
+        for room in (city_room(city), f"type_{rng.choice(BLOOD_TYPES)}",
+                     geo_room(lat + rng.uniform(-0.15, 0.15), lng + rng.uniform(-0.15, 0.15))):
+            await sio.manager.enter_room(sid, "/", room)
+
+
+async def socket_fanout(client: httpx.AsyncClient, data: Dataset, tokens: Tokens, clients: int, events: int) -> Result:
+    """Critical requests created over HTTP, timed until their new-request emit reached every room member."""
+    started: Dict[str, float] = {}
+    latencies: List[float] = []
+    emit = sio.emit
+
+    async def timed_emit(event, data=None, *args, **kwargs):
+        await emit(event, data, *args, **kwargs)
+        if event == "new-request" and data and data.get("patient_name") in started:
+            latencies.append((time.perf_counter() - started.pop(data["patient_name"])) * 1000)
+
+    sio.emit = timed_emit
+    try:
+        rng = random.Random(7)
+        remaining = events
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                tag = f"fanout-{remaining}"
+                started[tag] = time.perf_counter()
+                await client.post(API + "/emergency/", headers=bearer(tokens.admin), json={
+                    "hospital_id": rng.choice(data.hospital_ids), "patient_name": tag,
+                    "blood_type": rng.choice(BLOOD_TYPES), "units": 2, "urgency": "critical", "is_critical": True,
+                })
+
+        began = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        await request_events.queue.join()
+        return summarize(latencies, len(started), time.perf_counter() - began)
+    finally:
+        sio.emit = emit
+
+
+def best_of(rounds: List[Result]) -> Result:
+    """Best round per metric, so one GC pause or noisy neighbour does not fail the gate."""
+    fastest = min(rounds, key=lambda r: r.p95_ms)
+    return Result(
+        requests=sum(r.requests for r in rounds), errors=sum(r.errors for r in rounds),
+        rps=max(r.rps for r in rounds), p50_ms=min(r.p50_ms for r in rounds),
+        p95_ms=fastest.p95_ms, p99_ms=min(r.p99_ms for r in rounds),
+    )
+
+
+def config_of(args) -> Dict[str, Any]:
+    return {
+        "latency_ms": args.latency_ms, "clients": args.clients, "requests": args.requests,
+        "rounds": args.rounds, "warmup": args.warmup,
+        "socket_clients": args.socket_clients, "scale": asdict(args.scale),
+    }
+
+
+def compare(
+    results: Dict[str, Result], baselines: Dict[str, Dict[str, float]], tolerance: float, slack_ms: float
+) -> List[str]:
+    """
+    Human-readable regressions of ``results`` against ``baselines``. A p95 has
+    to be worse by both ``tolerance`` and ``slack_ms`` to count, so sub-millisecond
+    scenarios do not fail on scheduler jitter.
+    """
+    failures = []
+    for name, result in results.items():
+        if result.errors:
+            failures.append(f"{name}: {result.errors} failed requests")
+        base = baselines.get(name)
+        if not base:
+            continue
+        if result.p95_ms > max(base["p95_ms"] * (1 + tolerance), base["p95_ms"] + slack_ms):
+            failures.append(f"{name}: p95 {result.p95_ms}ms vs baseline {base['p95_ms']}ms")
+        if result.rps < base["rps"] * (1 - tolerance):
+            failures.append(f"{name}: {result.rps} req/s vs baseline {base['rps']} req/s")
+    return failures
+
+
+async def main(args) -> int:
+    repo = InMemoryRepository(latency=args.latency_ms / 1000, jitter=args.latency_ms / 4000)
+    data = seed(repo, args.scale)
+    tokens = Tokens(data)
+    database.set_repository(repo)
+    database.supabase = FakeSupabase(settings.JWT_SECRET)
+    await join_socket_clients(data, args.socket_clients, random.Random(1))
+    sio._send_eio_packet = packets
+    # The seeded tables are long-lived: keep them out of every GC pass during the run
+    gc.collect()
+    gc.freeze()
+
+    results: Dict[str, Result] = {}
+    print(f"{args.clients} clients x {args.requests} requests per scenario, {args.latency_ms}ms database latency")
+    print(f"{'scenario':<20}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}  errors")
+    async with fastapi_app.router.lifespan_context(fastapi_app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for router, scenarios in build_scenarios(data, tokens).items():
+                if args.only and router not in args.only:
+                    continue
+                for name, make in scenarios.items():
+                    rounds = [
+                        await drive(client, make, args.clients, args.requests, args.warmup, args.seed + n)
+                        for n in range(args.rounds)
+                    ]
+                    results[name] = best_of(rounds)
+                    report(name, results[name])
+            if not args.only or "socket" in args.only:
+                sent = packets.sent
+                results["socket_fanout"] = await socket_fanout(client, data, tokens, args.clients, args.socket_events)
+                report("socket_fanout", results["socket_fanout"])
+                print(f"{'':<20}{packets.sent - sent} packets to {args.socket_clients} clients")
+
+    if args.save_baselines:
+        with open(BASELINES, "w") as f:
+            json.dump({"config": config_of(args), "scenarios": {k: asdict(v) for k, v in results.items()}}, f, indent=2)
+            f.write("\n")
+        print(f"Baselines written to {BASELINES}")
+    if args.check:
+        with open(BASELINES) as f:
+            stored = json.load(f)
+        if stored.get("config") != config_of(args):
+            print("Baselines were recorded with different settings; rerun with --save-baselines")
+            return 2
+        failures = compare(results, stored["scenarios"], args.tolerance, args.slack_ms)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+def report(name: str, result: Result) -> None:
+    print(f"{name:<20}{result.rps:>9.1f}{result.p50_ms:>8.1f}ms{result.p95_ms:>7.1f}ms{result.p99_ms:>7.1f}ms  {result.errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario and round")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds per scenario; the best one is reported")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--socket-clients", type=int, default=2000)
+    parser.add_argument("--socket-events", type=int, default=200)
+    parser.add_argument("--donors", type=int, default=Scale.donors)
+    parser.add_argument("--requests-seeded", type=int, default=Scale.requests)
+    parser.add_argument("--only", nargs="+", help="routers to run: auth donors emergency hospitals blood_banks admin socket")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the stored baselines")
+    parser.add_argument("--save-baselines", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative regression")
+    parser.add_argument("--slack-ms", type=float, default=5, help="allowed absolute p95 regression")
+    args = parser.parse_args()
+    args.scale = Scale(donors=args.donors, requests=args.requests_seeded)
+    sys.exit(asyncio.run(main(args)))
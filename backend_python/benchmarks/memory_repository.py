@@ -0,0 +1,429 @@
+"""
+In-memory stand-in for Supabase used by the benchmark suite.
+
+``InMemoryRepository`` implements the ``Repository`` interface over Python
+dicts with PostgREST's filter semantics, the schema's column defaults and the
+database functions in supabase_schema.sql, and sleeps ``latency`` (+/-
+``jitter``) seconds per round trip behind a pool of ``max_connections``, so
+the app sees network-shaped waits without a network. ``max_rows`` caps every
+select like PostgREST's db-max-rows setting. ``FakeSupabase`` stands
+in for the supabase client behind ``get_supabase()`` (Auth calls only).
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import time
+import uuid
+from itertools import islice
+from datetime import date, datetime, timezone
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from app.core.repository import OPERATORS, Filter, Repository, RepositoryError, Row
+
+# Column defaults from supabase_schema.sql (created_at/updated_at are filled in on insert)
+DEFAULTS = {
+    "users": {"role": "user"},
+    "donors": {"available": True},
+    "hospitals": {"verified": False},
+    "blood_banks": {"verified": False},
+    "blood_inventory": {"units": 0},
+    "blood_batches": {"expired_units": 0},
+    "blood_requests": {
+        "units": 1, "component_type": "Whole Blood", "urgency": "normal",
+        "is_critical": False, "status": "pending",
+    },
+    "donations": {"units": 1},
+}
+TIMESTAMPS = {"blood_inventory": "updated_at", "donations": "donation_date"}
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _jsonify(row: Row) -> Row:
+    # Rows come back the way PostgREST would return them: plain JSON values
+    return {key: _json_value(value) for key, value in row.items()}
+
+
+def _pattern(value: str, flags: int = 0) -> "re.Pattern":
+    parts = (".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in value)
+    return re.compile("".join(parts) + r"\Z", flags | re.DOTALL)
+
+
+def _matches(row: Row, column: str, op: str, value: Any) -> bool:
+    actual = row.get(column)
+    if op == "is":
+        return actual is {"null": None, "true": True, "false": False}.get(str(value).lower(), value)
+    if op == "in":
+        return actual in {_json_value(v) for v in value}
+    if actual is None:
+        return False
+    value = _json_value(value)
+    try:
+        if op == "eq":
+            return actual == value
+        if op == "neq":
+            return actual != value
+        if op == "gt":
+            return actual > value
+        if op == "gte":
+            return actual >= value
+        if op == "lt":
+            return actual < value
+        if op == "lte":
+            return actual <= value
+        if op == "like":
+            return _pattern(value).match(str(actual)) is not None
+        if op == "ilike":
+            return _pattern(value, re.IGNORECASE).match(str(actual)) is not None
+    except TypeError:
+        return False
+    raise RepositoryError(f"Unsupported filter operator: {op}", status_code=400)
+
+
+class InMemoryRepository(Repository):
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        max_connections: int = 100,
+        rng: Optional[random.Random] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.max_rows = max_rows
+        self.jitter = jitter
+        self.pool = asyncio.Semaphore(max_connections)
+        self.rng = rng or random.Random(0)
+        self.tables: Dict[str, Dict[int, Row]] = {}
+        self.next_id: Dict[str, int] = {}
+        # (table, column) -> value -> ids, built on first eq/in filter and kept current
+        self.indexes: Dict[tuple, Dict[Any, Set[int]]] = {}
+        self.calls = 0
+
+    async def _round_trip(self) -> None:
+        self.calls += 1
+        delay = self.latency
+        if self.jitter:
+            delay = max(0.0, delay + self.rng.uniform(-self.jitter, self.jitter))
+        async with self.pool:
+            await asyncio.sleep(delay)
+
+    # --- storage ---
+
+    def _table(self, table: str) -> Dict[int, Row]:
+        return self.tables.setdefault(table, {})
+
+    def _index(self, table: str, column: str) -> Dict[Any, Set[int]]:
+        index = self.indexes.get((table, column))
+        if index is None:
+            index = {}
+            for row_id, row in self._table(table).items():
+                index.setdefault(row.get(column), set()).add(row_id)
+            self.indexes[(table, column)] = index
+        return index
+
+    def _reindex(self, table: str, row: Row, old: Optional[Row] = None) -> None:
+        for (indexed_table, column), index in self.indexes.items():
+            if indexed_table != table:
+                continue
+            if old is not None:
+                index.get(old.get(column), set()).discard(old["id"])
+            if row is not None:
+                index.setdefault(row.get(column), set()).add(row["id"])
+
+    def _store(self, table: str, data: Row) -> Row:
+        rows = self._table(table)
+        row = {**DEFAULTS.get(table, {}), **_jsonify(data)}
+        if row.get("id") is None:
+            row["id"] = self.next_id.get(table, 1)
+        self.next_id[table] = max(self.next_id.get(table, 1), row["id"] + 1)
+        row.setdefault(TIMESTAMPS.get(table, "created_at"), datetime.now(timezone.utc).isoformat())
+        old = rows.get(row["id"])
+        rows[row["id"]] = row
+        self._reindex(table, row, old)
+        return row
+
+    def _find(
+        self, table: str, filters: Sequence[Filter], by_id_desc: bool = False, limit: Optional[int] = None
+    ) -> List[Row]:
+        """Matching rows in id order, using the equality indexes (eq and in); stops after ``limit``."""
+        for _, op, _ in filters:
+            if op not in OPERATORS:
+                raise RepositoryError(f"Unsupported filter operator: {op}", status_code=400)
+        rows = self._table(table)
+        ids = None
+        for column, op, value in filters:
+            if op == "eq":
+                hit = self._index(table, column).get(_json_value(value), set())
+                ids = set(hit) if ids is None else ids & hit
+            elif op == "in":
+                index = self._index(table, column)
+                hit = set().union(*(index.get(_json_value(v), set()) for v in value))
+                ids = hit if ids is None else ids & hit
+        if ids is None:
+            # Ids are assigned in increasing order, so the dict is already sorted by id
+            candidates: Iterable[Row] = reversed(rows.values()) if by_id_desc else rows.values()
+        else:
+            candidates = (rows[i] for i in sorted(ids, reverse=by_id_desc))
+        matches = (row for row in candidates if all(_matches(row, c, op, v) for c, op, v in filters))
+        return list(islice(matches, limit))
+
+    @staticmethod
+    def _project(row: Row, columns: str) -> Row:
+        if columns.strip() == "*":
+            return dict(row)
+        return {column: row.get(column) for column in (c.strip() for c in columns.split(","))}
+
+    def seed(self, table: str, rows: Iterable[Row]) -> List[Row]:
+        """Load rows without simulated latency."""
+        return [dict(self._store(table, row)) for row in rows]
+
+    # --- Repository ---
+
+    async def select(self, table, columns="*", filters=(), order=None, desc=False, limit=None):
+        await self._round_trip()
+        if self.max_rows is not None:
+            limit = self.max_rows if limit is None else min(limit, self.max_rows)
+        if order in (None, "id"):
+            rows = self._find(table, filters, by_id_desc=desc and order == "id", limit=limit)
+        else:
+            rows = self._find(table, filters)
+            rows.sort(key=lambda row: (row.get(order) is None, row.get(order)), reverse=desc)
+            rows = rows[:limit]
+        return [self._project(row, columns) for row in rows]
+
+    async def insert(self, table, data):
+        await self._round_trip()
+        return [dict(self._store(table, row)) for row in (data if isinstance(data, list) else [data])]
+
+    async def upsert(self, table, data, on_conflict):
+        await self._round_trip()
+        keys = [column.strip() for column in on_conflict.split(",")]
+        stored = []
+        for row in data if isinstance(data, list) else [data]:
+            row = _jsonify(row)
+            existing = self._find(table, [(key, "eq", row.get(key)) for key in keys])
+            if existing:
+                row = {**existing[0], **row, "id": existing[0]["id"]}
+            stored.append(dict(self._store(table, row)))
+        return stored
+
+    async def update(self, table, values, filters):
+        await self._round_trip()
+        return [dict(self._store(table, {**row, **values})) for row in self._find(table, filters)]
+
+    async def delete(self, table, filters):
+        await self._round_trip()
+        deleted = []
+        for row in self._find(table, filters):
+            del self._table(table)[row["id"]]
+            self._reindex(table, None, row)
+            deleted.append(dict(row))
+        return deleted
+
+    async def count(self, table, filters=()):
+        await self._round_trip()
+        return len(self._find(table, filters))
+
+    async def rpc(self, function, params=None):
+        await self._round_trip()
+        handler = getattr(self, f"_rpc_{function}", None)
+        if handler is None:
+            raise RepositoryError(f"Could not find the function public.{function}", status_code=404)
+        return handler(**(params or {}))
+
+    # --- database functions (supabase_schema.sql) ---
+
+    def _inventory_row(self, bank_id: int, blood_type: str) -> Optional[Row]:
+        found = self._find("blood_inventory", [("blood_bank_id", "eq", bank_id), ("blood_type", "eq", blood_type)])
+        return found[0] if found else None
+
+    def _add_units(self, bank_id: int, blood_type: str, delta: int) -> int:
+        row = self._inventory_row(bank_id, blood_type)
+        units = max(((row or {}).get("units") or 0) + delta, 0)
+        now = datetime.now(timezone.utc).isoformat()
+        self._store("blood_inventory", {
+            **(row or {"blood_bank_id": bank_id, "blood_type": blood_type}), "units": units, "updated_at": now,
+        })
+        return units
+
+    def _rpc_ingest_blood_batches(self, p_blood_bank_id, p_batches):
+        batches = [
+            dict(self._store("blood_batches", {**batch, "blood_bank_id": p_blood_bank_id}))
+            for batch in p_batches
+        ]
+        totals: Dict[str, int] = {}
+        for batch in p_batches:
+            totals[batch["blood_type"]] = totals.get(batch["blood_type"], 0) + batch["units"]
+        inventory = {
+            blood_type: self._add_units(p_blood_bank_id, blood_type, units)
+            for blood_type, units in totals.items()
+        }
+        return {"batches": batches, "inventory": inventory}
+
+    def _rpc_consume_blood_batches(self, p_blood_bank_id, p_blood_type, p_allocations):
+        batches = self._table("blood_batches")
+        for allocation in p_allocations:
+            batch = batches.get(allocation["batch_id"])
+            if (
+                batch is None or batch["blood_bank_id"] != p_blood_bank_id
+                or batch["blood_type"] != p_blood_type or batch["units"] < allocation["units"]
+            ):
+                raise RepositoryError("stale allocation", status_code=400)
+        total = 0
+        for allocation in p_allocations:
+            batch = batches[allocation["batch_id"]]
+            self._store("blood_batches", {**batch, "units": batch["units"] - allocation["units"]})
+            total += allocation["units"]
+        if self._inventory_row(p_blood_bank_id, p_blood_type) is None:
+            return {"units": 0}
+        return {"units": self._add_units(p_blood_bank_id, p_blood_type, -total)}
+
+    def _rpc_search_blood_banks(self, p_blood_type, p_min_units=1, p_city=None):
+        banks = self._table("blood_banks")
+        results = []
+        for row in self._find("blood_inventory", [("blood_type", "eq", p_blood_type), ("units", "gte", p_min_units)]):
+            bank = banks.get(row["blood_bank_id"])
+            if bank is None or (p_city and not bank["city"].lower().startswith(p_city.lower())):
+                continue
+            results.append({
+                **{key: bank.get(key) for key in (
+                    "id", "user_id", "name", "address", "city", "phone", "email",
+                    "latitude", "longitude", "operating_hours", "verified",
+                )},
+                "units_available": row["units"],
+            })
+        results.sort(key=lambda bank: (-bank["units_available"], bank["id"]))
+        return results
+
+    def _rpc_admin_activity_stats(self):
+        requests = self._table("blood_requests").values()
+        donations = self._table("donations").values()
+        by_status = {"pending": 0, "fulfilled": 0, "cancelled": 0}
+        critical_pending = units_requested = units_fulfilled = 0
+        for request in requests:
+            by_status[request["status"]] = by_status.get(request["status"], 0) + 1
+            units_requested += request.get("units") or 0
+            if request["status"] == "fulfilled":
+                units_fulfilled += request.get("units") or 0
+            if request["status"] == "pending" and (request.get("is_critical") or request.get("urgency") == "critical"):
+                critical_pending += 1
+        return {
+            "total_units_donated": sum(d.get("units") or 0 for d in donations),
+            "donations": len(donations),
+            "lives_saved": by_status["fulfilled"],
+            "requests_by_status": by_status,
+            "critical_pending": critical_pending,
+            "units_requested": units_requested,
+            "units_fulfilled": units_fulfilled,
+        }
+
+    def _rpc_expire_blood_batches(self, p_today=None):
+        today = (p_today or date.today().isoformat())[:10]
+        expired, totals = [], {}
+        for batch in list(self._table("blood_batches").values()):
+            if batch["units"] > 0 and batch.get("expiry_date") and batch["expiry_date"][:10] < today:
+                self._store("blood_batches", {**batch, "expired_units": batch["units"], "units": 0})
+                expired.append(batch["id"])
+                key = (batch["blood_bank_id"], batch["blood_type"])
+                totals[key] = totals.get(key, 0) + batch["units"]
+        inventory = [
+            {"blood_bank_id": bank_id, "blood_type": blood_type, "units": self._add_units(bank_id, blood_type, -units)}
+            for (bank_id, blood_type), units in totals.items()
+            if self._inventory_row(bank_id, blood_type) is not None
+        ]
+        return {"batches": expired, "units": sum(totals.values()), "inventory": inventory}
+
+    def _rpc_escalate_pending_requests(self, p_urgent_after_seconds, p_critical_after_seconds):
+        now = datetime.now(timezone.utc)
+        escalated = []
+        for request in self._find("blood_requests", [("status", "eq", "pending")]):
+            created = datetime.fromisoformat(request["created_at"])
+            if created.tzinfo is None:
+                created = created.replace(tzinfo=timezone.utc)
+            waited = (now - created).total_seconds()
+            due = (
+                request["urgency"] == "normal" and waited > p_urgent_after_seconds
+                or request["urgency"] == "urgent" and waited > p_critical_after_seconds
+            )
+            if request.get("is_critical") or not due:
+                continue
+            urgency = "critical" if waited > p_critical_after_seconds else "urgent"
+            escalated.append(dict(self._store("blood_requests", {
+                **request, "urgency": urgency, "is_critical": urgency == "critical",
+            })))
+        return escalated
+
+    def _rpc_acquire_scheduler_lease(self, p_job, p_owner, p_ttl_seconds):
+        lease = self._find("scheduler_leases", [("job", "eq", p_job)])
+        now = time.time()
+        if lease and lease[0]["owner"] != p_owner and lease[0]["expires_at"] >= now:
+            return False
+        self._store("scheduler_leases", {
+            **(lease[0] if lease else {}), "job": p_job, "owner": p_owner, "expires_at": now + p_ttl_seconds,
+        })
+        return True
+
+    def _rpc_release_scheduler_lease(self, p_job, p_owner):
+        for lease in self._find("scheduler_leases", [("job", "eq", p_job), ("owner", "eq", p_owner)]):
+            del self._table("scheduler_leases")[lease["id"]]
+            self._reindex("scheduler_leases", None, lease)
+        return None
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def mint_token(secret: str, sub: str, role: str = "user", ttl: float = 3600, audience: str = "authenticated") -> str:
+    """HS256 access token shaped like the ones Supabase Auth issues."""
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    claims = {
+        "sub": sub, "aud": audience, "exp": int(time.time() + ttl), "role": "authenticated",
+        "email": f"{sub}@bench.local", "user_metadata": {"role": role},
+    }
+    payload = _b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+class FakeAuth:
+    """The slice of ``supabase.auth`` that AuthService and security.py call."""
+
+    def __init__(self, secret: str):
+        self.secret = secret
+        self.users: Dict[str, SimpleNamespace] = {}
+
+    def _session(self, email: str, role: str) -> SimpleNamespace:
+        user = self.users.get(email)
+        if user is None:
+            user = SimpleNamespace(id=str(uuid.uuid5(uuid.NAMESPACE_DNS, email)), email=email, user_metadata={"role": role})
+            self.users[email] = user
+        session = SimpleNamespace(access_token=mint_token(self.secret, user.id, user.user_metadata["role"]))
+        return SimpleNamespace(user=user, session=session)
+
+    def sign_in_with_password(self, credentials: Dict[str, Any]) -> SimpleNamespace:
+        return self._session(credentials["email"], "user")
+
+    def sign_up(self, data: Dict[str, Any]) -> SimpleNamespace:
+        role = data.get("options", {}).get("data", {}).get("role", "user")
+        return self._session(data["email"], role)
+
+
+class FakeSupabase:
+    def __init__(self, secret: str):
+        self.auth = FakeAuth(secret)
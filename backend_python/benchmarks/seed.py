@@ -0,0 +1,147 @@
+"""
+Synthetic BEOS data at scale for the benchmark suite.
+
+``seed(repo, scale)`` fills an ``InMemoryRepository`` with cities of donors,
+hospitals, blood banks (inventory + batches), requests, donations and users
+spread around real city centres, deterministically for a given ``seed``.
+"""
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from benchmarks.memory_repository import InMemoryRepository
+
+BLOOD_TYPES = ["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-"]
+# Roughly the population mix, most common first
+BLOOD_TYPE_WEIGHTS = [37, 28, 22, 6, 3, 2, 1.5, 0.5]
+CITY_CENTRES = {
+    "Mumbai": (19.076, 72.8777), "Delhi": (28.7041, 77.1025), "Bengaluru": (12.9716, 77.5946),
+    "Hyderabad": (17.385, 78.4867), "Chennai": (13.0827, 80.2707), "Kolkata": (22.5726, 88.3639),
+    "Pune": (18.5204, 73.8567), "Ahmedabad": (23.0225, 72.5714), "Jaipur": (26.9124, 75.7873),
+    "Lucknow": (26.8467, 80.9462), "Nagpur": (21.1458, 79.0882), "Indore": (22.7196, 75.8577),
+    "Bhopal": (23.2599, 77.4126), "Patna": (25.5941, 85.1376), "Surat": (21.1702, 72.8311),
+    "Kochi": (9.9312, 76.2673),
+}
+
+
+@dataclass
+class Scale:
+    cities: int = 8
+    donors: int = 20000
+    hospitals: int = 400
+    blood_banks: int = 160
+    requests: int = 5000
+    batches_per_bank: int = 24
+
+
+@dataclass
+class Dataset:
+    """What the load scenarios need to build valid requests."""
+
+    cities: Dict[str, Tuple[float, float]]
+    donor_ids: List[int] = field(default_factory=list)
+    donor_user_ids: List[str] = field(default_factory=list)
+    hospital_ids: List[int] = field(default_factory=list)
+    bank_ids: List[int] = field(default_factory=list)
+    bank_user_ids: List[str] = field(default_factory=list)
+    request_ids: List[int] = field(default_factory=list)
+
+
+def _user_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _near(rng: random.Random, centre: Tuple[float, float], spread: float = 0.15) -> Tuple[float, float]:
+    return centre[0] + rng.uniform(-spread, spread), centre[1] + rng.uniform(-spread, spread)
+
+
+def seed(repo: InMemoryRepository, scale: Scale = Scale(), seed: int = 0) -> Dataset:
+    rng = random.Random(seed)
+    names = list(CITY_CENTRES)[: max(1, min(scale.cities, len(CITY_CENTRES)))]
+    data = Dataset(cities={name: CITY_CENTRES[name] for name in names})
+    today = date.today()
+
+    def city():
+        return rng.choice(names)
+
+    def blood_type():
+        return rng.choices(BLOOD_TYPES, BLOOD_TYPE_WEIGHTS)[0]
+
+    donors = []
+    for i in range(scale.donors):
+        name = city()
+        lat, lng = _near(rng, CITY_CENTRES[name])
+        donors.append({
+            "user_id": _user_id(rng), "name": f"Donor {i}", "blood_type": blood_type(),
+            "phone": f"9{rng.randrange(10 ** 9):09d}", "email": f"donor{i}@example.com", "city": name,
+            "address": f"{rng.randrange(1, 500)} Main Road", "available": rng.random() < 0.7,
+            "last_donation": (today - timedelta(days=rng.randrange(30, 720))).isoformat(),
+            "latitude": lat, "longitude": lng,
+        })
+    for row in repo.seed("donors", donors):
+        data.donor_ids.append(row["id"])
+        data.donor_user_ids.append(row["user_id"])
+
+    hospitals = []
+    for i in range(scale.hospitals):
+        name = city()
+        lat, lng = _near(rng, CITY_CENTRES[name])
+        hospitals.append({
+            "user_id": _user_id(rng), "name": f"{name} Hospital {i}", "address": f"{i} Hospital Road",
+            "city": name, "phone": f"0{rng.randrange(10 ** 9):09d}", "latitude": lat, "longitude": lng,
+            "verified": rng.random() < 0.8,
+        })
+    data.hospital_ids = [row["id"] for row in repo.seed("hospitals", hospitals)]
+
+    banks = []
+    for i in range(scale.blood_banks):
+        name = city()
+        lat, lng = _near(rng, CITY_CENTRES[name])
+        banks.append({
+            "user_id": _user_id(rng), "name": f"{name} Blood Bank {i}", "address": f"{i} Bank Street",
+            "city": name, "phone": f"0{rng.randrange(10 ** 9):09d}", "latitude": lat, "longitude": lng,
+            "operating_hours": "24x7", "verified": True,
+        })
+    for row in repo.seed("blood_banks", banks):
+        data.bank_ids.append(row["id"])
+        data.bank_user_ids.append(row["user_id"])
+
+    inventory, batches = [], []
+    for bank_id in data.bank_ids:
+        totals = dict.fromkeys(BLOOD_TYPES, 0)
+        for _ in range(scale.batches_per_bank):
+            batch_type, units = blood_type(), rng.randrange(1, 20)
+            totals[batch_type] += units
+            batches.append({
+                "blood_bank_id": bank_id, "blood_type": batch_type, "units": units,
+                "expiry_date": (today + timedelta(days=rng.randrange(1, 42))).isoformat(),
+            })
+        inventory.extend(
+            {"blood_bank_id": bank_id, "blood_type": t, "units": units} for t, units in totals.items()
+        )
+    repo.seed("blood_batches", batches)
+    repo.seed("blood_inventory", inventory)
+
+    requests = []
+    for i in range(scale.requests):
+        urgency = rng.choices(["normal", "urgent", "critical"], [70, 22, 8])[0]
+        requests.append({
+            "hospital_id": rng.choice(data.hospital_ids), "patient_name": f"Patient {i}",
+            "age": rng.randrange(1, 90), "gender": rng.choice(["M", "F"]), "blood_type": blood_type(),
+            "units": rng.randrange(1, 5), "urgency": urgency, "is_critical": urgency == "critical",
+            "status": rng.choices(["pending", "fulfilled", "cancelled"], [50, 40, 10])[0],
+            "contact_phone": f"0{rng.randrange(10 ** 9):09d}",
+        })
+    data.request_ids = [row["id"] for row in repo.seed("blood_requests", requests)]
+
+    repo.seed("donations", (
+        {"donor_id": rng.choice(data.donor_ids), "blood_type": blood_type(), "units": 1}
+        for _ in range(scale.donors // 4)
+    ))
+    repo.seed("users", (
+        {"user_id": user_id, "email": f"user{i}@example.com", "role": "donor"}
+        for i, user_id in enumerate(data.donor_user_ids)
+    ))
+    return data
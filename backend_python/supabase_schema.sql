@@ -87,6 +87,8 @@ CREATE TABLE public.blood_batches (
     blood_type TEXT NOT NULL CHECK(blood_type IN ('A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-')),
     units INTEGER NOT NULL,
     expiry_date DATE,
+    -- Units written off when the batch expired (see expire_blood_batches)
+    expired_units INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
@@ -128,6 +130,13 @@ CREATE TABLE public.donations (
     notes TEXT
 );
 
+-- 9. Scheduler Leases (which worker runs each background job, see app/core/scheduler.py)
+CREATE TABLE public.scheduler_leases (
+    job TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
 -- ROW LEVEL SECURITY (RLS) POLICIES
 -- NOTE: In a real production environment with Supabase Auth, we would check auth.uid()
 -- For now, we enable RLS but allow public access or basic logic to prepare for Auth integration.
@@ -151,3 +160,224 @@ CREATE INDEX idx_donors_city ON public.donors(city);
 CREATE INDEX idx_blood_requests_status ON public.blood_requests(status);
 CREATE INDEX idx_blood_requests_urgency ON public.blood_requests(urgency);
 CREATE INDEX idx_blood_batches_expiry ON public.blood_batches(expiry_date);
+-- Keyset pagination: filtered list pages walk these in id order
+CREATE INDEX idx_blood_requests_status_id ON public.blood_requests(status, id);
+CREATE INDEX idx_blood_requests_hospital_id ON public.blood_requests(hospital_id, id);
+CREATE INDEX idx_donors_city_blood_type_id ON public.donors(city, blood_type, id);
+CREATE INDEX idx_blood_inventory_type_units ON public.blood_inventory(blood_type, units);
+CREATE INDEX idx_blood_banks_city_prefix ON public.blood_banks(lower(city) text_pattern_ops);
+
+-- FUNCTIONS
+
+-- Bulk batch intake: inserts every batch and applies the per-type unit increments
+-- to blood_inventory in a single transaction (one round trip via /rpc/ingest_blood_batches).
+-- The increment happens inside the UPSERT, so concurrent intakes never lose units.
+CREATE OR REPLACE FUNCTION public.ingest_blood_batches(p_blood_bank_id BIGINT, p_batches JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_batches JSONB;
+    v_inventory JSONB;
+BEGIN
+    WITH inserted AS (
+        INSERT INTO public.blood_batches (blood_bank_id, blood_type, units, expiry_date)
+        SELECT p_blood_bank_id, b.blood_type, b.units, b.expiry_date
+        FROM jsonb_to_recordset(p_batches) AS b(blood_type TEXT, units INTEGER, expiry_date DATE)
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(inserted) ORDER BY inserted.id), '[]'::jsonb)
+    INTO v_batches FROM inserted;
+
+    WITH totals AS (
+        SELECT b.blood_type, SUM(b.units)::INTEGER AS units
+        FROM jsonb_to_recordset(p_batches) AS b(blood_type TEXT, units INTEGER)
+        GROUP BY b.blood_type
+    ), upserted AS (
+        INSERT INTO public.blood_inventory (blood_bank_id, blood_type, units, updated_at)
+        SELECT p_blood_bank_id, t.blood_type, t.units, NOW() FROM totals t
+        ON CONFLICT (blood_bank_id, blood_type)
+        DO UPDATE SET units = COALESCE(public.blood_inventory.units, 0) + EXCLUDED.units, updated_at = NOW()
+        RETURNING blood_type, units
+    )
+    SELECT COALESCE(jsonb_object_agg(blood_type, units), '{}'::jsonb)
+    INTO v_inventory FROM upserted;
+
+    RETURN jsonb_build_object('batches', v_batches, 'inventory', v_inventory);
+END;
+$$;
+
+-- FEFO allocation: takes the units the API planned from each batch, refusing the whole
+-- allocation if any batch no longer holds enough (another worker got there first),
+-- and decrements the summary inventory in the same transaction.
+CREATE OR REPLACE FUNCTION public.consume_blood_batches(p_blood_bank_id BIGINT, p_blood_type TEXT, p_allocations JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_total INTEGER;
+    v_updated INTEGER;
+    v_units INTEGER;
+BEGIN
+    SELECT COALESCE(SUM(a.units), 0) INTO v_total
+    FROM jsonb_to_recordset(p_allocations) AS a(batch_id BIGINT, units INTEGER);
+
+    WITH alloc AS (
+        SELECT * FROM jsonb_to_recordset(p_allocations) AS a(batch_id BIGINT, units INTEGER)
+    ), updated AS (
+        UPDATE public.blood_batches b
+        SET units = b.units - alloc.units
+        FROM alloc
+        WHERE b.id = alloc.batch_id
+          AND b.blood_bank_id = p_blood_bank_id
+          AND b.blood_type = p_blood_type
+          AND b.units >= alloc.units
+        RETURNING b.id
+    )
+    SELECT COUNT(*) INTO v_updated FROM updated;
+
+    IF v_updated <> jsonb_array_length(p_allocations) THEN
+        RAISE EXCEPTION 'stale allocation';
+    END IF;
+
+    UPDATE public.blood_inventory
+    SET units = GREATEST(COALESCE(units, 0) - v_total, 0), updated_at = NOW()
+    WHERE blood_bank_id = p_blood_bank_id AND blood_type = p_blood_type
+    RETURNING units INTO v_units;
+
+    RETURN jsonb_build_object('units', COALESCE(v_units, 0));
+END;
+$$;
+
+-- Stock search: banks holding at least p_min_units of one blood type, with their
+-- unit count, in one indexed join (idx_blood_inventory_type_units). The optional
+-- city filter is a case-insensitive prefix match so idx_blood_banks_city_prefix applies.
+CREATE OR REPLACE FUNCTION public.search_blood_banks(p_blood_type TEXT, p_min_units INTEGER DEFAULT 1, p_city TEXT DEFAULT NULL)
+RETURNS TABLE (
+    id BIGINT,
+    user_id UUID,
+    name TEXT,
+    address TEXT,
+    city TEXT,
+    phone TEXT,
+    email TEXT,
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    operating_hours TEXT,
+    verified BOOLEAN,
+    units_available INTEGER
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT b.id, b.user_id, b.name, b.address, b.city, b.phone, b.email,
+           b.latitude, b.longitude, b.operating_hours, b.verified, i.units
+    FROM public.blood_inventory i
+    JOIN public.blood_banks b ON b.id = i.blood_bank_id
+    WHERE i.blood_type = p_blood_type
+      AND i.units >= p_min_units
+      AND (p_city IS NULL OR lower(b.city) LIKE lower(p_city) || '%')
+    ORDER BY i.units DESC, b.id;
+$$;
+
+-- Admin dashboard aggregates over blood_requests and donations in one round trip.
+-- lives_saved counts fulfilled requests (one patient per request).
+CREATE OR REPLACE FUNCTION public.admin_activity_stats()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'total_units_donated', (SELECT COALESCE(SUM(units), 0) FROM public.donations),
+        'donations', (SELECT COUNT(*) FROM public.donations),
+        'lives_saved', r.fulfilled,
+        'requests_by_status', jsonb_build_object('pending', r.pending, 'fulfilled', r.fulfilled, 'cancelled', r.cancelled),
+        'critical_pending', r.critical_pending,
+        'units_requested', r.units_requested,
+        'units_fulfilled', r.units_fulfilled
+    )
+    FROM (
+        SELECT
+            COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+            COUNT(*) FILTER (WHERE status = 'fulfilled') AS fulfilled,
+            COUNT(*) FILTER (WHERE status = 'cancelled') AS cancelled,
+            COUNT(*) FILTER (WHERE status = 'pending' AND (is_critical OR urgency = 'critical')) AS critical_pending,
+            COALESCE(SUM(units), 0) AS units_requested,
+            COALESCE(SUM(units) FILTER (WHERE status = 'fulfilled'), 0) AS units_fulfilled
+        FROM public.blood_requests
+    ) r;
+$$;
+
+-- Batch expiry: writes off every batch past its expiry date and takes its units out of
+-- blood_inventory in the same statement. Returns the expired batch ids and the new
+-- inventory rows so the API can update its in-memory indexes.
+CREATE OR REPLACE FUNCTION public.expire_blood_batches(p_today DATE DEFAULT CURRENT_DATE)
+RETURNS JSONB
+LANGUAGE sql
+AS $$
+    WITH expired AS (
+        UPDATE public.blood_batches
+        SET expired_units = units, units = 0
+        WHERE expiry_date < p_today AND units > 0
+        RETURNING id, blood_bank_id, blood_type, expired_units
+    ), totals AS (
+        SELECT blood_bank_id, blood_type, SUM(expired_units)::INTEGER AS units
+        FROM expired GROUP BY blood_bank_id, blood_type
+    ), inventory AS (
+        UPDATE public.blood_inventory i
+        SET units = GREATEST(COALESCE(i.units, 0) - t.units, 0), updated_at = NOW()
+        FROM totals t
+        WHERE i.blood_bank_id = t.blood_bank_id AND i.blood_type = t.blood_type
+        RETURNING i.blood_bank_id, i.blood_type, i.units
+    )
+    SELECT jsonb_build_object(
+        'batches', (SELECT COALESCE(jsonb_agg(id ORDER BY id), '[]'::jsonb) FROM expired),
+        'units', (SELECT COALESCE(SUM(expired_units), 0) FROM expired),
+        'inventory', (SELECT COALESCE(jsonb_agg(to_jsonb(inventory)), '[]'::jsonb) FROM inventory)
+    );
+$$;
+
+-- Escalation: pending requests waiting longer than p_urgent_after_seconds become urgent,
+-- longer than p_critical_after_seconds critical. Returns the escalated rows.
+CREATE OR REPLACE FUNCTION public.escalate_pending_requests(p_urgent_after_seconds INTEGER, p_critical_after_seconds INTEGER)
+RETURNS JSONB
+LANGUAGE sql
+AS $$
+    WITH escalated AS (
+        UPDATE public.blood_requests
+        SET urgency = CASE WHEN created_at < NOW() - make_interval(secs => p_critical_after_seconds)
+                           THEN 'critical' ELSE 'urgent' END,
+            is_critical = created_at < NOW() - make_interval(secs => p_critical_after_seconds)
+        WHERE status = 'pending'
+          AND NOT COALESCE(is_critical, FALSE)
+          AND (
+              (urgency = 'normal' AND created_at < NOW() - make_interval(secs => p_urgent_after_seconds))
+              OR (urgency = 'urgent' AND created_at < NOW() - make_interval(secs => p_critical_after_seconds))
+          )
+        RETURNING *
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(escalated) ORDER BY id), '[]'::jsonb) FROM escalated;
+$$;
+
+-- Scheduler leader election: p_owner gets (or keeps) the lease on p_job for p_ttl_seconds
+-- unless another owner holds an unexpired one.
+CREATE OR REPLACE FUNCTION public.acquire_scheduler_lease(p_job TEXT, p_owner TEXT, p_ttl_seconds DOUBLE PRECISION)
+RETURNS BOOLEAN
+LANGUAGE sql
+AS $$
+    WITH taken AS (
+        INSERT INTO public.scheduler_leases (job, owner, expires_at)
+        VALUES (p_job, p_owner, NOW() + make_interval(secs => p_ttl_seconds))
+        ON CONFLICT (job) DO UPDATE SET owner = EXCLUDED.owner, expires_at = EXCLUDED.expires_at
+        WHERE public.scheduler_leases.owner = EXCLUDED.owner OR public.scheduler_leases.expires_at < NOW()
+        RETURNING job
+    )
+    SELECT EXISTS (SELECT 1 FROM taken);
+$$;
+
+CREATE OR REPLACE FUNCTION public.release_scheduler_lease(p_job TEXT, p_owner TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    DELETE FROM public.scheduler_leases WHERE job = p_job AND owner = p_owner;
+$$;
@@ -1,3 +1,11 @@
+import os
+
+# Keep tests off the real Supabase project configured in .env
+# (load_dotenv never overrides variables that are already set).
+os.environ.setdefault("SUPABASE_URL", "")
+os.environ.setdefault("SUPABASE_KEY", "")
+os.environ.setdefault("ENVIRONMENT", "development")
+
 import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
@@ -0,0 +1,41 @@
+import asyncio
+
+from app.core.database import set_repository
+from app.services.admin_stats import AdminStats
+from benchmarks.memory_repository import InMemoryRepository
+
+
+class CountingRepository(InMemoryRepository):
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _track(self, value):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return value
+
+    async def count(self, table, filters=()):
+        return await self._track(len(table))
+
+    async def rpc(self, function, params=None):
+        return await self._track({"total_units_donated": 42, "lives_saved": 7})
+
+
+def test_snapshot_counts_concurrently_and_includes_aggregates():
+    repo = CountingRepository()
+    set_repository(repo)
+    try:
+        stats = AdminStats()
+        snapshot = asyncio.run(stats.get())
+    finally:
+        set_repository(None)
+
+    assert repo.peak == 5
+    assert snapshot["donors"] == len("donors")
+    assert snapshot["requests"] == len("blood_requests")
+    assert snapshot["total_units_donated"] == 42
+    assert snapshot["lives_saved"] == 7
@@ -0,0 +1,149 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.admission import AdmissionMiddleware, Lane, RateLimiter, caller_key, classify
+from app.core.config import settings
+from app.core.security import _token_cache
+
+API = "/api/v1"
+SECRET = "admission-secret"
+
+
+def test_classify_lanes():
+    assert classify("POST", f"{API}/emergency/", b'{"urgency": "critical"}') == "critical"
+    assert classify("POST", f"{API}/emergency/", b'{"urgency": "normal", "is_critical": true}') == "critical"
+    assert classify("POST", f"{API}/emergency/", b'{"urgency": "normal"}') == "standard"
+    assert classify("POST", f"{API}/emergency/", b"not json") == "standard"
+    assert classify("PATCH", f"{API}/emergency/12/status") == "critical"
+    assert classify("GET", f"{API}/hospitals/nearby") == "browse"
+    assert classify("HEAD", f"{API}/blood-banks/3/inventory") == "browse"
+    assert classify("GET", f"{API}/admin/export/donors") == "browse"
+    assert classify("GET", f"{API}/donors/me") == "standard"
+    assert classify("PATCH", f"{API}/donors/4/status") == "standard"
+    assert classify("GET", "/health") is None
+
+
+def _hs256(claims: dict, secret: str) -> str:
+    def b64(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    signing_input = f"{b64(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode())}.{b64(json.dumps(claims).encode())}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{b64(signature)}"
+
+
+@pytest.fixture
+def verified(monkeypatch):
+    """Bearer headers carrying a validly signed token for a user (never seen by the auth cache)."""
+    monkeypatch.setattr(settings, "JWT_SECRET", SECRET)
+    monkeypatch.setattr(settings, "JWT_AUDIENCE", "authenticated")
+    _token_cache.clear()
+
+    def sign(user_id: str) -> dict:
+        token = _hs256({"sub": user_id, "aud": "authenticated", "exp": time.time() + 600}, SECRET)
+        return {"Authorization": f"Bearer {token}"}
+
+    yield sign
+    _token_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_caller_key_is_the_verified_user_else_the_address(verified):
+    def scope(authorization: str) -> dict:
+        return {"headers": [(b"authorization", authorization.encode())], "client": ("10.0.0.1", 1)}
+
+    assert await caller_key(scope(verified("u-alice")["Authorization"])) == "user:u-alice"
+    forged = _hs256({"sub": "u-alice", "aud": "authenticated", "exp": time.time() + 600}, "not-the-secret")
+    assert await caller_key(scope(f"Bearer {forged}")) == "ip:10.0.0.1"
+    assert await caller_key(scope("Bearer junk")) == "ip:10.0.0.1"
+    assert await caller_key({"headers": [], "client": ("10.0.0.1", 1)}) == "ip:10.0.0.1"
+
+
+def build_app(gate: asyncio.Event, limiter=None, critical_limiter=None, standard_limit=4):
+    app = FastAPI()
+
+    @app.get(f"{API}/hospitals/")
+    async def hospitals():
+        await gate.wait()
+        return []
+
+    @app.post(f"{API}/emergency/")
+    async def create(payload: dict):
+        return payload
+
+    lanes = {
+        "critical": Lane("critical", None),
+        "standard": Lane("standard", standard_limit),
+        "browse": Lane("browse", 1, 1, 5),
+    }
+    return AdmissionMiddleware(
+        app, lanes=lanes, limiter=limiter or RateLimiter(0, 0), critical_limiter=critical_limiter or RateLimiter(0, 0)
+    )
+
+
+@pytest.mark.anyio
+async def test_saturated_browse_lane_sheds_while_critical_writes_get_through(verified):
+    gate = asyncio.Event()
+    app = build_app(gate)
+    hospital = verified("u-hospital")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        running = asyncio.ensure_future(client.get(f"{API}/hospitals/"))
+        queued = asyncio.ensure_future(client.get(f"{API}/hospitals/"))
+        await asyncio.sleep(0.05)
+        assert (app.lanes["browse"].active, len(app.lanes["browse"].waiting)) == (1, 1)
+
+        shed = await client.get(f"{API}/hospitals/")
+        assert shed.status_code == 503 and int(shed.headers["retry-after"]) >= 1
+
+        created = await client.post(f"{API}/emergency/", headers=hospital, json={"urgency": "critical", "units": 2})
+        assert created.status_code == 200 and created.json()["units"] == 2
+
+        gate.set()
+        assert [(await r).status_code for r in (running, queued)] == [200, 200]
+    assert (app.lanes["browse"].active, len(app.lanes["browse"].waiting)) == (0, 0)
+
+
+@pytest.mark.anyio
+async def test_token_bucket_limits_each_caller_with_a_separate_one_for_critical_writes(verified):
+    gate = asyncio.Event()
+    gate.set()
+    app = build_app(gate, RateLimiter(rate=1, burst=2), RateLimiter(rate=1, burst=3))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        alice = verified("u-alice")
+        statuses = [(await client.get(f"{API}/hospitals/", headers=alice)).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        # Junk tokens are charged to the address, so rotating them buys nothing
+        junk = [
+            (await client.get(f"{API}/hospitals/", headers={"Authorization": f"Bearer junk-{i}"})).status_code
+            for i in range(3)
+        ]
+        assert junk == [200, 200, 429]
+        urgent = [
+            (await client.post(f"{API}/emergency/", headers=alice, json={"urgency": "urgent"})).status_code
+            for _ in range(4)
+        ]
+        assert urgent == [200, 200, 200, 429]
+
+
+@pytest.mark.anyio
+async def test_critical_body_from_an_unverified_caller_takes_the_standard_lane(verified):
+    gate = asyncio.Event()
+    gate.set()
+    # No standard slots at all: anything that lands there is shed
+    app = build_app(gate, standard_limit=0)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        body = {"urgency": "critical"}
+        anonymous = await client.post(f"{API}/emergency/", json=body)
+        unseen = await client.post(f"{API}/emergency/", headers={"Authorization": "Bearer forged"}, json=body)
+        assert (anonymous.status_code, unseen.status_code) == (503, 503)
+        # A valid token gets the critical lane on its first request, with no auth cache entry
+        known = await client.post(f"{API}/emergency/", headers=verified("u-nurse"), json=body)
+        assert known.status_code == 200
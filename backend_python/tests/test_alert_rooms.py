@@ -0,0 +1,34 @@
+import asyncio
+
+from app.core.geo import haversine_km
+from app.core.socket import city_room, geo_room, geo_rooms
+from app.services import request_events
+from app.services.location_service import LocationIndex
+from app.services.request_events import RequestEventPipeline
+
+# Navi Mumbai hospital; a donor across the municipal boundary in Thane
+HOSPITAL = (19.0330, 73.0297)
+DONOR = (19.1200, 73.0000)
+
+
+def test_alert_cells_reach_nearby_donors_across_city_lines():
+    assert haversine_km(*HOSPITAL, *DONOR) < 15
+    rooms = geo_rooms(*HOSPITAL, 15)
+    assert geo_room(*DONOR) in rooms
+    assert geo_room(28.6139, 77.2090) not in rooms  # Delhi
+    assert city_room("  Navi   MUMBAI ") == city_room("navi mumbai")
+
+
+def test_request_rooms_are_hospital_cells_for_compatible_donors(monkeypatch):
+    index = LocationIndex("hospitals")
+    index.upsert({"id": 991, "city": "Navi Mumbai", "latitude": HOSPITAL[0], "longitude": HOSPITAL[1]})
+    index.loaded_at = float("inf")  # treat the in-memory index as fresh
+    monkeypatch.setattr(request_events, "hospital_locations", index)
+
+    rooms = asyncio.run(RequestEventPipeline(emit=None).rooms_for({"id": 1, "hospital_id": 991, "blood_type": "O-"}))
+    assert rooms[0] == "city_navi mumbai"
+    assert geo_room(*HOSPITAL) in rooms
+    # An O- request reaches only O- donors, and only within the alert radius
+    assert geo_room(*DONOR, "O-") in rooms
+    assert geo_room(*DONOR, "A+") not in rooms
+    assert not any(room.startswith("type_") for room in rooms)
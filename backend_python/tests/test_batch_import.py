@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.batch_import import BatchImportError, detect_format, parse_batches
+
+
+def test_parses_json_ndjson_and_csv_alike():
+    json_body = b'[{"blood_type": "A+", "units": 2, "expiry_date": "2026-12-01"}]'
+    ndjson_body = b'{"blood_type": "A+", "units": 2, "expiry_date": "2026-12-01"}\n\n'
+    csv_body = b"blood_type,units,expiry_date\nA+,2,2026-12-01\n"
+
+    parsed = [
+        parse_batches(json_body, "json", 10),
+        parse_batches(ndjson_body, "ndjson", 10),
+        parse_batches(csv_body, detect_format("text/csv"), 10),
+    ]
+    assert all(len(batches) == 1 for batches in parsed)
+    assert parsed[0][0] == parsed[1][0] == parsed[2][0]
+
+
+def test_reports_every_bad_row_and_row_limit():
+    body = b"blood_type,units,expiry_date\nA+,2,2026-12-01\nC+,1,2026-12-01\nO-,0,2026-12-01\nB+,x,2026-12-01\n"
+    with pytest.raises(BatchImportError) as exc:
+        parse_batches(body, "csv", 10)
+    assert [e["row"] for e in exc.value.errors] == [3, 4, 5]
+
+    with pytest.raises(BatchImportError):
+        parse_batches(body, "csv", 2)
+
+
+@pytest.mark.parametrize("body, fmt", [
+    ("blood_type,units,expiry_date\nA+,2,2026-12-01,Société\n".encode("latin-1"), "csv"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", "json"),
+    (b"blood_type,units,expiry_date\nA+,\"" + b"9" * 200_000 + b"\",2026-12-01\n", "csv"),
+])
+def test_undecodable_uploads_are_rejected_not_crashed(body, fmt):
+    with pytest.raises(BatchImportError) as exc:
+        parse_batches(body, fmt, 10)
+    assert exc.value.errors[0]["error"].startswith(("Upload is not UTF-8", "Invalid CSV"))
+
+
+def test_detect_format_from_filename():
+    assert detect_format("application/octet-stream", "shift.ndjson") == "ndjson"
+    assert detect_format(None, "shift.CSV") == "csv"
+    assert detect_format("application/json") == "json"
@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.database import set_repository
+from app.services.donor_registry import DonorRegistry, donor_registry
+from benchmarks.memory_repository import InMemoryRepository
+
+TODAY = date(2026, 1, 1)
+
+
+def test_masks_and_incremental_updates():
+    registry = DonorRegistry.from_rows([
+        {"id": 5, "blood_type": "O-", "city": "Pune", "available": True},
+        {"id": 2, "blood_type": "O-", "city": "Mumbai", "available": True},
+        {"id": 9, "blood_type": "A+", "city": "Pune", "available": False,
+         "last_donation": (TODAY - timedelta(days=10)).isoformat()},
+    ])
+    assert registry.ids.tolist() == [2, 5, 9]
+    assert registry.find(registry.mask(city="Pune")) == [5, 9]
+    assert registry.find(registry.mask(blood_type="O-", city="Pune")) == [5]
+    assert registry.find(registry.mask(eligible=False, today=TODAY)) == [9]
+    assert registry.find(registry.mask(city="Delhi")) == []
+
+    # New donors append (or slot in by id); status changes update in place
+    registry.upsert({"id": 12, "blood_type": "A+", "city": "Delhi", "available": True})
+    registry.upsert({"id": 7, "blood_type": "B+", "city": "Pune"})
+    registry.upsert({"id": 5, "available": False})
+    assert registry.ids.tolist() == [2, 5, 7, 9, 12]
+    assert registry.find(registry.mask(city="Pune", available=True)) == [7]
+    assert registry.find(registry.mask(available=True), after_id=2, limit=1) == [7]
+    assert registry.find(registry.mask(city="Delhi")) == [12]
+
+
+def test_donors_cost_26_bytes_each():
+    registry = DonorRegistry()
+    for donor_id in range(1, 1025):
+        registry.upsert({"id": donor_id, "blood_type": "O+", "city": "Pune"})
+    # A million donors: under 25 MB of columns (50 MB while doubling capacity)
+    assert registry.nbytes == 1024 * 26
+
+
+@pytest.mark.anyio
+async def test_search_pages_through_registry_matches(client: AsyncClient):
+    repo = InMemoryRepository()
+    repo.seed("donors", (
+        {"name": f"Donor {i}", "blood_type": "O-" if i % 2 else "A+", "city": "Pune", "phone": "1",
+         "available": i % 3 != 0}
+        for i in range(1, 11)
+    ))
+    set_repository(repo)
+    try:
+        url = f"{settings.API_V1_STR}/donors/"
+        headers = {"Authorization": "Bearer mocktoken"}
+        params = {"city": "Pune", "blood_type": "O-", "available": "true", "eligible": "true", "limit": 2}
+        first = await client.get(url, headers=headers, params=params)
+        assert [d["id"] for d in first.json()] == [1, 5]
+        second = await client.get(url, headers=headers, params={**params, "cursor": first.headers["x-next-cursor"]})
+        assert [d["id"] for d in second.json()] == [7]
+        assert "x-next-cursor" not in second.headers
+
+        # A donor registered through the API is searchable at once
+        created = await client.post(url, headers=headers, json={
+            "name": "New", "blood_type": "O-", "phone": "1", "city": "Pune",
+        })
+        assert created.status_code == 201
+        third = await client.get(url, headers=headers, params={**params, "cursor": first.headers["x-next-cursor"]})
+        assert [d["id"] for d in third.json()] == [7, created.json()["id"]]
+    finally:
+        set_repository(None)
+        donor_registry.loaded_at = None
+
+
+@pytest.mark.anyio
+async def test_reload_reads_past_the_server_row_cap(monkeypatch):
+    monkeypatch.setattr(settings, "TABLE_LOAD_BATCH_SIZE", 4)
+    repo = InMemoryRepository(max_rows=3)
+    repo.seed("donors", ({"name": f"Donor {i}", "blood_type": "O+", "city": "Pune"} for i in range(10)))
+    set_repository(repo)
+    registry = DonorRegistry()
+    try:
+        await registry.reload()
+    finally:
+        set_repository(None)
+    assert registry.ids.tolist() == list(range(1, 11))
+
+
+@pytest.mark.anyio
+async def test_search_rechecks_rows_a_stale_registry_picked(client: AsyncClient):
+    repo = InMemoryRepository()
+    repo.seed("donors", (
+        {"name": f"Donor {i}", "blood_type": "O-", "city": "Pune", "phone": "1", "available": True}
+        for i in range(1, 7)
+    ))
+    set_repository(repo)
+    try:
+        url = f"{settings.API_V1_STR}/donors/"
+        headers = {"Authorization": "Bearer mocktoken"}
+        params = {"city": "Pune", "blood_type": "O-", "available": "true", "limit": 2}
+        await donor_registry.reload()
+        # Written by another worker: this registry still lists donors 1, 2 and 4 as matches
+        await repo.update("donors", {"available": False}, [("id", "in", [1, 2])])
+        await repo.update("donors", {"city": "Mumbai"}, [("id", "eq", 4)])
+
+        first = await client.get(url, headers=headers, params=params)
+        assert [d["id"] for d in first.json()] == [3, 5]
+        second = await client.get(url, headers=headers, params={**params, "cursor": first.headers["x-next-cursor"]})
+        assert [d["id"] for d in second.json()] == [6]
+        assert "x-next-cursor" not in second.headers
+        # The fetched rows corrected the registry
+        assert donor_registry.find(donor_registry.mask(available=False)) == [1, 2]
+
+        # Blank filters mean "any", as they did before the registry
+        blank = await client.get(url, headers=headers, params={"city": "", "blood_type": ""})
+        assert [d["id"] for d in blank.json()] == [1, 2, 3, 4, 5, 6]
+    finally:
+        set_repository(None)
+        donor_registry.loaded_at = None
@@ -0,0 +1,44 @@
+import asyncio
+import csv
+import io
+import json
+
+from app.core.pagination import iter_pages
+from app.services.export_service import csv_chunks, ndjson_chunks
+from benchmarks.memory_repository import InMemoryRepository
+
+
+class PagedRepository(InMemoryRepository):
+    def __init__(self, count):
+        super().__init__()
+        self.rows = [{"id": i, "email": f"u{i}@x.org", "role": "donor"} for i in range(1, count + 1)]
+        self.selects = 0
+
+    async def select(self, table, columns="*", filters=(), order=None, desc=False, limit=None):
+        self.selects += 1
+        after = next((value for column, op, value in filters if column == "id"), 0)
+        return [r for r in self.rows if r["id"] > after][:limit]
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_ndjson_export_yields_one_chunk_per_page():
+    repo = PagedRepository(5)
+    chunks = asyncio.run(_collect(ndjson_chunks(iter_pages(repo, "users", "id", batch_size=2))))
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [r["id"] for r in rows] == [1, 2, 3, 4, 5]
+    # The walk only ends on an empty page
+    assert repo.selects == 4
+
+
+def test_csv_export_sends_header_first():
+    repo = PagedRepository(3)
+    columns = ["id", "email"]
+    chunks = asyncio.run(_collect(csv_chunks(iter_pages(repo, "users", ",".join(columns), batch_size=3), columns)))
+    assert chunks[0] == b"id,email\r\n"
+    assert repo.selects == 2
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[1:] == [["1", "u1@x.org"], ["2", "u2@x.org"], ["3", "u3@x.org"]]
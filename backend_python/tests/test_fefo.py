@@ -0,0 +1,113 @@
+import asyncio
+from datetime import date
+
+from app.core.database import set_repository
+from app.services import blood_bank_service
+from app.services.blood_bank_service import BloodBankService
+from app.services.fefo_index import FefoIndex
+from app.services.inventory_counters import InventoryCounters
+from benchmarks.memory_repository import InMemoryRepository
+
+TODAY = date(2026, 3, 1)
+
+
+def _index():
+    index = FefoIndex()
+    index.add({"id": 1, "blood_bank_id": 7, "blood_type": "A+", "units": 4, "expiry_date": "2026-03-10"})
+    index.add({"id": 2, "blood_bank_id": 7, "blood_type": "A+", "units": 5, "expiry_date": "2026-03-03"})
+    index.add({"id": 3, "blood_bank_id": 7, "blood_type": "A+", "units": 9, "expiry_date": "2026-02-27"})
+    index.add({"id": 4, "blood_bank_id": 7, "blood_type": "O-", "units": 2, "expiry_date": "2026-03-02"})
+    index.add({"id": 5, "blood_bank_id": 7, "blood_type": "A+", "units": 1, "expiry_date": None})
+    return index
+
+
+def test_plan_takes_soonest_unexpired_batches_first():
+    index = _index()
+    plan = index.plan(7, "A+", 7, today=TODAY)
+    # Batch 3 has already expired and is never allocated
+    assert plan == [(2, 5), (1, 2)]
+
+    index.commit(plan)
+    assert 2 not in index.batches
+    assert index.batches[1]["units"] == 2
+    assert index.plan(7, "A+", 10, today=TODAY) == [(1, 2), (5, 1)]
+
+
+def test_near_expiry_skips_consumed_and_filters_type():
+    index = _index()
+    index.commit(index.plan(7, "A+", 5, today=TODAY))
+
+    soon = index.near_expiry(7, today=TODAY)
+    assert [(b["id"], b["days_left"]) for b in soon] == [(4, 1)]
+    assert [b["id"] for b in index.near_expiry(10, today=TODAY, blood_type="A+")] == [1]
+
+
+def test_replanned_queue_does_not_duplicate_or_keep_expired_entries():
+    index = _index()
+    batch = {"id": 6, "blood_bank_id": 7, "blood_type": "A+", "units": 3, "expiry_date": "2026-03-04"}
+    index.add(batch)
+    # A stale-allocation replan reloads the queue from the database
+    index.replace_key(7, "A+", [dict(batch)])
+    assert [b["id"] for b in index.near_expiry(7, today=TODAY)] == [4, 6]
+    assert index.plan(7, "A+", 10, today=TODAY) == [(6, 3)]
+
+    # Expired and stale entries within the horizon leave the heap instead of being rescanned
+    index.near_expiry(7, today=date(2026, 3, 3))
+    assert sorted(entry[1] for entry in index.by_expiry) == [5, 6]
+
+
+def _seeded(repo: InMemoryRepository) -> InMemoryRepository:
+    repo.seed("blood_inventory", [{"blood_bank_id": 7, "blood_type": "O-", "units": 5}])
+    repo.seed("blood_batches", [
+        {"blood_bank_id": 7, "blood_type": "O-", "units": 3, "expiry_date": "2030-01-01"},
+        {"blood_bank_id": 7, "blood_type": "O-", "units": 2, "expiry_date": "2030-02-01"},
+    ])
+    return repo
+
+
+def test_reload_replays_changes_made_while_it_reads():
+    index = FefoIndex()
+    set_repository(_seeded(InMemoryRepository(latency=0.02)))
+
+    async def scenario():
+        await index.reload()
+        reload = asyncio.ensure_future(index.reload())
+        await asyncio.sleep(0.005)
+        index.commit([(1, 3)])
+        index.add({"id": 9, "blood_bank_id": 7, "blood_type": "O-", "units": 4, "expiry_date": "2030-03-01"})
+        await reload
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        set_repository(None)
+    assert index.epoch == 2
+    assert index.plan(7, "O-", 10) == [(2, 2), (9, 4)]
+
+
+def test_allocation_survives_a_rebuild_during_the_round_trip(monkeypatch):
+    index = FefoIndex()
+    monkeypatch.setattr(blood_bank_service, "fefo_index", index)
+    monkeypatch.setattr(blood_bank_service, "inventory_counters", InventoryCounters())
+
+    class RebuildingRepository(InMemoryRepository):
+        async def rpc(self, function, params=None):
+            result = await super().rpc(function, params)
+            if function == "consume_blood_batches":
+                # The scheduler's rebuild lands while the allocation is in flight
+                await index.reload()
+            return result
+
+    repo = _seeded(RebuildingRepository())
+    set_repository(repo)
+    try:
+        result = asyncio.run(BloodBankService(repo).allocate_units(7, "O-", 4))
+    finally:
+        set_repository(None)
+    assert result["allocations"] == [
+        {"batch_id": 1, "units": 3, "expiry_date": "2030-01-01"},
+        {"batch_id": 2, "units": 1, "expiry_date": "2030-02-01"},
+    ]
+    assert result["inventory_units"] == 1
+    # The rebuilt index already has the deduction; committing the plan again would empty batch 2
+    assert index.plan(7, "O-", 10) == [(2, 1)]
@@ -0,0 +1,60 @@
+import asyncio
+import random
+
+from app.core.config import settings
+from app.core.database import set_repository
+from app.core.geo import SpatialIndex, cells_covering, geohash_encode, haversine_km
+from app.services.location_service import LocationIndex
+from benchmarks.memory_repository import InMemoryRepository
+
+
+def test_geohash_encode_known_value():
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_within_matches_brute_force_across_cell_borders():
+    random.seed(7)
+    index = SpatialIndex(precision=5)
+    points = {}
+    for i in range(2000):
+        lat, lng = 18.5 + random.uniform(-0.5, 0.5), 73.8 + random.uniform(-0.5, 0.5)
+        index.upsert(i, lat, lng, {"id": i})
+        points[i] = (lat, lng)
+
+    hits = index.within(18.52, 73.85, 8)
+    expected = {i for i, (lat, lng) in points.items() if haversine_km(18.52, 73.85, lat, lng) <= 8}
+    assert {key for _, key, _ in hits} == expected
+    assert [d for d, _, _ in hits] == sorted(d for d, _, _ in hits)
+
+
+def test_nearest_honours_updates_and_predicate():
+    index = SpatialIndex(precision=5)
+    index.upsert(1, 19.07, 72.87, {"available": True})
+    index.upsert(2, 19.08, 72.88, {"available": False})
+    index.upsert(3, 18.52, 73.85, {"available": True})
+
+    nearest = index.nearest(19.07, 72.87, 2, predicate=lambda row: row["available"])
+    assert [key for _, key, _ in nearest] == [1, 3]
+
+    index.upsert(3, 19.0701, 72.8701, {"available": True})
+    index.remove(1)
+    assert [key for _, key, _ in index.nearest(19.07, 72.87, 1)] == [3]
+    assert [key for _, key, _ in index.nearest(19.07, 72.87, 5, radius_km=2)] == [3, 2]
+
+
+def test_cells_covering_includes_the_center_cell():
+    assert geohash_encode(18.52, 73.85, 5) in cells_covering(18.52, 73.85, 3, 5)
+
+
+def test_location_index_loads_past_the_server_row_cap(monkeypatch):
+    monkeypatch.setattr(settings, "TABLE_LOAD_BATCH_SIZE", 3)
+    repo = InMemoryRepository(max_rows=2)
+    repo.seed("hospitals", ({"name": f"H{i}", "latitude": 19.0 + i / 100, "longitude": 72.9} for i in range(7)))
+    set_repository(repo)
+    try:
+        index = LocationIndex("hospitals")
+        asyncio.run(index.reload())
+        assert sorted(index.rows) == list(range(1, 8))
+        assert len(asyncio.run(index.nearby(19.0, 72.9, 10))) == 7
+    finally:
+        set_repository(None)
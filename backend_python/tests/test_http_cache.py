@@ -0,0 +1,89 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.http_cache import ResponseCache
+
+
+def _app():
+    cache = ResponseCache(max_entries=16, ttl=60)
+    rows = {"1": {"id": 1, "name": "City Hospital"}}
+    loads = []
+
+    app = FastAPI()
+
+    @app.get("/hospitals/{hospital_id}")
+    async def read(hospital_id: str, request: Request):
+        async def load():
+            loads.append(hospital_id)
+            return rows.get(hospital_id)
+        return await cache.serve(request, [f"hospital:{hospital_id}"], load, not_found="Hospital not found")
+
+    @app.get("/hospitals")
+    async def read_all(request: Request):
+        async def load():
+            return list(rows.values())
+        return await cache.serve(request, ["hospitals"], load)
+
+    return TestClient(app), cache, rows, loads
+
+
+def test_etag_revalidation_and_tag_invalidation():
+    client, cache, rows, loads = _app()
+
+    first = client.get("/hospitals/1")
+    assert first.status_code == 200
+    assert first.json() == {"id": 1, "name": "City Hospital"}
+    assert "s-maxage" in first.headers["cache-control"]
+    etag = first.headers["etag"]
+
+    revalidated = client.get("/hospitals/1", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert loads == ["1"]
+
+    rows["1"] = {"id": 1, "name": "City Hospital (Trauma Centre)"}
+    cache.invalidate("hospital:1")
+    changed = client.get("/hospitals/1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert loads == ["1", "1"]
+
+
+def test_missing_rows_are_404_and_not_cached():
+    client, _, rows, loads = _app()
+    assert client.get("/hospitals/2").status_code == 404
+    rows["2"] = {"id": 2}
+    assert client.get("/hospitals/2").status_code == 200
+    assert loads == ["2", "2"]
+
+
+def test_tag_sets_only_hold_live_entries():
+    client, cache, _, _ = _app()
+    # Each query string is its own entry; the LRU evicts down to max_entries
+    for x in range(200):
+        assert client.get("/hospitals", params={"x": x}).status_code == 200
+    assert cache.tags["hospitals"] == set(cache.entries._data)
+    assert len(cache.tags["hospitals"]) == 16
+
+    client.get("/hospitals/1")
+    cache.invalidate("hospitals")
+    assert list(cache.tags) == ["hospital:1"]
+
+
+def test_each_content_encoding_has_its_own_etag(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_COMPRESS_MIN_BYTES", 16)
+    client, _, _, _ = _app()
+
+    plain = client.get("/hospitals/1", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/hospitals/1", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert plain.headers["etag"] != gzipped.headers["etag"]
+    # Only data-derived validators: the time of caching is not a modification time
+    assert "last-modified" not in plain.headers
+
+    # A cached gzip validator must not revalidate the identity bytes, and vice versa
+    cross = client.get("/hospitals/1", headers={"Accept-Encoding": "identity", "If-None-Match": gzipped.headers["etag"]})
+    assert cross.status_code == 200 and cross.json()["id"] == 1
+    same = client.get("/hospitals/1", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+    assert same.status_code == 304 and same.headers["vary"] == "Accept-Encoding"
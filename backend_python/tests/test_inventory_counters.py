@@ -0,0 +1,40 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.database import set_repository
+from app.services.inventory_counters import InventoryCounters
+from benchmarks.memory_repository import InMemoryRepository
+
+
+def test_counters_apply_deltas_per_type_city_and_bank():
+    counters = InventoryCounters()
+    counters.set_bank_city(1, "Pune")
+    counters.set_bank_city(2, "Mumbai")
+    counters.set_units(1, "A+", 10)
+    counters.set_units(2, "A+", 5)
+    counters.set_units(1, "A+", 7)
+    counters.set_units(1, "O-", 3)
+
+    assert counters.totals() == {"A+": 12, "O-": 3}
+    assert counters.totals(city=" pune ") == {"A+": 7, "O-": 3}
+    assert counters.bank_totals(2) == {"A+": 5}
+
+    # A bank moving city takes its stock with it
+    counters.set_bank_city(1, "Mumbai")
+    assert counters.totals(city="Pune") == {"A+": 0, "O-": 0}
+    assert counters.totals(city="Mumbai") == {"A+": 12, "O-": 3}
+    assert counters.totals() == {"A+": 12, "O-": 3}
+
+
+def test_reconcile_reads_past_the_server_row_cap(monkeypatch):
+    monkeypatch.setattr(settings, "TABLE_LOAD_BATCH_SIZE", 2)
+    repo = InMemoryRepository(max_rows=2)
+    repo.seed("blood_banks", ({"name": f"Bank {i}", "city": "Pune"} for i in range(5)))
+    repo.seed("blood_inventory", ({"blood_bank_id": i, "blood_type": "O-", "units": 2} for i in range(1, 6)))
+    set_repository(repo)
+    try:
+        counters = InventoryCounters()
+        asyncio.run(counters.reconcile())
+        assert counters.totals(city="Pune") == {"O-": 10}
+    finally:
+        set_repository(None)
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.api import LazyRouter, include_api_routers
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+
+
+@pytest.mark.anyio
+async def test_router_is_mounted_on_first_request_under_its_prefix():
+    app = FastAPI()
+    include_api_routers(app, "/api/v1", lazy=True)
+    assert sum(isinstance(route, LazyRouter) for route in app.router.routes) == 6
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/v1/donors/", headers={"Authorization": "Bearer mocktoken"})
+        assert response.status_code == 200
+        assert (await client.get("/api/v1/donorsx")).status_code == 404
+
+    pending = [route.prefix for route in app.router.routes if isinstance(route, LazyRouter)]
+    assert "/api/v1/donors" not in pending and "/api/v1/admin" in pending
+
+    paths = app.openapi()["paths"]
+    assert any(path.startswith("/api/v1/admin/") for path in paths)
+    assert not any(isinstance(route, LazyRouter) for route in app.router.routes)
+
+
+def test_cold_import_skips_supabase_sdk_and_endpoint_modules():
+    env = dict(os.environ, SUPABASE_URL="https://example.supabase.co", SUPABASE_KEY="key", LAZY_ROUTERS="true")
+    probe = (
+        "import sys, app.main; "
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in ('supabase', 'numpy') "
+        "or m.startswith('app.api.endpoints.')))"
+    )
+    done = subprocess.run([sys.executable, "-c", probe], cwd=BACKEND, env=env, capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+    assert done.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.core.database import set_repository
+from app.services import maintenance
+from app.services.fefo_index import fefo_index
+from app.services.inventory_counters import inventory_counters
+from app.services.request_events import request_events
+from benchmarks.memory_repository import InMemoryRepository
+
+
+@pytest.mark.anyio
+async def test_expired_batches_leave_inventory_and_the_fefo_index():
+    repo = InMemoryRepository()
+    bank = repo.seed("blood_banks", [{"name": "Central", "city": "Pune"}])[0]
+    yesterday, next_week = date.today() - timedelta(days=1), date.today() + timedelta(days=7)
+    await repo.rpc("ingest_blood_batches", {"p_blood_bank_id": bank["id"], "p_batches": [
+        {"blood_type": "O-", "units": 4, "expiry_date": yesterday.isoformat()},
+        {"blood_type": "O-", "units": 2, "expiry_date": next_week.isoformat()},
+        {"blood_type": "A+", "units": 3, "expiry_date": None},
+    ]})
+    set_repository(repo)
+    try:
+        await fefo_index.reload()
+        await inventory_counters.reconcile()
+        await maintenance.expire_batches()
+
+        inventory = {row["blood_type"]: row["units"] for row in await repo.select("blood_inventory")}
+        assert inventory == {"O-": 2, "A+": 3}
+        assert inventory_counters.bank_totals(bank["id"]) == {"O-": 2, "A+": 3}
+        assert sum(take for _, take in fefo_index.plan(bank["id"], "O-", 10, today=yesterday)) == 2
+
+        # Nothing left to expire: a second run changes nothing
+        await maintenance.expire_batches()
+        assert await repo.count("blood_batches", [("expired_units", "gt", 0)]) == 1
+    finally:
+        set_repository(None)
+
+
+@pytest.mark.anyio
+async def test_stale_pending_requests_escalate_and_alert():
+    repo = InMemoryRepository()
+    now = datetime.now(timezone.utc)
+    waited = {"fresh": 5, "stale": 45, "ancient": 180, "done": 180}
+    repo.seed("blood_requests", [
+        {
+            "patient_name": name, "blood_type": "O-", "urgency": "normal",
+            "status": "fulfilled" if name == "done" else "pending",
+            "created_at": (now - timedelta(minutes=minutes)).isoformat(),
+        }
+        for name, minutes in waited.items()
+    ])
+    set_repository(repo)
+    while not request_events.queue.empty():
+        request_events.queue.get_nowait()
+        request_events.queue.task_done()
+    try:
+        await maintenance.escalate_requests()
+        rows = {row["patient_name"]: (row["urgency"], row["is_critical"]) for row in await repo.select("blood_requests")}
+        assert rows == {
+            "fresh": ("normal", False), "stale": ("urgent", False),
+            "ancient": ("critical", True), "done": ("normal", False),
+        }
+        queued = [request_events.queue.get_nowait() for _ in range(request_events.queue.qsize())]
+        assert [(kind, request["patient_name"]) for kind, request in queued] == [
+            ("escalated", "stale"), ("escalated", "ancient"),
+        ]
+        for _ in queued:
+            request_events.queue.task_done()
+    finally:
+        set_repository(None)
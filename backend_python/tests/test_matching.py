@@ -0,0 +1,97 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.core.config import settings
+from app.core.database import set_repository
+from app.services import matching_service
+from app.services.donor_registry import DonorRegistry
+from app.services.location_service import LocationIndex
+from app.services.matching_service import MatchingService, compatible_donor_types, rank_blood_banks, rank_donors
+from benchmarks.memory_repository import InMemoryRepository
+
+
+def test_compatibility_expands_red_cells_and_reverses_plasma():
+    assert set(compatible_donor_types("A+")) == {"A+", "A-", "O+", "O-"}
+    assert compatible_donor_types("O-") == ["O-"]
+    assert set(compatible_donor_types("O+", "Plasma")) == {"A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"}
+    assert set(compatible_donor_types("AB-", "FFP")) == {"AB+", "AB-"}
+
+
+def test_rank_donors_filters_and_orders():
+    today = date(2026, 1, 1)
+    rows = [
+        {"id": 1, "blood_type": "O-", "latitude": 19.0, "longitude": 72.9, "available": True},
+        {"id": 2, "blood_type": "A+", "latitude": 19.001, "longitude": 72.9, "available": True},
+        {"id": 3, "blood_type": "B+", "latitude": 19.0, "longitude": 72.9, "available": True},
+        {"id": 4, "blood_type": "A+", "latitude": 19.0, "longitude": 72.9, "available": False},
+        {"id": 5, "blood_type": "A+", "latitude": 19.0, "longitude": 72.9, "available": True,
+         "last_donation": (today - timedelta(days=10)).isoformat()},
+        {"id": 6, "blood_type": "A-", "latitude": 25.0, "longitude": 80.0, "available": True},
+    ]
+    registry = DonorRegistry.from_rows(rows)
+    ranked = rank_donors(registry, "A+", None, "normal", 19.0, 72.9, 50, 10, today=today)
+    # Incompatible (B+), unavailable, recently donated and out-of-radius donors are dropped;
+    # the exact match outranks the universal O- donor
+    assert [registry.ids[i] for i, _, _ in ranked] == [2, 1]
+
+
+def test_rank_blood_banks_prefers_full_coverage():
+    banks = [
+        {"id": 10, "latitude": 19.0, "longitude": 72.9},
+        {"id": 11, "latitude": 19.01, "longitude": 72.9},
+        {"id": 12, "latitude": 19.0, "longitude": 72.9},
+    ]
+    units = {10: {"A+": 1}, 11: {"A+": 4, "O-": 2}}
+    ranked = rank_blood_banks(banks, units, "A+", 5, "normal", 19.0, 72.9, 50, 10)
+    assert [banks[i]["id"] for i, _, _, _ in ranked] == [11, 10]
+    assert ranked[0][3] == 6
+
+
+def _isolated(monkeypatch):
+    """Fresh indexes, so the module-wide ones loaded by other tests are not shared."""
+    monkeypatch.setattr(matching_service, "donor_registry", DonorRegistry())
+    for name, table in (("blood_bank_locations", "blood_banks"), ("hospital_locations", "hospitals")):
+        monkeypatch.setattr(matching_service, name, LocationIndex(table))
+
+
+def test_find_matches_ranks_every_bank_past_the_server_row_cap(monkeypatch):
+    _isolated(monkeypatch)
+    monkeypatch.setattr(settings, "TABLE_LOAD_BATCH_SIZE", 4)
+    repo = InMemoryRepository(max_rows=3)
+    repo.seed("blood_banks", (
+        {"name": f"Bank {i}", "city": "Pune", "address": "1", "phone": "1", "latitude": 18.5, "longitude": 73.8}
+        for i in range(8)
+    ))
+    repo.seed("blood_inventory", ({"blood_bank_id": i, "blood_type": "O-", "units": i} for i in range(1, 9)))
+    request = repo.seed("blood_requests", [{"blood_type": "O-", "units": 2}])[0]
+    set_repository(repo)
+    try:
+        matches = asyncio.run(MatchingService.find_matches(request["id"], lat=18.5, lng=73.8, limit=10))
+    finally:
+        set_repository(None)
+    assert sorted(bank["id"] for bank in matches["blood_banks"]) == list(range(1, 9))
+
+
+def test_find_matches_fills_the_donor_list_past_stale_registry_entries(monkeypatch):
+    _isolated(monkeypatch)
+    repo = InMemoryRepository()
+    # Donor 1 is nearest, then 2, 3, ...
+    repo.seed("donors", (
+        {"name": f"Donor {i}", "blood_type": "O-", "city": "Pune", "phone": "1", "available": True,
+         "latitude": 18.5 + i / 100, "longitude": 73.8}
+        for i in range(1, 7)
+    ))
+    request = repo.seed("blood_requests", [{"blood_type": "O-", "units": 1}])[0]
+    set_repository(repo)
+    try:
+        asyncio.run(matching_service.donor_registry.reload())
+        # Written by another worker after the registry loaded
+        asyncio.run(repo.update("donors", {"available": False}, [("id", "eq", 1)]))
+        asyncio.run(repo.delete("donors", [("id", "eq", 2)]))
+        matches = asyncio.run(MatchingService.find_matches(request["id"], lat=18.5, lng=73.8, limit=3))
+    finally:
+        set_repository(None)
+    assert [(d["id"], d["name"]) for d in matches["donors"]] == [(3, "Donor 3"), (4, "Donor 4"), (5, "Donor 5")]
+    assert matches["donors"][0]["distance_km"] > 0
+    # The fetched row corrected the stale registry entry
+    assert not matching_service.donor_registry.available[0]
@@ -0,0 +1,45 @@
+import pytest
+
+from app.core.repository import RepositoryError
+from benchmarks.memory_repository import InMemoryRepository
+
+
+@pytest.mark.anyio
+async def test_filters_keyset_order_and_defaults():
+    repo = InMemoryRepository()
+    repo.seed("blood_requests", (
+        {"blood_type": "O-" if i % 2 else "A+", "units": i, "hospital_id": i % 3} for i in range(1, 11)
+    ))
+
+    pending = await repo.select(
+        "blood_requests", columns="id,units", filters=[("status", "eq", "pending"), ("id", "lt", 8)],
+        order="id", desc=True, limit=3,
+    )
+    assert pending == [{"id": 7, "units": 7}, {"id": 6, "units": 6}, {"id": 5, "units": 5}]
+
+    await repo.update("blood_requests", {"status": "fulfilled"}, [("blood_type", "eq", "O-")])
+    assert await repo.count("blood_requests", [("status", "eq", "pending")]) == 5
+    assert await repo.count("blood_requests", [("hospital_id", "in", [0, 1]), ("units", "gte", 5)]) == 4
+    assert await repo.count("blood_requests", [("donor_id", "is", None)]) == 10
+
+    stats = await repo.rpc("admin_activity_stats")
+    assert stats["requests_by_status"] == {"pending": 5, "fulfilled": 5, "cancelled": 0}
+
+
+@pytest.mark.anyio
+async def test_fefo_functions_match_the_schema():
+    repo = InMemoryRepository()
+    ingested = await repo.rpc("ingest_blood_batches", {"p_blood_bank_id": 1, "p_batches": [
+        {"blood_type": "O-", "units": 4, "expiry_date": "2030-01-01"},
+        {"blood_type": "O-", "units": 2, "expiry_date": "2030-02-01"},
+    ]})
+    assert ingested["inventory"] == {"O-": 6}
+
+    first = ingested["batches"][0]["id"]
+    assert await repo.rpc("consume_blood_batches", {
+        "p_blood_bank_id": 1, "p_blood_type": "O-", "p_allocations": [{"batch_id": first, "units": 3}],
+    }) == {"units": 3}
+    with pytest.raises(RepositoryError, match="stale allocation"):
+        await repo.rpc("consume_blood_batches", {
+            "p_blood_bank_id": 1, "p_blood_type": "O-", "p_allocations": [{"batch_id": first, "units": 3}],
+        })
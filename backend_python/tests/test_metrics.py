@@ -0,0 +1,50 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.database import set_repository
+from app.services.donor_registry import donor_registry
+from benchmarks.memory_repository import InMemoryRepository
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, '/a"b')
+
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{route="/a\\"b",le="0.1"} 2',
+        'demo_seconds_bucket{route="/a\\"b",le="1"} 3',
+        'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 4',
+        'demo_seconds_sum{route="/a\\"b"} 3.65',
+        'demo_seconds_count{route="/a\\"b"} 4',
+    ]
+
+
+@pytest.mark.anyio
+async def test_requests_are_labelled_by_route_with_their_db_round_trips(client: AsyncClient):
+    repo = InMemoryRepository()
+    repo.seed("donors", ({"name": f"Donor {i}", "blood_type": "O-", "city": "Pune"} for i in range(3)))
+    route = f"{settings.API_V1_STR}/donors/"
+    round_trips = metrics.HTTP_DB_ROUND_TRIPS.values.get((route,), [None, 0, 0])[1]
+    set_repository(repo)
+    try:
+        # Loaded up front, so the request makes only its own page query
+        await donor_registry.reload()
+        headers = {"Authorization": "Bearer mocktoken"}
+        assert (await client.get(f"{settings.API_V1_STR}/donors/?city=Pune", headers=headers)).status_code == 200
+        await client.get(f"{settings.API_V1_STR}/no-such-path/12345")
+        body = (await client.get("/metrics")).text
+    finally:
+        set_repository(None)
+        donor_registry.loaded_at = None
+
+    assert metrics.HTTP_DB_ROUND_TRIPS.values[(route,)][1] == round_trips + 1
+    assert f'beos_http_requests_total{{method="GET",route="{route}",status="2xx"}}' in body
+    assert 'route="unmatched",status="4xx"' in body and "12345" not in body
+    assert 'beos_db_call_duration_seconds_count{table="donors",operation="select"}' in body
+    assert f'beos_http_request_phase_seconds_count{{route="{route}",phase="auth"}}' in body
+    assert 'beos_socket_connections 0' in body
@@ -0,0 +1,131 @@
+import os
+import re
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.core import postgres_repository as pg
+from app.core.config import settings
+from app.core.database import get_repository, set_repository
+from app.core.repository import RepositoryError
+
+SCHEMA_SQL = Path(__file__).resolve().parents[1] / "supabase_schema.sql"
+
+
+def test_queries_compile_to_parameterized_sql():
+    sql, args = pg.select_sql(
+        "donors", "id,name", [("city", "eq", "Pune"), ("id", "in", [1, 2]), ("available", "is", True)],
+        order="id", desc=True, limit=20,
+    )
+    assert sql == (
+        'SELECT "id", "name" FROM "donors" WHERE "city" = $1 AND "id" = ANY($2) AND "available" IS TRUE '
+        'ORDER BY "id" DESC LIMIT $3'
+    )
+    assert args == ["Pune", [1, 2], 20]
+    # Same shape, different values: identical text, so the prepared statement is reused
+    assert pg.select_sql("donors", "id,name", [("city", "eq", "Delhi"), ("id", "in", [3]), ("available", "is", True)],
+                         order="id", desc=True, limit=5)[0] == sql
+
+    sql, args = pg.insert_sql("blood_inventory", [
+        {"blood_bank_id": 1, "blood_type": "O-", "units": 3},
+        {"blood_bank_id": 1, "blood_type": "A+"},
+    ], on_conflict="blood_bank_id,blood_type")
+    assert sql == (
+        'INSERT INTO "blood_inventory" ("blood_bank_id", "blood_type", "units") VALUES ($1, $2, $3), ($4, $5, DEFAULT) '
+        'ON CONFLICT ("blood_bank_id", "blood_type") DO UPDATE SET "units" = EXCLUDED."units" RETURNING *'
+    )
+    assert args == [1, "O-", 3, 1, "A+"]
+
+    assert pg.update_sql("blood_requests", {"status": "fulfilled"}, [("id", "eq", 7)]) == (
+        'UPDATE "blood_requests" SET "status" = $1 WHERE "id" = $2 RETURNING *', ["fulfilled", 7],
+    )
+    assert pg.rpc_sql("consume_blood_batches", {"p_blood_bank_id": 1, "p_allocations": [{"batch_id": 2, "units": 1}]}) == (
+        'SELECT * FROM "consume_blood_batches"("p_blood_bank_id" => $1, "p_allocations" => $2)',
+        [1, '[{"batch_id": 2, "units": 1}]'],
+    )
+
+    with pytest.raises(RepositoryError):
+        pg.select_sql('donors"; DROP TABLE donors; --')
+    with pytest.raises(RepositoryError):
+        pg.count_sql("donors", [("id", "regex", 1)])
+
+
+@pytest.mark.skipif(pg.asyncpg is None, reason="needs the asyncpg package")
+def test_pool_is_sized_by_its_own_setting(monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_BACKEND", "postgres")
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://localhost/beos")
+    monkeypatch.setattr(settings, "DB_POOL_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    set_repository(None)
+    try:
+        repo = get_repository()
+        # The pool is created on first query, so nothing connects here
+        assert isinstance(repo, pg.PostgresRepository) and repo.max_size == 7
+    finally:
+        set_repository(None)
+
+
+# Against a real server: TEST_DATABASE_URL=postgresql://postgres@localhost/postgres pytest -k postgres
+DSN = os.getenv("TEST_DATABASE_URL")
+needs_postgres = pytest.mark.skipif(
+    not DSN or pg.asyncpg is None, reason="needs TEST_DATABASE_URL and the asyncpg package"
+)
+
+
+def _scratch_schema_sql(schema: str) -> str:
+    """
+    supabase_schema.sql moved into ``schema``, without the Supabase-only auth links and policies
+    (or the uuid-ossp extension, which nothing calls and plain servers may lack).
+    """
+    sql = SCHEMA_SQL.read_text().replace("public.", f"{schema}.")
+    sql = re.sub(r"REFERENCES auth\.users\(id\)", "", sql)
+    return "\n".join(
+        line for line in sql.splitlines() if not any(skip in line for skip in ("ROW LEVEL SECURITY", "CREATE POLICY", "CREATE EXTENSION"))
+    )
+
+
+@pytest.fixture
+async def postgres_repo():
+    schema = f"beos_test_{uuid.uuid4().hex[:8]}"
+    connection = await pg.asyncpg.connect(DSN)
+    await connection.execute(f"CREATE SCHEMA {schema}")
+    await connection.execute(_scratch_schema_sql(schema))
+    repo = pg.PostgresRepository(DSN, max_size=4, schema=schema)
+    try:
+        yield repo
+    finally:
+        await repo.close()
+        await connection.execute(f"DROP SCHEMA {schema} CASCADE")
+        await connection.close()
+
+
+@needs_postgres
+@pytest.mark.anyio
+async def test_postgres_backend_round_trip(postgres_repo):
+    repo = postgres_repo
+    user_id = str(uuid.uuid4())
+    bank = await repo.insert("blood_banks", {"user_id": user_id, "name": "Central", "city": "Pune", "address": "1 Road", "phone": "1"})
+    assert bank[0]["user_id"] == user_id and isinstance(bank[0]["created_at"], str)
+    bank_id = bank[0]["id"]
+
+    ingested = await repo.rpc("ingest_blood_batches", {"p_blood_bank_id": bank_id, "p_batches": [
+        {"blood_type": "O-", "units": 4, "expiry_date": "2030-01-01"},
+        {"blood_type": "O-", "units": 2, "expiry_date": "2030-02-01"},
+    ]})
+    assert ingested["inventory"] == {"O-": 6}
+    batch_id = ingested["batches"][0]["id"]
+
+    batches = await repo.select("blood_batches", "id,expiry_date", [("blood_bank_id", "eq", bank_id),
+                                ("expiry_date", "lt", "2030-01-15")])
+    assert batches == [{"id": batch_id, "expiry_date": "2030-01-01"}]
+    assert await repo.count("blood_batches", [("id", "in", [batch_id])]) == 1
+
+    banks = await repo.rpc("search_blood_banks", {"p_blood_type": "O-", "p_min_units": 5, "p_city": "pu"})
+    assert [(b["id"], b["units_available"]) for b in banks] == [(bank_id, 6)]
+
+    allocation = {"p_blood_bank_id": bank_id, "p_blood_type": "O-", "p_allocations": [{"batch_id": batch_id, "units": 3}]}
+    assert await repo.rpc("consume_blood_batches", allocation) == {"units": 3}
+    with pytest.raises(RepositoryError, match="stale allocation"):
+        await repo.rpc("consume_blood_batches", allocation)
+    assert (await repo.select_one("blood_inventory", [("blood_bank_id", "eq", bank_id)], "units"))["units"] == 3
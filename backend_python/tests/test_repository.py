@@ -0,0 +1,66 @@
+import asyncio
+from datetime import date
+
+import httpx
+import pytest
+
+from app.core.repository import PostgrestRepository, Repository, RepositoryError, _quote, _to_params
+from app.models.schemas import BloodType
+
+
+def test_filters_encode_as_postgrest_params():
+    assert _to_params([
+        ("units", "gte", 1),
+        ("available", "eq", True),
+        ("donor_id", "is", None),
+        ("blood_type", "eq", BloodType.O_NEG),
+        ("expiry_date", "lt", date(2026, 1, 31)),
+        ("city", "in", ["Pune", "New Delhi", 'say "hi"', "a,b"]),
+    ]) == [
+        ("units", "gte.1"),
+        ("available", "eq.true"),
+        ("donor_id", "is.null"),
+        ("blood_type", "eq.O-"),
+        ("expiry_date", "lt.2026-01-31"),
+        ("city", 'in.(Pune,"New Delhi","say \\"hi\\"","a,b")'),
+    ]
+    assert _quote("(x)") == '"(x)"'
+    with pytest.raises(ValueError):
+        _to_params([("units", "between", 1)])
+
+
+def _repository(handler) -> PostgrestRepository:
+    client = httpx.AsyncClient(base_url="http://db/rest/v1", transport=httpx.MockTransport(handler))
+    return PostgrestRepository("http://db", "key", client=client)
+
+
+@pytest.mark.parametrize("content_range, total", [("0-24/3573", 3573), ("*/0", 0), ("*/*", 0), (None, 0)])
+def test_count_reads_the_total_from_content_range(content_range, total):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, headers={"content-range": content_range} if content_range else {})
+
+    repo = _repository(handler)
+    assert asyncio.run(repo.count("donors", [("available", "eq", True)])) == total
+    assert seen[0].method == "HEAD"
+    assert seen[0].headers["prefer"] == "count=exact"
+    assert seen[0].url.params["available"] == "eq.true"
+
+
+def test_errors_carry_the_postgrest_message():
+    repo = _repository(lambda request: httpx.Response(400, json={"message": "column donors.nope does not exist"}))
+    with pytest.raises(RepositoryError) as raised:
+        asyncio.run(repo.select("donors", columns="nope"))
+    assert raised.value.status_code == 400
+    assert "does not exist" in str(raised.value)
+
+
+def test_backends_must_implement_the_whole_interface():
+    class SelectOnly(Repository):
+        async def select(self, table, columns="*", filters=(), order=None, desc=False, limit=None):
+            return []
+
+    with pytest.raises(TypeError):
+        SelectOnly()
@@ -0,0 +1,39 @@
+import asyncio
+
+from app.services.request_events import RequestEventPipeline
+
+
+def test_events_fan_out_to_city_and_compatible_type_rooms():
+    emitted = []
+
+    async def emit(rooms, event, data):
+        emitted.append((event, rooms, data["id"]))
+
+    async def scenario():
+        pipeline = RequestEventPipeline(emit=emit, maxsize=10)
+        consumer = asyncio.create_task(pipeline.run())
+        # Resolving the hospital's city needs the database; no hospital means type rooms only
+        pipeline.publish("created", {"id": 1, "blood_type": "O+", "urgency": "critical"})
+        pipeline.publish("updated", {"id": 1, "blood_type": "O+", "status": "fulfilled"})
+        await asyncio.wait_for(pipeline.queue.join(), 1)
+        consumer.cancel()
+
+    asyncio.run(scenario())
+    rooms = ["type_O+", "type_O-"]
+    assert emitted == [
+        ("new-request", rooms, 1),
+        ("emergency_broadcast", rooms, 1),
+        ("request-fulfilled", rooms, 1),
+    ]
+
+
+def test_publish_never_blocks_and_keeps_newest():
+    async def scenario():
+        pipeline = RequestEventPipeline(emit=None, maxsize=2)
+        for i in range(5):
+            pipeline.publish("updated", {"id": i, "blood_type": "A+"})
+        return pipeline
+
+    pipeline = asyncio.run(scenario())
+    assert pipeline.dropped == 3
+    assert [pipeline.queue.get_nowait()[1]["id"] for _ in range(2)] == [3, 4]
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.database import set_repository
+from app.core.repository import RepositoryError
+from app.core.scheduler import Cron, DatabaseLeaderElection, Every, Job, LocalLeaderElection, Scheduler
+from benchmarks.memory_repository import InMemoryRepository
+
+NOW = datetime(2026, 10, 18, 13, 7, 30, tzinfo=timezone.utc)  # a Sunday
+
+
+def test_cron_next_run():
+    assert Cron("5 * * * *").next_run(NOW) == NOW.replace(hour=14, minute=5, second=0)
+    assert Cron("*/15 9-17 * * *").next_run(NOW) == NOW.replace(minute=15, second=0)
+    assert Cron("0 0 * * 7").next_run(NOW) == datetime(2026, 10, 25, tzinfo=timezone.utc)
+    # Both day fields restricted: either one matches
+    assert Cron("0 9 1 * 1-5").next_run(NOW) == datetime(2026, 10, 19, 9, tzinfo=timezone.utc)
+    assert Cron("30 2 29 2 *").next_run(NOW) == datetime(2028, 2, 29, 2, 30, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        Cron("61 * * * *")
+
+
+@pytest.mark.anyio
+async def test_overlapping_fires_are_skipped_and_failures_recorded():
+    release = asyncio.Event()
+    runs = 0
+
+    async def slow():
+        nonlocal runs
+        runs += 1
+        await release.wait()
+
+    scheduler = Scheduler()
+    job = scheduler.add(Job("slow", slow, Every(60)))
+    first = scheduler.fire(job)
+    await asyncio.sleep(0)
+    assert scheduler.fire(job) is None and job.skipped == 1
+    release.set()
+    assert await first is True and runs == 1
+
+    async def broken():
+        raise RepositoryError("down", status_code=503)
+
+    failing = scheduler.add(Job("broken", broken, Every(60)))
+    assert await scheduler.run(failing) is False
+    assert scheduler.snapshot()["broken"]["last_error"] == "down"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("backend", ["local", "database"])
+async def test_only_one_worker_runs_leader_jobs(backend, tmp_path):
+    set_repository(InMemoryRepository())
+    try:
+        def election():
+            return LocalLeaderElection(str(tmp_path)) if backend == "local" else DatabaseLeaderElection()
+
+        ran = []
+
+        def worker(name):
+            scheduler = Scheduler(election())
+
+            async def job():
+                ran.append(name)
+
+            scheduler.add(Job("expire", job, Every(60)))
+            scheduler.add(Job("refresh", job, Every(60), leader=False))
+            return scheduler
+
+        workers = [worker("a"), worker("b")]
+        for _ in range(2):
+            for scheduler in workers:
+                await scheduler.run(scheduler.jobs["expire"])
+        assert ran == ["a", "a"]
+
+        for scheduler in workers:
+            await scheduler.run(scheduler.jobs["refresh"])
+        assert ran[2:] == ["a", "b"]
+
+        # The leader shuts down: the other worker takes over at its next fire
+        await workers[0].stop()
+        await workers[1].run(workers[1].jobs["expire"])
+        assert ran[-1] == "b"
+        await workers[1].stop()
+    finally:
+        set_repository(None)
@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import cache, security
+from app.core.config import settings
+from app.core.tokens import InvalidTokenError, UnverifiableTokenError, verify_token
+
+SECRET = "test-secret"
+
+
+def make_token(claims, secret=SECRET, alg="HS256"):
+    def b64(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    signing_input = f"{b64({'alg': alg, 'typ': 'JWT'})}.{b64(claims)}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}"
+
+
+def test_verify_token_accepts_valid_hs256():
+    token = make_token({"sub": "abc", "aud": "authenticated", "exp": time.time() + 60})
+    claims = verify_token(token, secret=SECRET, audience="authenticated")
+    assert claims["sub"] == "abc"
+
+
+def test_verify_token_rejects_forged_and_expired():
+    forged = make_token({"sub": "abc", "exp": time.time() + 60}, secret="other")
+    with pytest.raises(InvalidTokenError):
+        verify_token(forged, secret=SECRET)
+
+    expired = make_token({"sub": "abc", "exp": time.time() - 60})
+    with pytest.raises(InvalidTokenError):
+        verify_token(expired, secret=SECRET)
+
+
+def test_verify_token_rejects_alg_none_and_unknown_keys():
+    token = make_token({"sub": "abc", "exp": time.time() + 60}, alg="none")
+    with pytest.raises(InvalidTokenError):
+        verify_token(token, secret=SECRET)
+
+    rs_token = make_token({"sub": "abc", "exp": time.time() + 60}, alg="RS256")
+    with pytest.raises(UnverifiableTokenError):
+        verify_token(rs_token, secret=SECRET, keys={})
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    """Supabase configured with local HS256 verification; returns an authenticate(token) helper."""
+    monkeypatch.setattr(settings, "SUPABASE_URL", "http://supabase.test")
+    monkeypatch.setattr(settings, "SUPABASE_KEY", "anon-key")
+    monkeypatch.setattr(settings, "JWT_SECRET", SECRET)
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "local")
+    monkeypatch.setattr(settings, "AUTH_REMOTE_FALLBACK", False)
+    security._token_cache.clear()
+
+    def authenticate(token):
+        return asyncio.run(security.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)))
+
+    yield authenticate
+    security._token_cache.clear()
+
+
+def test_cached_user_expires_no_later_than_the_token(auth, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    verified = []
+    verify_locally = security.verify_locally
+
+    async def counting(token):
+        verified.append(token)
+        return await verify_locally(token)
+
+    monkeypatch.setattr(security, "verify_locally", counting)
+    token = make_token({"sub": "abc", "aud": "authenticated", "exp": time.time() + 30})
+
+    assert auth(token).id == "abc"
+    assert auth(token).id == "abc"
+    assert len(verified) == 1
+    # AUTH_CACHE_TTL_SECONDS is 300, but the entry must not outlive the token's 30 s
+    clock[0] += 31
+    auth(token)
+    assert len(verified) == 2
+
+
+def test_remote_fallback_only_when_enabled(auth, monkeypatch):
+    # No secret: the HS256 token cannot be checked locally
+    monkeypatch.setattr(settings, "JWT_SECRET", "")
+
+    async def verify_remotely(token):
+        return security.AuthenticatedUser({"id": "remote-user"})
+
+    monkeypatch.setattr(security, "verify_remotely", verify_remotely)
+    token = make_token({"sub": "abc", "exp": time.time() + 60})
+    with pytest.raises(HTTPException) as raised:
+        auth(token)
+    assert raised.value.status_code == 401
+
+    monkeypatch.setattr(settings, "AUTH_REMOTE_FALLBACK", True)
+    assert auth(token).id == "remote-user"
+
+
+def test_mock_admin_never_returned_when_supabase_is_configured(auth, monkeypatch):
+    monkeypatch.setattr(settings, "ENVIRONMENT", "development")
+    for token in ("mocktoken", make_token({"sub": "abc", "exp": time.time() + 60}, secret="other")):
+        with pytest.raises(HTTPException) as raised:
+            auth(token)
+        assert raised.value.status_code == 401
+
+    # Only an unconfigured development setup falls back to the mock admin
+    monkeypatch.setattr(settings, "SUPABASE_URL", "")
+    assert auth("mocktoken").role == "admin"
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    with pytest.raises(HTTPException):
+        auth("mocktoken")
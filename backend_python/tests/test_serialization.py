@@ -0,0 +1,77 @@
+import json
+from typing import Dict, List
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.core.pagination import Page
+from app.core.serialization import brotli, encode_body, fast_response, negotiate_encoding
+from app.models import schemas
+
+ROW = {"id": 7, "name": "Asha", "blood_type": "O-", "phone": "98", "city": "Pune", "extra": "not in model"}
+
+
+def test_trusted_rows_match_the_response_model():
+    trusted = json.loads(encode_body([ROW], List[schemas.Donor], mode="trusted"))
+    validated = json.loads(encode_body([ROW], List[schemas.Donor], mode="validate"))
+    assert trusted == validated
+    assert "extra" not in trusted[0]
+    assert trusted[0]["available"] is True
+
+    request = json.loads(encode_body(
+        {"id": 1, "blood_type": "A+", "units": 2, "urgency": "urgent"}, schemas.BloodRequest, mode="trusted"
+    ))
+    assert request["status"] == "pending"
+    assert request["component_type"] == "Whole Blood"
+
+
+class Tagged(BaseModel):
+    id: int
+    tags: List[str] = Field(default_factory=list)
+    meta: Dict[str, int] = Field(default_factory=lambda: {"version": 1})
+
+
+def test_trusted_rows_fill_default_factories_like_validation():
+    rows = [{"id": 1}, {"id": 2, "tags": ["rare"]}]
+    trusted = json.loads(encode_body(rows, List[Tagged], mode="trusted"))
+    assert trusted == json.loads(encode_body(rows, List[Tagged], mode="validate"))
+    assert trusted[0] == {"id": 1, "tags": [], "meta": {"version": 1}}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.0, identity", None),
+    ("*;q=0.5", "br" if brotli else "gzip"),
+    ("*, gzip;q=0, br;q=0", None),
+    ("br;q=0, gzip;q=0.8", "gzip"),
+    ("identity", None),
+])
+def test_accept_encoding_honours_q_values(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_large_bodies_are_compressed_and_carry_the_cursor(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_COMPRESS_MIN_BYTES", 1024)
+    app = FastAPI()
+
+    @app.get("/donors")
+    async def donors(request: Request, n: int):
+        page = Page([dict(ROW, id=i) for i in range(n)], next_cursor="abc")
+        return fast_response(request, page, List[schemas.Donor])
+
+    client = TestClient(app)
+    small = client.get("/donors", params={"n": 1})
+    assert "content-encoding" not in small.headers
+    assert small.headers["x-next-cursor"] == "abc"
+
+    big = client.get("/donors", params={"n": 100}, headers={"Accept-Encoding": "gzip"})
+    assert big.headers["content-encoding"] == "gzip"
+    assert big.headers["vary"] == "Accept-Encoding"
+    assert len(big.json()) == 100
+
+    plain = client.get("/donors", params={"n": 100}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
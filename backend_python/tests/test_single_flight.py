@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.core.database import set_repository
+from app.core.repository import RepositoryError
+from app.core.single_flight import SingleFlight, request_reads
+from app.services.emergency_service import EmergencyService
+from benchmarks.memory_repository import InMemoryRepository
+
+
+class SlowRepository(InMemoryRepository):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    async def select(self, table, columns="*", filters=(), order=None, desc=False, limit=None):
+        self.queries += 1
+        await asyncio.sleep(0.01)
+        return [{"id": filters[0][2], "status": "pending"}]
+
+    async def update(self, table, values, filters):
+        return [{"id": filters[0][2], **values}]
+
+
+@pytest.mark.anyio
+async def test_a_burst_of_identical_reads_makes_one_query():
+    repo = SlowRepository()
+    set_repository(repo)
+    before = request_reads.leaders, request_reads.followers
+    try:
+        results = await asyncio.gather(*(EmergencyService.get_request_by_id(7) for _ in range(1000)))
+        assert repo.queries == 1
+        assert all(result is results[0] for result in results)
+        assert (request_reads.leaders - before[0], request_reads.followers - before[1]) == (1, 999)
+
+        # Once the burst is over the next read queries again; other keys never share
+        await asyncio.gather(EmergencyService.get_request_by_id(7), EmergencyService.get_request_by_id(8))
+        assert repo.queries == 3
+    finally:
+        set_repository(None)
+
+
+@pytest.mark.anyio
+async def test_errors_are_shared_and_cancelled_callers_do_not_cancel_the_query():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RepositoryError("down", status_code=503)
+
+    results = await asyncio.gather(*(flight.do("k", failing) for _ in range(5)), return_exceptions=True)
+    assert calls == 1 and all(isinstance(r, RepositoryError) for r in results)
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "row"
+
+    leader = asyncio.ensure_future(flight.do("k", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "row"
+    assert flight.coalescing_ratio == pytest.approx(5 / 7)
+
+
+@pytest.mark.anyio
+async def test_forget_makes_later_readers_start_a_new_query():
+    flight = SingleFlight("test")
+    versions = iter(["before write", "after write"])
+
+    async def load():
+        value = next(versions)
+        await asyncio.sleep(0.01)
+        return value
+
+    early = asyncio.ensure_future(flight.do("k", load))
+    await asyncio.sleep(0)
+    flight.forget("k")
+    assert await flight.do("k", load) == "after write"
+    assert await early == "before write"
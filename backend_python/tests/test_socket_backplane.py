@@ -0,0 +1,69 @@
+import asyncio
+import shutil
+import tempfile
+
+import pytest
+import socketio
+
+from app.core.socket_backplane import LocalPubSubManager, create_client_manager
+
+
+class RecordingServer(socketio.AsyncServer):
+    def __init__(self, **kwargs):
+        super().__init__(async_mode="asgi", **kwargs)
+        self.delivered = []
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        self.delivered.append((eio_sid, eio_pkt.data))
+
+
+async def _worker(directory, eio_sid, room):
+    manager = LocalPubSubManager(directory)
+    server = RecordingServer(client_manager=manager)
+    sid = await manager.connect(eio_sid, "/")
+    await manager.enter_room(sid, "/", room)
+    server.manager_initialized = True
+    manager.initialize()
+    return server, manager
+
+
+@pytest.fixture
+def socket_dir():
+    # pytest's tmp_path can exceed the Unix socket path limit
+    directory = tempfile.mkdtemp(prefix="sio-")
+    yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def test_room_emit_reaches_members_on_other_workers(socket_dir):
+    async def scenario():
+        first, first_manager = await _worker(socket_dir, "eio-a", "city_Pune")
+        second, second_manager = await _worker(socket_dir, "eio-b", "city_Pune")
+        other, other_manager = await _worker(socket_dir, "eio-c", "city_Delhi")
+        await asyncio.sleep(0.05)  # listeners bind their sockets
+
+        await first.emit("emergency-alert", {"blood_type": "O-"}, room="city_Pune")
+        for _ in range(100):
+            if second.delivered:
+                break
+            await asyncio.sleep(0.01)
+
+        for manager in (first_manager, second_manager, other_manager):
+            await manager.close()
+        return first, second, other
+
+    first, second, other = asyncio.run(scenario())
+    assert [sid for sid, _ in first.delivered] == ["eio-a"]
+    assert [sid for sid, _ in second.delivered] == ["eio-b"]
+    assert "emergency-alert" in second.delivered[0][1]
+    assert other.delivered == []
+
+
+def test_overlong_socket_directory_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        LocalPubSubManager(str(tmp_path / ("x" * 120)))
+
+
+def test_backplane_selection():
+    assert create_client_manager("") is None
+    assert isinstance(create_client_manager("local"), LocalPubSubManager)
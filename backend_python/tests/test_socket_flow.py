@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+from engineio import packet as eio_packet
+
+from app.core.socket_flow import BoundedAsyncServer, SocketMetrics, UpdateCoalescer
+
+
+def test_updates_within_window_are_merged_into_one_delta():
+    sent = []
+
+    async def emit(rooms, event, data):
+        sent.append((rooms, event, data))
+
+    async def scenario():
+        metrics = SocketMetrics()
+        coalescer = UpdateCoalescer(emit, window=0.01, metrics=metrics)
+        base = coalescer.remember({"id": 7, "status": "pending", "units": 2, "blood_type": "A+"})
+        coalescer.submit(["city_Pune"], "request-updated", {"id": 7, "status": "pending", "units": 3})
+        coalescer.submit(["type_A+"], "request-updated", {"id": 7, "status": "pending", "units": 4})
+        coalescer.submit(["city_Pune"], "request-fulfilled", {"id": 7, "status": "fulfilled", "units": 4})
+        await asyncio.sleep(0.05)
+        return metrics, base
+
+    metrics, base = asyncio.run(scenario())
+    rooms, event, data = sent[0]
+    assert len(sent) == 1 and (rooms, event) == (["city_Pune", "type_A+"], "request-fulfilled")
+    # The delta names the revision it applies to and the one it produces
+    assert data == {"id": 7, "delta": True, "base": base, "rev": data["rev"], "status": "fulfilled", "units": 4}
+    assert data["rev"] != base
+    assert metrics.coalesced == 2
+    assert metrics.deltas_sent == 1
+
+
+def test_slow_client_queue_drops_oldest_messages_only():
+    server = BoundedAsyncServer(async_mode="asgi", max_client_queue=8)
+
+    async def scenario():
+        queue = asyncio.Queue()
+        queue.put_nowait(eio_packet.Packet(eio_packet.PING))
+        for n in range(9):
+            queue.put_nowait(eio_packet.Packet(eio_packet.MESSAGE, data=str(n)))
+        server._trim(queue)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    kept = asyncio.run(scenario())
+    assert len(kept) == 6
+    assert kept[0].packet_type == eio_packet.PING
+    assert [p.data for p in kept[1:]] == ["4", "5", "6", "7", "8"]
+    assert server.metrics.dropped == 4
+
+
+def test_emits_route_through_the_bounded_queue_hook():
+    # Guards the private python-socketio/engineio hooks BoundedAsyncServer relies on
+    server = BoundedAsyncServer(async_mode="asgi", max_client_queue=4)
+    sent = []
+
+    async def send_packet(eio_sid, pkt):
+        sent.append(pkt)
+        server.eio.sockets[eio_sid].queue.put_nowait(pkt)
+
+    async def scenario():
+        server.eio.sockets["e1"] = SimpleNamespace(queue=asyncio.Queue())
+        server.eio.send_packet = send_packet
+        sid = await server.manager.connect("e1", "/")
+        for n in range(6):
+            await server.emit("request-updated", {"n": n}, to=sid)
+        return server.eio.sockets["e1"].queue.qsize()
+
+    assert asyncio.run(scenario()) == 4
+    assert len(sent) == 6
+    assert server.metrics.dropped == 2
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.database import set_repository
+from app.services.stock_search_cache import StockSearchCache, stock_search_cache
+from benchmarks.memory_repository import InMemoryRepository
+
+
+def test_cache_reads_through_and_invalidates_per_blood_type():
+    cache = StockSearchCache(max_entries=8, ttl=60)
+    calls = []
+
+    async def load(tag):
+        calls.append(tag)
+        return [tag]
+
+    async def scenario():
+        assert await cache.get_or_load("A+", (1, None), lambda: load("a")) == ["a"]
+        assert await cache.get_or_load("A+", (1, None), lambda: load("a2")) == ["a"]
+        await cache.get_or_load("O-", (1, None), lambda: load("o"))
+
+        cache.invalidate("A+")
+        assert await cache.get_or_load("A+", (1, None), lambda: load("a3")) == ["a3"]
+        assert await cache.get_or_load("O-", (1, None), lambda: load("o2")) == ["o"]
+
+    asyncio.run(scenario())
+    assert calls == ["a", "o", "a3"]
+
+
+def test_result_loaded_across_an_invalidation_is_not_stored():
+    cache = StockSearchCache(max_entries=8, ttl=60)
+
+    async def racing_load():
+        cache.invalidate("B+")  # an inventory write lands while the query is in flight
+        return ["stale"]
+
+    async def scenario():
+        assert await cache.get_or_load("B+", "k", racing_load) == ["stale"]
+        assert await cache.get_or_load("B+", "k", lambda: asyncio.sleep(0, ["fresh"])) == ["fresh"]
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.anyio
+async def test_unknown_blood_types_are_rejected_before_the_cache(client: AsyncClient):
+    repo = InMemoryRepository()
+    bank = repo.seed("blood_banks", [{"name": "Central", "city": "Pune", "address": "1 MG Road", "phone": "1"}])[0]
+    repo.seed("blood_inventory", [{"blood_bank_id": bank["id"], "blood_type": "A+", "units": 4}])
+    set_repository(repo)
+    try:
+        url = f"{settings.API_V1_STR}/blood-banks/search"
+        assert (await client.get(f"{url}/A+")).json()[0]["units_available"] == 4
+        for junk in ("Z+", "a+", "A%2B%2B"):
+            assert (await client.get(f"{url}/{junk}")).status_code == 422
+        assert set(stock_search_cache.buckets) == {"A+"}
+    finally:
+        set_repository(None)
+        stock_search_cache.invalidate()
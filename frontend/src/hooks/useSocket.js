@@ -1,5 +1,6 @@
 import { useState, useEffect, useCallback, useRef } from 'react';
 import socketService from '../services/socket';
+import { getRequestById } from '../services/api';
 
 export function useSocket() {
     const [isConnected, setIsConnected] = useState(false);
@@ -57,36 +58,61 @@ export function useCriticalAlerts() {
     return { alerts, clearAlert };
 }
 
+// Coalesced updates may carry only the fields changed since revision `base`
+// ({ id, delta: true, base, rev, ... }). They apply only to a copy at that
+// revision; any other copy (loaded over REST, or from before this client
+// joined) is refetched whole instead.
+function mergeUpdate(current, update) {
+    if (!update.delta) return update;
+    const { delta, base, ...fields } = update;
+    return { ...current, ...fields };
+}
+
 export function useRealTimeRequests(initialRequests = []) {
     const [requests, setRequests] = useState(initialRequests);
+    const requestsRef = useRef(requests);
 
     useEffect(() => {
-        const handleNewRequest = (request) => {
-            setRequests(prev => [request, ...prev]);
+        requestsRef.current = requests;
+    }, [requests]);
+
+    useEffect(() => {
+        const replace = (id, row) => {
+            requestsRef.current = requestsRef.current.map(r => r.id === id ? row : r);
+            setRequests(requestsRef.current);
         };
 
-        const handleUpdated = (updated) => {
-            setRequests(prev => prev.map(r => r.id === updated.id ? updated : r));
+        const resync = (update) => {
+            getRequestById(update.id)
+                // The refetched row is at least as new as the update that prompted it
+                .then(row => replace(update.id, { ...row, rev: update.rev }))
+                .catch(err => console.warn('Failed to refresh request', update.id, err.message));
         };
 
-        const handleFulfilled = (fulfilled) => {
-            setRequests(prev => prev.map(r => r.id === fulfilled.id ? fulfilled : r));
+        const handleNewRequest = (request) => {
+            setRequests(prev => [request, ...prev]);
         };
 
-        const handleCancelled = (cancelled) => {
-            setRequests(prev => prev.map(r => r.id === cancelled.id ? cancelled : r));
+        const handleChange = (update) => {
+            const current = requestsRef.current.find(r => r.id === update.id);
+            if (!current) return;
+            if (update.delta && current.rev !== update.base) {
+                resync(update);
+                return;
+            }
+            replace(update.id, mergeUpdate(current, update));
         };
 
         socketService.on('new-request', handleNewRequest);
-        socketService.on('request-updated', handleUpdated);
-        socketService.on('request-fulfilled', handleFulfilled);
-        socketService.on('request-cancelled', handleCancelled);
+        socketService.on('request-updated', handleChange);
+        socketService.on('request-fulfilled', handleChange);
+        socketService.on('request-cancelled', handleChange);
 
         return () => {
             socketService.off('new-request', handleNewRequest);
-            socketService.off('request-updated', handleUpdated);
-            socketService.off('request-fulfilled', handleFulfilled);
-            socketService.off('request-cancelled', handleCancelled);
+            socketService.off('request-updated', handleChange);
+            socketService.off('request-fulfilled', handleChange);
+            socketService.off('request-cancelled', handleChange);
         };
     }, []);
 
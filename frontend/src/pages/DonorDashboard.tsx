@@ -11,6 +11,8 @@ import {
 import { useToast } from '../context/ToastContext';
 // @ts-ignore
 import { useSocket } from '../context/SocketContext';
+// @ts-ignore
+import { joinLocation } from '../services/socket';
 import { ProfileEditor, RequestCard } from '../components/DashboardComponents';
 import { EmergencyMapView, MissionControlHeader } from '../components/EmergencyMapView';
 import { Heart, Users, Droplet, Trophy, Award, Star, Clock, Calendar, Shield } from 'lucide-react';
@@ -58,6 +60,27 @@ const DonorDashboard: React.FC = () => {
         };
     }, [socket, showToast]);
 
+    // Alert rooms: the donor's geohash cell for their blood type, or their city without coordinates.
+    // Rooms do not survive a reconnect, so join again on every connect.
+    useEffect(() => {
+        if (!socket || !profile) return;
+
+        const joinAlertRooms = () => {
+            if (profile.latitude != null && profile.longitude != null) {
+                joinLocation(socket, profile.latitude, profile.longitude, profile.blood_type);
+            } else if (profile.city) {
+                socket.emit('join-city', profile.city);
+                if (profile.blood_type) socket.emit('join-blood-type', profile.blood_type);
+            }
+        };
+
+        joinAlertRooms();
+        socket.on('connect', joinAlertRooms);
+        return () => {
+            socket.off('connect', joinAlertRooms);
+        };
+    }, [socket, profile?.latitude, profile?.longitude, profile?.blood_type, profile?.city]);
+
     const fetchDashboardData = async () => {
         try {
             setLoading(true);
@@ -115,6 +115,20 @@ class SocketService {
     joinBloodType(bloodType) {
         this.emit('join-blood-type', bloodType);
     }
+
+    // Alerts for requests within the alert radius, regardless of city names
+    joinLocation(latitude, longitude, bloodType) {
+        if (!this.socket) this.connect();
+        joinLocation(this.socket, latitude, longitude, bloodType);
+    }
+}
+
+// Join the alert room of the geohash cell holding (latitude, longitude).
+// With a blood type, only requests that type can donate to arrive.
+export function joinLocation(socket, latitude, longitude, bloodType) {
+    const payload = { lat: latitude, lng: longitude };
+    if (bloodType) payload.blood_type = bloodType;
+    socket.emit('join-location', payload);
 }
 
 export const socketService = new SocketService();